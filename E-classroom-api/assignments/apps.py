@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AssignmentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'assignments'
+
+    def ready(self):
+        # register who can read submitted files
+        from assignments import media  # noqa: F401
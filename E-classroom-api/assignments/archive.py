@@ -0,0 +1,30 @@
+import os
+
+from django.utils.text import slugify
+
+from core.models import Submission
+from core.storage import media_storage
+from core.streaming import read_chunks
+
+
+def submission_entries(assignment):
+    """
+    (name in the zip, chunks) of every file handed in for the assignment, for
+    core.streaming.stream_zip. Submissions are read in chunks from a cursor and each
+    file is opened only when the archive gets to it, so one file is open at a time.
+    A file missing from the storage is left out rather than breaking the download.
+    """
+    submissions = (
+        Submission.objects.filter(assignment=assignment)
+        .select_related('student')
+        .only('file', 'student__username')
+        .order_by('student__username', 'student_id')
+    )
+    for submission in submissions.iterator(chunk_size=500):
+        try:
+            f = media_storage.open(submission.file.name, 'rb')
+        except FileNotFoundError:
+            continue
+        extension = os.path.splitext(submission.file.name)[1]
+        name = f'{slugify(submission.student.username) or "student"}-{submission.student_id}{extension}'
+        yield name, read_chunks(f)
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
+from core.models import Enrollment, Submission
+
+
+def gradebook_header(assignments):
+    return ['student', 'email'] + [assignment.title for assignment in assignments] + ['total', 'handed_in']
+
+
+def gradebook_rows(classroom, assignments):
+    """
+    One row per student of the classroom with the grade of every assignment, '' when
+    nothing was handed in and 'ungraded' when it was but not graded yet.
+    The students are read with a server side cursor (fetchmany on SQLite) in chunks
+    of GRADEBOOK_CHUNK_SIZE, each chunk fetching its submissions with one more query,
+    so memory stays the same whatever the size of the class.
+    """
+    submissions = Submission.objects.filter(assignment__classroom=classroom).only(
+        'student_id', 'assignment_id', 'grade',
+    )
+    enrollments = (
+        Enrollment.objects.filter(classroom=classroom)
+        .select_related('student')
+        .only('student__username', 'student__email')
+        .order_by('student__username', 'student_id')
+        .prefetch_related(Prefetch('student__submissions', queryset=submissions, to_attr='class_submissions'))
+    )
+    for enrollment in enrollments.iterator(chunk_size=settings.GRADEBOOK_CHUNK_SIZE):
+        student = enrollment.student
+        grades = {submission.assignment_id: submission.grade for submission in student.class_submissions}
+        row = [student.username, student.email]
+        for assignment in assignments:
+            if assignment.pk not in grades:
+                row.append('')
+            else:
+                row.append('ungraded' if grades[assignment.pk] is None else grades[assignment.pk])
+        row.append(sum(grade for grade in grades.values() if grade is not None))
+        row.append(len(grades))
+        yield row
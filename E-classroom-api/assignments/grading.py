@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import Submission
+from dashboard.stats import add, tutor_of
+from notifications.inbox import notify_users
+
+
+def grade(assignment, grades):
+    """
+    Sets the grade (and feedback when given) of submissions of the assignment.
+    grades are dicts with submission, grade and optionally feedback keys. The
+    submissions are loaded with one query and written back with bulk_update, a
+    single UPDATE ... CASE per batch instead of one per submission. The students
+    given a grade are notified and the tutor's count of submissions to grade is
+    moved by the difference, bulk_update sends no signal.
+    """
+    by_id = {item['submission']: item for item in grades}
+    too_high = [pk for pk, item in by_id.items() if item['grade'] is not None and item['grade'] > assignment.max_points]
+    if too_high:
+        raise ValidationError({'grades': f'Grades above {assignment.max_points} for submissions {sorted(too_high)}'})
+
+    submissions = list(
+        Submission.objects.filter(assignment=assignment, pk__in=by_id).only('id', 'student', 'grade', 'feedback', 'graded_at')
+    )
+    unknown = set(by_id) - {submission.pk for submission in submissions}
+    if unknown:
+        raise ValidationError({'grades': f'Unknown submissions {sorted(unknown)}'})
+
+    now = timezone.now()
+    ungraded = sum(submission.grade is None for submission in submissions)
+    for submission in submissions:
+        item = by_id[submission.pk]
+        submission.grade = item['grade']
+        if 'feedback' in item:
+            submission.feedback = item['feedback']
+        submission.graded_at = now if item['grade'] is not None else None
+    Submission.objects.bulk_update(
+        submissions, ['grade', 'feedback', 'graded_at'], batch_size=settings.GRADE_BULK_UPDATE_BATCH_SIZE,
+    )
+    ungraded -= sum(submission.grade is None for submission in submissions)
+    if ungraded:
+        add(tutor_of(assignment.classroom_id), pending_assignments=-ungraded)
+    notify_users(
+        [submission.student_id for submission in submissions if submission.grade is not None],
+        'grade', f'{assignment.title} was graded', data={'assignment': assignment.pk},
+        classroom_id=assignment.classroom_id,
+    )
+    return len(submissions)
@@ -0,0 +1,12 @@
+from django.db.models import Q
+
+from core.media import media_access
+from core.models import Submission
+
+
+@media_access('assignments/submissions/')
+def submission_access(user, name):
+    # the student who handed it in and the tutor of the class
+    return user is not None and Submission.objects.filter(
+        Q(student=user) | Q(assignment__classroom__tutor=user), file=name,
+    ).exists()
@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from core.media import media_url
+from core.models import Assignment, Submission
+from core.utils import file_validator
+
+
+class AssignmentSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for listing, creating and updating the assignments of a class
+    """
+
+    class Meta:
+        model = Assignment
+        fields = ['id', 'classroom', 'title', 'description', 'due_date', 'max_points', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+
+class SubmissionSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for handing in an assignment and listing what was handed in
+        file is uploaded, file_url is a url signed for the requesting user
+        the grade and feedback are set by the tutor through GradeSerializer
+    """
+    file = serializers.FileField(write_only=True, validators=[file_validator])
+    file_url = serializers.SerializerMethodField()
+    student_name = serializers.CharField(source='student.username', read_only=True)
+
+    class Meta:
+        model = Submission
+        fields = ['id', 'assignment', 'student', 'student_name', 'file', 'file_url', 'submitted_at',
+                  'grade', 'feedback', 'graded_at']
+        read_only_fields = ['id', 'assignment', 'student', 'submitted_at', 'grade', 'feedback', 'graded_at']
+
+    def get_file_url(self, obj):
+        return media_url(obj.file.name, self.context.get('request'))
+
+
+class GradeSerializer(serializers.Serializer):
+    submission = serializers.IntegerField()
+    grade = serializers.IntegerField(min_value=0, allow_null=True)
+    feedback = serializers.CharField(allow_blank=True, required=False)
+
+
+class BulkGradeSerializer(serializers.Serializer):
+    grades = GradeSerializer(many=True, allow_empty=False, max_length=settings.GRADE_BULK_MAX_ITEMS)
@@ -0,0 +1,79 @@
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.text import slugify
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Assignment, Classroom, Enrollment, Submission
+
+
+class SubmissionArchiveTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        classroom = Classroom.objects.create_with_code(name='Math 101', tutor=self.tutor)
+        self.assignment = Assignment.objects.create(classroom=classroom, title='Homework 1')
+        self.students = User.objects.bulk_create([
+            User(email=f'student{i}@example.com', username=f'Student {i}', role=1) for i in range(20)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(classroom=classroom, student=s) for s in self.students])
+        self.contents = {}
+        for student in self.students:
+            content = b'%PDF-1.7 ' + os.urandom(256 * 1024)
+            submission = Submission(assignment=self.assignment, student=student)
+            submission.file.save('work.pdf', ContentFile(content))
+            self.contents[f'{slugify(student.username)}-{student.pk}.pdf'] = content
+
+        self.url = reverse('assignments:submission-archive', args=[self.assignment.pk])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+
+    def test_zip_holds_every_submission(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename="homework-1-submissions.zip"')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self.contents)
+
+    def test_memory_does_not_grow_with_the_archive(self):
+        res = self.client.get(self.url)
+
+        tracemalloc.start()
+        size = sum(len(chunk) for chunk in res.streaming_content)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertGreater(size, 5 * 1024 * 1024)
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_missing_file_is_left_out(self):
+        Submission.objects.filter(student=self.students[0]).update(file='assignments/submissions/gone.pdf')
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(self.client.get(self.url).streaming_content)))
+
+        self.assertEqual(len(archive.namelist()), 19)
+
+    def test_only_the_tutor_downloads(self):
+        self.client.force_authenticate(user=self.students[0])
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,173 @@
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Assignment, Classroom, Enrollment, Submission
+
+
+def create_user(email, role=1):
+    return get_user_model().objects.create_user(email=email, username=email.split('@')[0], role=role, password='testpass123')
+
+
+def submission_url(assignment):
+    return reverse('assignments:my-submission', args=[assignment.pk])
+
+
+def grades_url(assignment):
+    return reverse('assignments:bulk-grade', args=[assignment.pk])
+
+
+def gradebook_url(classroom, file_type):
+    return reverse('assignments:gradebook', args=[classroom.pk, file_type])
+
+
+class AssignmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tutor = create_user('tutor@example.com', role=2)
+        cls.classroom = Classroom.objects.create_with_code(name='Math 101', tutor=cls.tutor)
+        cls.students = get_user_model().objects.bulk_create([
+            get_user_model()(email=f'student{i:03}@example.com', username=f'student{i:03}', role=1) for i in range(300)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(classroom=cls.classroom, student=s) for s in cls.students])
+        cls.homework = Assignment.objects.create(classroom=cls.classroom, title='Homework 1', max_points=20)
+        cls.essay = Assignment.objects.create(classroom=cls.classroom, title='Essay')
+        # everyone handed in the homework, the first ten the essay
+        Submission.objects.bulk_create(
+            [Submission(assignment=cls.homework, student=s, file=f'assignments/submissions/{s.pk}.pdf') for s in cls.students]
+            + [Submission(assignment=cls.essay, student=s, file=f'assignments/submissions/e{s.pk}.pdf', grade=90)
+               for s in cls.students[:10]]
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+
+    def test_student_hands_in_and_replaces_a_file(self):
+        student = create_user('late@example.com')
+        Enrollment.objects.create(classroom=self.classroom, student=student)
+        assignment = Assignment.objects.create(classroom=self.classroom, title='Lab report')
+        self.client.force_authenticate(user=student)
+
+        res = self.client.put(submission_url(assignment), {'file': SimpleUploadedFile('report.pdf', b'%PDF-1.7 one')})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        Submission.objects.filter(pk=res.data['id']).update(grade=50)
+
+        res = self.client.put(submission_url(assignment), {'file': SimpleUploadedFile('report.pdf', b'%PDF-1.7 two')})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        submission = Submission.objects.get(assignment=assignment, student=student)
+        self.assertIsNone(submission.grade)
+        with submission.file.open('rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.7 two')
+
+        res = self.client.put(submission_url(assignment), {'file': SimpleUploadedFile('report.exe', b'MZ')})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(GRADE_BULK_UPDATE_BATCH_SIZE=150)
+    def test_bulk_grading_is_a_constant_number_of_queries(self):
+        submissions = list(self.homework.submissions.order_by('pk').values_list('pk', flat=True))
+        grades = [{'submission': pk, 'grade': i % 21, 'feedback': 'ok'} for i, pk in enumerate(submissions)]
+
+        # the assignment, the submissions, one UPDATE per batch of 150, the tutor's dashboard
+        # count, then in a savepoint the grade notifications (3 INSERTs, SQLite takes 999
+        # parameters) and their counters
+        with self.assertNumQueries(11):
+            res = self.client.post(grades_url(self.homework), {'grades': grades}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['graded'], 300)
+        self.assertEqual(Submission.objects.get(pk=submissions[25]).grade, 4)
+        self.assertFalse(self.homework.submissions.filter(graded_at=None).exists())
+
+    def test_invalid_grades_reject_the_batch(self):
+        first, second = self.homework.submissions.order_by('pk')[:2]
+        essay_submission = self.essay.submissions.first()
+
+        res = self.client.post(grades_url(self.homework), {'grades': [
+            {'submission': first.pk, 'grade': 10}, {'submission': second.pk, 'grade': 21},
+        ]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(grades_url(self.homework), {'grades': [
+            {'submission': first.pk, 'grade': 10}, {'submission': essay_submission.pk, 'grade': 10},
+        ]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertIsNone(Submission.objects.get(pk=first.pk).grade)
+
+    def test_only_the_tutor_grades(self):
+        self.client.force_authenticate(user=self.students[0])
+        submission = self.homework.submissions.first()
+
+        res = self.client.post(grades_url(self.homework), {'grades': [{'submission': submission.pk, 'grade': 20}]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_outsiders_do_not_see_assignments(self):
+        self.client.force_authenticate(user=create_user('outsider@example.com'))
+
+        res = self.client.get(reverse('assignments:assignment-detail', args=[self.homework.pk]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(GRADEBOOK_CHUNK_SIZE=50)
+    def test_csv_gradebook(self):
+        Submission.objects.filter(assignment=self.homework, student=self.students[0]).update(grade=15)
+
+        res = self.client.get(gradebook_url(self.classroom, 'csv'))
+        # one cursor over the students and a query for the submissions of every 50 of them
+        with self.assertNumQueries(7):
+            content = b''.join(res.streaming_content).decode()
+
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename="math-101-gradebook.csv"')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ['student', 'email', 'Homework 1', 'Essay', 'total', 'handed_in'])
+        self.assertEqual(len(rows), 301)
+        self.assertEqual(rows[1], ['student000', 'student000@example.com', '15', '90', '105', '2'])
+        self.assertEqual(rows[-1], ['student299', 'student299@example.com', 'ungraded', '', '0', '1'])
+
+    def test_xlsx_gradebook(self):
+        res = self.client.get(gradebook_url(self.classroom, 'xlsx'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 301)
+        self.assertIn('<t xml:space="preserve">student299@example.com</t>', sheet)
+
+    def test_exports_keep_user_text_as_text(self):
+        get_user_model().objects.filter(pk=self.students[0].pk).update(username='=HYPERLINK("http://evil")\x07')
+
+        res = self.client.get(gradebook_url(self.classroom, 'csv'))
+        rows = list(csv.reader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertIn('\'=HYPERLINK("http://evil")\x07', [row[0] for row in rows])
+
+        res = self.client.get(gradebook_url(self.classroom, 'xlsx'))
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        texts = [t.text for t in sheet.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t')]
+        self.assertIn('\'=HYPERLINK("http://evil")', texts)
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(user=self.students[0])
+
+        res = self.client.get(gradebook_url(self.classroom, 'csv'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
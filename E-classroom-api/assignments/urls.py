@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+app_name = 'assignments'
+
+urlpatterns = [
+    path('', views.AssignmentListView.as_view(), name='assignment-list'),
+    path('<int:pk>/', views.AssignmentDetailView.as_view(), name='assignment-detail'),
+    path('<int:pk>/submission/', views.MySubmissionView.as_view(), name='my-submission'),
+    path('<int:pk>/submissions/', views.SubmissionListView.as_view(), name='submission-list'),
+    path('<int:pk>/submissions.zip', views.SubmissionArchiveView.as_view(), name='submission-archive'),
+    path('<int:pk>/grades/', views.BulkGradeView.as_view(), name='bulk-grade'),
+    path('gradebook/<int:classroom_pk>.<str:file_type>', views.GradebookExportView.as_view(), name='gradebook'),
+]
@@ -0,0 +1,174 @@
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from classrooms.access import get_classroom, is_member
+from core.models import Assignment, Submission
+from core.streaming import stream_csv, stream_xlsx, stream_zip
+from . import grading
+from .archive import submission_entries
+from .gradebook import gradebook_header, gradebook_rows
+from .serializers import AssignmentSerializer, BulkGradeSerializer, SubmissionSerializer
+
+EXPORT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def get_assignment(request, pk, tutor=False):
+    """The assignment if the user is in its class, tutor=True only lets the tutor of the class through."""
+    assignment = get_object_or_404(Assignment.objects.select_related('classroom'), pk=pk)
+    if not is_member(request.user, assignment.classroom):
+        raise NotFound()
+    if tutor and assignment.classroom.tutor_id != request.user.pk:
+        raise PermissionDenied('Only the tutor of the class can do this.')
+    return assignment
+
+
+@extend_schema(tags=["Assignments"])
+class AssignmentListView(generics.ListCreateAPIView):
+    """
+    GET: lists the assignments of the class given by the `classroom` query parameter, by due date.
+    POST: creates an assignment, only by the tutor of the class.
+    """
+    serializer_class = AssignmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        try:
+            classroom_id = int(self.request.query_params['classroom'])
+        except (KeyError, ValueError):
+            raise NotFound('classroom query parameter required')
+        classroom = get_classroom(self.request, classroom_id)
+        return Assignment.objects.filter(classroom=classroom).order_by('due_date', 'id')
+
+    def perform_create(self, serializer):
+        if serializer.validated_data['classroom'].tutor_id != self.request.user.pk:
+            raise PermissionDenied('Only the tutor of the class can add assignments.')
+        serializer.save()
+
+
+@extend_schema(tags=["Assignments"])
+class AssignmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    API for retrieving an assignment, the tutor of the class can also update and delete it.
+    """
+    serializer_class = AssignmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_assignment(self.request, self.kwargs['pk'], tutor=self.request.method not in permissions.SAFE_METHODS)
+
+    def perform_update(self, serializer):
+        # an assignment stays in its class
+        serializer.save(classroom=serializer.instance.classroom)
+
+
+@extend_schema(tags=["Assignments"])
+class MySubmissionView(APIView):
+    """
+    GET: the submission of the student for the assignment.
+    PUT: hands in the file (multipart, `file`), replacing the one handed in before
+        along with its grade.
+    """
+    serializer_class = SubmissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        assignment = get_assignment(request, pk)
+        submission = get_object_or_404(Submission, assignment=assignment, student=request.user)
+        return Response(self.serializer_class(submission, context={'request': request}).data)
+
+    def put(self, request, pk):
+        assignment = get_assignment(request, pk)
+        if assignment.classroom.tutor_id == request.user.pk:
+            raise PermissionDenied('Tutors do not hand in assignments.')
+        submission = Submission.objects.filter(assignment=assignment, student=request.user).first()
+        serializer = self.serializer_class(submission, data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(
+            assignment=assignment, student=request.user, submitted_at=timezone.now(),
+            grade=None, feedback='', graded_at=None,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK if submission else status.HTTP_201_CREATED)
+
+
+@extend_schema(tags=["Assignments"])
+class SubmissionListView(generics.ListAPIView):
+    """
+    API for the tutor listing what was handed in for an assignment.
+    """
+    serializer_class = SubmissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        assignment = get_assignment(self.request, self.kwargs['pk'], tutor=True)
+        return assignment.submissions.select_related('student').order_by('student__username', 'id')
+
+
+@extend_schema(tags=["Assignments"])
+class SubmissionArchiveView(APIView):
+    """
+    Downloads every file handed in for the assignment as one zip, named after the
+    students. The zip is built while it is sent, the files are stored uncompressed
+    (PDF and office files already are) and nothing is written to disk.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        assignment = get_assignment(request, pk, tutor=True)
+        response = StreamingHttpResponse(stream_zip(submission_entries(assignment), compress=False),
+                                         content_type='application/zip')
+        filename = f'{slugify(assignment.title) or "assignment"}-submissions.zip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+@extend_schema(tags=["Assignments"])
+class BulkGradeView(APIView):
+    """
+    Grades many submissions of the assignment at once:
+    {"grades": [{"submission": 1, "grade": 87, "feedback": "..."}, ...]}
+    A null grade clears it. The whole batch is rejected if one item is invalid.
+    """
+    serializer_class = BulkGradeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        assignment = get_assignment(request, pk, tutor=True)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        graded = grading.grade(assignment, serializer.validated_data['grades'])
+        return Response({'graded': graded})
+
+
+@extend_schema(tags=["Assignments"])
+class GradebookExportView(APIView):
+    """
+    Downloads the gradebook of a class as csv or xlsx, one row per student and one
+    column per assignment. It is written while it is sent, see assignments.gradebook.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, classroom_pk, file_type):
+        if file_type not in EXPORT_TYPES:
+            raise NotFound()
+        classroom = get_classroom(request, classroom_pk, tutor=True)
+        assignments = list(Assignment.objects.filter(classroom=classroom).order_by('due_date', 'id').only('title'))
+        header = gradebook_header(assignments)
+        rows = gradebook_rows(classroom, assignments)
+        content = stream_csv(header, rows) if file_type == 'csv' else stream_xlsx(header, rows, sheet_name='Gradebook')
+
+        response = StreamingHttpResponse(content, content_type=EXPORT_TYPES[file_type])
+        filename = f'{slugify(classroom.name) or "class"}-gradebook.{file_type}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
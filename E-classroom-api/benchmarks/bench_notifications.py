@@ -0,0 +1,89 @@
+"""
+Notifying a class: a row per student vs notifications.inbox, as classes grow.
+
+    python -m benchmarks.bench_notifications --sizes 100 1000 10000 --events 20
+
+For every class size, --events notifications are published to the class:
+    per-student  a Notification row per student (fan-out on write)
+    inbox        notifications.inbox.notify_class, one row and one counter statement
+then a student of the class lists their notifications through the API.
+Run against a throwaway database.
+"""
+import argparse
+import time
+
+from benchmarks.utils import print_table, setup_django, summarize, test_database, time_calls
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from core.models import Classroom, Enrollment, Notification  # noqa: E402
+from notifications import inbox  # noqa: E402
+
+
+def make_class(size, tutor, offset):
+    User = get_user_model()
+    classroom = Classroom.objects.create_with_code(name=f'Class of {size}', tutor=tutor)
+    users = User.objects.bulk_create([
+        User(email=f's{offset + i}@example.com', username=f's{offset + i}', password='!') for i in range(size)
+    ])
+    Enrollment.objects.bulk_create([Enrollment(classroom=classroom, student=user) for user in users])
+    return classroom, users
+
+
+def per_student(classroom, users, title):
+    Notification.objects.bulk_create([
+        Notification(classroom=classroom, recipient=user, kind='announcement', title=title) for user in users
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--events', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        tutor = get_user_model().objects.create_user(email='tutor@example.com', username='tutor', role=2, password='x')
+        rows, offset = [], 0
+        for size in args.sizes:
+            classroom, users = make_class(size, tutor, offset)
+            offset += size
+
+            before = Notification.objects.count()
+            start = time.perf_counter()
+            for i in range(args.events):
+                per_student(classroom, users, f'News {i}')
+            fan_out_seconds = time.perf_counter() - start
+            fan_out_rows = Notification.objects.count() - before
+            Notification.objects.filter(classroom=classroom).delete()
+
+            before = Notification.objects.count()
+            start = time.perf_counter()
+            for i in range(args.events):
+                inbox.notify_class(classroom.pk, 'announcement', f'News {i}')
+            inbox_seconds = time.perf_counter() - start
+            inbox_rows = Notification.objects.count() - before
+
+            client = APIClient()
+            client.force_authenticate(user=users[size // 2])
+            url = reverse('notifications:notification-list')
+            with override_settings(DEBUG=True):
+                reset_queries()
+                client.get(url)
+                queries = len(connection.queries)
+            list_latency = summarize(time_calls(client.get, [(url,)] * 50))
+
+            rows.append([size, f'{fan_out_seconds:.2f}', fan_out_rows, f'{inbox_seconds:.3f}', inbox_rows,
+                         queries, f'{list_latency["p50"] / 1000:.1f}'])
+        print(f'{args.events} notifications per class\n')
+        print_table(['students', 'per-student s', 'rows', 'inbox s', 'rows', 'list queries', 'list p50 ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Activation / password reset token lookup: legacy User.email_token vs the OneTimeToken table.
+
+The legacy path is what ActivateUserView used to do, a SELECT on the unindexed
+email_token column of the users table followed by an UPDATE of the user. It is
+recreated here in its own table since User no longer has the column.
+For every user count the script measures an activation with a valid token and
+an attempt with a wrong one:
+    legacy   SELECT on users.email_token, UPDATE of the user row
+    hashed   OneTimeToken.objects.consume, UPDATE of is_active
+
+    python -m benchmarks.bench_one_time_tokens --sizes 10000 100000 1000000
+
+--pending is the share of users holding an unused token.
+"""
+import argparse
+import random
+import secrets
+import time
+
+from benchmarks.utils import print_table, setup_django, summarize, test_database, time_calls
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import OneTimeToken  # noqa: E402
+
+LEGACY_TABLE = 'bench_legacy_users'
+BATCH_SIZE = 50000
+
+
+def grow(connection, start, count, pending):
+    """Adds count users to both tables, returns the tokens handed out to pending ones."""
+    User = get_user_model()
+    expires_at = timezone.now() + timezone.timedelta(days=1)
+    tokens = []
+    with connection.cursor() as cursor:
+        for offset in range(start, start + count, BATCH_SIZE):
+            ids = range(offset, min(offset + BATCH_SIZE, start + count))
+            users = User.objects.bulk_create(
+                [User(email=f'user{i}@example.com', username=f'user{i}', password='!') for i in ids]
+            )
+            legacy, one_time = [], []
+            for user in users:
+                token = None
+                if random.random() < pending:
+                    token = secrets.token_hex(8)
+                    tokens.append(token)
+                    one_time.append(OneTimeToken(
+                        token_hash=OneTimeToken.objects.hash(token),
+                        purpose=OneTimeToken.activation,
+                        user=user,
+                        expires_at=expires_at,
+                    ))
+                legacy.append((user.email, token, expires_at if token else None))
+            cursor.executemany(
+                f'INSERT INTO {LEGACY_TABLE} (email, is_active, email_token, token_expiration) VALUES (%s, 0, %s, %s)',
+                legacy,
+            )
+            OneTimeToken.objects.bulk_create(one_time, batch_size=BATCH_SIZE)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--pending', type=float, default=0.05)
+    parser.add_argument('--lookups', type=int, default=500)
+    args = parser.parse_args()
+
+    User = get_user_model()
+    with test_database() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE {LEGACY_TABLE} (id integer PRIMARY KEY, email varchar(255) NOT NULL UNIQUE, '
+                'is_active bool NOT NULL, email_token varchar(64) NULL, token_expiration datetime NULL)'
+            )
+
+        def legacy_activate(token):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT id, token_expiration FROM {LEGACY_TABLE} WHERE email_token = %s', [token])
+                row = cursor.fetchone()
+                if row is None:
+                    return False
+                cursor.execute(
+                    f'UPDATE {LEGACY_TABLE} SET is_active = 1, email_token = NULL, token_expiration = NULL WHERE id = %s',
+                    [row[0]],
+                )
+                return True
+
+        def hashed_activate(token):
+            user_id = OneTimeToken.objects.consume(token, OneTimeToken.activation)
+            if user_id is None:
+                return False
+            User.objects.filter(pk=user_id).update(is_active=True)
+            return True
+
+        rows, tokens, results = 0, [], []
+        for size in sorted(args.sizes):
+            start = time.perf_counter()
+            tokens += grow(connection, rows, size - rows, args.pending)
+            rows = size
+            print(f'{size:,} users: filled in {time.perf_counter() - start:.1f}s', flush=True)
+
+            # each valid token can be used once, the same ones go through both paths
+            random.shuffle(tokens)
+            valid, tokens = [(t,) for t in tokens[:args.lookups]], tokens[args.lookups:]
+            wrong = [(secrets.token_hex(8),) for _ in range(args.lookups)]
+
+            for label, func in (('legacy', legacy_activate), ('hashed', hashed_activate)):
+                valid_stats = summarize(time_calls(func, valid))
+                wrong_stats = summarize(time_calls(func, wrong))
+                results.append((
+                    f'{size:,}', label,
+                    f"{valid_stats['p50']:.1f}", f"{valid_stats['p99']:.1f}",
+                    f"{wrong_stats['p50']:.1f}", f"{wrong_stats['p99']:.1f}",
+                ))
+
+        print()
+        print_table(
+            ('users', 'path', 'valid p50 us', 'valid p99 us', 'wrong p50 us', 'wrong p99 us'),
+            results,
+        )
+
+
+if __name__ == '__main__':
+    main()
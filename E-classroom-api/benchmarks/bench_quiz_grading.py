@@ -0,0 +1,120 @@
+"""
+Grading multiple choice attempts: answer by answer in Python vs quizzes.grading.
+
+    python -m benchmarks.bench_quiz_grading --attempts 100000 --questions 50
+
+First the scoring alone, on answers already in memory:
+    loop     a Python loop over every answer of every attempt, like grading on submit did
+    numpy    quizzes.grading.score, one matrix comparison and product per test
+Then a regrade after a key correction through quizzes.grading.grade against a
+throwaway database: reading the answers, scoring them and writing the scores back,
+compared with writing the same scores with bulk_update.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.utils import print_table, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+
+from core.models import Attempt, Classroom, Question, Test  # noqa: E402
+from quizzes import grading  # noqa: E402
+
+BATCH_SIZE = 20000
+
+
+def loop_score(answers, key, points):
+    scores = []
+    for row in answers:
+        total = 0
+        for position, option in enumerate(row):
+            if option == key[position]:
+                total += points[position]
+        scores.append(total)
+    return scores
+
+
+def fill(count, questions, answers):
+    User = get_user_model()
+    tutor = User.objects.create_user(email='tutor@example.com', username='tutor', role=2, password='x')
+    classroom = Classroom.objects.create_with_code(name='Bench', tutor=tutor)
+    test = Test.objects.create(classroom=classroom, title='Bench')
+    Question.objects.bulk_create([
+        Question(test=test, position=i, text=f'q{i}', options=['a', 'b', 'c', 'd'], correct_option=0)
+        for i in range(questions)
+    ])
+    grading.compile_key(test)
+    for offset in range(0, count, BATCH_SIZE):
+        rows = answers[offset:offset + BATCH_SIZE]
+        students = User.objects.bulk_create([
+            User(email=f's{offset + i}@example.com', username=f's{offset + i}', password='!') for i in range(len(rows))
+        ])
+        Attempt.objects.bulk_create([
+            Attempt(test=test, student=student, status=Attempt.submitted, answers=row.tobytes())
+            for student, row in zip(students, rows)
+        ], batch_size=BATCH_SIZE)
+    return test
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attempts', type=int, default=100000)
+    parser.add_argument('--questions', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    answers = rng.integers(-1, 4, (args.attempts, args.questions)).astype(np.int8)
+    key = rng.integers(0, 4, args.questions).astype(np.int8)
+    points = rng.integers(1, 4, args.questions).astype(np.int64)
+
+    rows = []
+    start = time.perf_counter()
+    expected = loop_score(answers.tolist(), key.tolist(), points.tolist())
+    rows.append(('loop', f'{time.perf_counter() - start:.3f}'))
+    start = time.perf_counter()
+    scores = grading.score(answers, key, points)
+    rows.append(('numpy', f'{time.perf_counter() - start:.3f}'))
+    assert scores.tolist() == expected
+
+    print(f'scoring {args.attempts:,} attempts of {args.questions} questions')
+    print_table(('engine', 'seconds'), rows)
+
+    with test_database():
+        start = time.perf_counter()
+        test = fill(args.attempts, args.questions, answers)
+        print(f'\nfilled in {time.perf_counter() - start:.1f}s', flush=True)
+
+        rows = []
+        start = time.perf_counter()
+        graded = grading.grade(test)
+        rows.append(('first grading', graded, f'{time.perf_counter() - start:.2f}'))
+
+        # correct the key of one question, every attempt is stale
+        Question.objects.filter(test=test, position=0).update(correct_option=1)
+        grading.compile_key(test)
+        start = time.perf_counter()
+        graded = grading.grade(test, stale_only=True)
+        rows.append(('regrade after correction', graded, f'{time.perf_counter() - start:.2f}'))
+
+        start = time.perf_counter()
+        graded = grading.grade(test, stale_only=True)
+        rows.append(('regrade, nothing stale', graded, f'{time.perf_counter() - start:.2f}'))
+
+        start = time.perf_counter()
+        ids = list(Attempt.objects.filter(test=test).order_by('pk').values_list('pk', flat=True))
+        Attempt.objects.bulk_update(
+            [Attempt(pk=pk, score=value, key_version=test.key_version) for pk, value in zip(ids, scores.tolist())],
+            ['score', 'key_version'], batch_size=1000,
+        )
+        rows.append(('same write with bulk_update', len(ids), f'{time.perf_counter() - start:.2f}'))
+
+        print()
+        print_table(('pass', 'attempts', 'seconds'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Refresh token revocation check: legacy blacklist vs hashed keys + bloom filter.
+
+The legacy path is the lookup RefreshTokenSerializer used to do, an equality match
+on a unique varchar(500) column holding whole JWTs. It is recreated here in its own
+table since the real table now stores hashed keys.
+For every blacklist size the script measures the check done on each refresh for
+tokens that were never revoked (the common case) and for revoked ones:
+    legacy   SELECT on the full-token column
+    hashed   SELECT on BlacklistedToken.key without the filter
+    filter   core.revocation.revoked_tokens.is_revoked (ORM query on a filter hit)
+
+    python -m benchmarks.bench_revocation --sizes 10000 100000 1000000 10000000
+
+With the default sqlite settings the test database is the file at SQLITE_TEST_PATH,
+the 10M row step needs several GB of free disk there.
+"""
+import argparse
+import os
+import random
+import string
+import time
+
+from benchmarks.utils import print_table, setup_django, summarize, test_database, time_calls
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import BlacklistedToken  # noqa: E402
+from core.revocation import revoked_tokens  # noqa: E402
+
+LEGACY_TABLE = 'bench_legacy_blacklist'
+TOKEN_ALPHABET = string.ascii_letters + string.digits + '-_'
+BATCH_SIZE = 50000
+
+
+def fake_token():
+    # same shape and length as the tokens AuthTokenView used to issue
+    parts = (36, 120, 43)
+    return '.'.join(''.join(random.choices(TOKEN_ALPHABET, k=length)) for length in parts)
+
+
+def fake_key():
+    return os.urandom(16).hex()
+
+
+def grow(connection, user, count):
+    expires_at = timezone.now() + timezone.timedelta(days=7)
+    key_table = BlacklistedToken._meta.db_table
+    legacy, keys = [], []
+    with connection.cursor() as cursor:
+        while count > 0:
+            batch = min(count, BATCH_SIZE)
+            tokens = [fake_token() for _ in range(batch)]
+            hashed = [fake_key() for _ in range(batch)]
+            cursor.executemany(f'INSERT INTO {LEGACY_TABLE} (token) VALUES (%s)', [(t,) for t in tokens])
+            cursor.executemany(
+                f'INSERT INTO {key_table} (key, user_id, expires_at, created_at) VALUES (%s, %s, %s, %s)',
+                [(k, user.pk, expires_at, timezone.now()) for k in hashed],
+            )
+            legacy.extend(random.sample(tokens, min(10, batch)))
+            keys.extend(random.sample(hashed, min(10, batch)))
+            count -= batch
+    return legacy, keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database() as connection, override_settings(REVOCATION_SYNC_SECONDS=3600):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {LEGACY_TABLE} (id integer PRIMARY KEY, token varchar(500) NOT NULL UNIQUE)')
+        user = get_user_model().objects.create_user(email='bench@example.com', username='bench', password=None)
+
+        def legacy_check(token):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT 1 FROM {LEGACY_TABLE} WHERE token = %s LIMIT 1', [token])
+                return cursor.fetchone() is not None
+
+        def hashed_check(key):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT 1 FROM {BlacklistedToken._meta.db_table} WHERE key = %s LIMIT 1', [key])
+                return cursor.fetchone() is not None
+
+        rows, revoked_legacy, revoked_keys = 0, [], []
+        results = []
+        for size in sorted(args.sizes):
+            start = time.perf_counter()
+            legacy, keys = grow(connection, user, size - rows)
+            revoked_legacy += legacy
+            revoked_keys += keys
+            rows = size
+            fill_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            revoked_tokens.reset()
+            revoked_tokens.warm()
+            warm_seconds = time.perf_counter() - start
+
+            fresh_tokens = [(fake_token(),) for _ in range(args.lookups)]
+            fresh_keys = [(fake_key(),) for _ in range(args.lookups)]
+            old_tokens = [(random.choice(revoked_legacy),) for _ in range(args.lookups)]
+            old_keys = [(random.choice(revoked_keys),) for _ in range(args.lookups)]
+
+            for label, func, fresh, old in (
+                ('legacy', legacy_check, fresh_tokens, old_tokens),
+                ('hashed', hashed_check, fresh_keys, old_keys),
+                ('filter', revoked_tokens.is_revoked, fresh_keys, old_keys),
+            ):
+                fresh_stats = summarize(time_calls(func, fresh))
+                old_stats = summarize(time_calls(func, old))
+                results.append((
+                    f'{size:,}', label,
+                    f"{fresh_stats['p50']:.1f}", f"{fresh_stats['p99']:.1f}",
+                    f"{old_stats['p50']:.1f}", f"{old_stats['p99']:.1f}",
+                ))
+            print(f'{size:,} rows: filled in {fill_seconds:.1f}s, filter warmed in {warm_seconds:.2f}s '
+                  f"({revoked_tokens.stats()['size_bytes'] / 1e6:.1f} MB)", flush=True)
+
+        print()
+        print_table(
+            ('rows', 'path', 'valid p50 us', 'valid p99 us', 'revoked p50 us', 'revoked p99 us'),
+            results,
+        )
+        print(revoked_tokens.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Concurrency of one ASGI worker (uvicorn, async views) against one WSGI worker (gunicorn, sync views).
+
+Both servers are started on a fresh sqlite database in a temporary directory and hit
+with the same number of keep-alive connections, each sending requests back to back
+for a fixed time. Endpoints:
+    me      GET the profile, /api/user/me/ vs /api/user/async/me/
+    login   POST credentials, /api/user/token/ vs /api/user/async/token/
+
+    python -m benchmarks.load_asgi_vs_wsgi --concurrency 10 50 200 --duration 10
+
+--no-user-cache makes every request load the user from the database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import print_table, summarize
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+EMAIL = 'load@example.com'
+PASSWORD = 'loadtest123'
+
+ENDPOINTS = {
+    'me': ('GET', '/api/user/me/', '/api/user/async/me/'),
+    'login': ('POST', '/api/user/token/', '/api/user/async/token/'),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(env):
+    script = (
+        'from django.contrib.auth import get_user_model;'
+        'from core.models import TokenFamily;'
+        'from core.tokens import create_access_token;'
+        f'user = get_user_model().objects.create_user(email="{EMAIL}", username="load", password="{PASSWORD}");'
+        'user.is_active = True; user.save();'
+        'print(create_access_token(user, TokenFamily.objects.start(user).pk))'
+    )
+    manage = [sys.executable, 'manage.py']
+    subprocess.run(manage + ['migrate', '-v', '0'], cwd=BASE_DIR, env=env, check=True)
+    out = subprocess.run(manage + ['shell', '-c', script], cwd=BASE_DIR, env=env, check=True,
+                         capture_output=True, text=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def start_server(kind, port, env, threads):
+    if kind == 'asgi':
+        cmd = [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--port', str(port),
+               '--workers', '1', '--log-level', 'warning', '--no-access-log']
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '-b', f'127.0.0.1:{port}',
+               '--workers', '1', '--threads', str(threads), '--log-level', 'warning']
+    process = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, request, stop_at, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+    except (OSError, asyncio.IncompleteReadError) as exc:
+        errors.append(type(exc).__name__)
+    finally:
+        writer.close()
+
+
+async def run_load(port, request, concurrency, duration):
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*[client(port, request, stop_at, latencies, errors) for _ in range(concurrency)])
+    return latencies, errors
+
+
+def build_request(method, path, token):
+    headers = [f'{method} {path} HTTP/1.1', 'Host: 127.0.0.1', 'Connection: keep-alive']
+    body = b''
+    if method == 'GET':
+        headers.append(f'Authorization: Bearer {token}')
+    else:
+        body = json.dumps({'email': EMAIL, 'password': PASSWORD}).encode()
+        headers += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode() + body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=ENDPOINTS, default='me')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100, 200])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads of the WSGI worker')
+    parser.add_argument('--no-user-cache', action='store_true')
+    args = parser.parse_args()
+
+    method, wsgi_path, asgi_path = ENDPOINTS[args.endpoint]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SQLITE_PATH=os.path.join(tmp, 'load.sqlite3'), PYTHONUNBUFFERED='1')
+        if args.no_user_cache:
+            env['USER_CACHE_TTL_SECONDS'] = '0'
+        token = prepare_database(env)
+
+        for kind, path in (('wsgi', wsgi_path), ('asgi', asgi_path)):
+            port = free_port()
+            server = start_server(kind, port, env, args.threads)
+            try:
+                request = build_request(method, path, token)
+                asyncio.run(run_load(port, request, 1, 1))  # warm up
+                for concurrency in args.concurrency:
+                    latencies, errors = asyncio.run(run_load(port, request, concurrency, args.duration))
+                    stats = summarize(latencies) if latencies else {'p50': 0, 'p99': 0}
+                    rows.append((
+                        kind, concurrency, f'{len(latencies) / args.duration:.0f}',
+                        f"{stats['p50']:.1f}", f"{stats['p99']:.1f}", len(errors),
+                    ))
+                    print(kind, concurrency, 'done', flush=True)
+            finally:
+                server.terminate()
+                server.wait()
+
+    print()
+    print_table(('server', 'concurrency', 'req/s', 'p50 ms', 'p99 ms', 'errors'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Autosaving answers while a test is taken: writing every click through to the
+attempt vs buffering them with quizzes.autosave.
+
+    python -m benchmarks.load_quiz_autosave --students 1000 --clicks 20 --threads 32
+
+Every student clicks --clicks answers one after the other, changing their mind
+now and then, --threads students at a time against a throwaway database:
+    write-through  every click reads the attempt and updates its answers
+    buffered       quizzes.autosave.save, plus a flush every --flush-seconds
+At the end every attempt is submitted the way SubmitAttemptView does it, and
+the stored answers are checked against the last click of every question.
+The database writes (INSERT, UPDATE and DELETE statements) are counted per phase.
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import print_table, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import Attempt, Classroom, Question, Test  # noqa: E402
+from quizzes import autosave, grading  # noqa: E402
+
+QUESTIONS = 40
+CACHES = {
+    **settings.CACHES,
+    'autosave': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 100000}},
+}
+
+
+class WriteCounter:
+    """execute_wrapper counting the statements that write, from any thread."""
+    def __init__(self):
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            with self._lock:
+                self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def fill(students):
+    User = get_user_model()
+    tutor = User.objects.create_user(email='tutor@example.com', username='tutor', role=2, password='x')
+    classroom = Classroom.objects.create_with_code(name='Bench', tutor=tutor)
+    test = Test.objects.create(classroom=classroom, title='Bench')
+    Question.objects.bulk_create([
+        Question(test=test, position=i, text=f'q{i}', options=['a', 'b', 'c', 'd'], correct_option=0)
+        for i in range(QUESTIONS)
+    ])
+    grading.compile_key(test)
+    users = User.objects.bulk_create([
+        User(email=f's{i}@example.com', username=f's{i}', password='!') for i in range(students)
+    ])
+    Attempt.objects.bulk_create([Attempt(test=test, student=user) for user in users])
+    return test, list(Attempt.objects.filter(test=test).values_list('pk', flat=True))
+
+
+def make_sessions(attempt_ids, clicks, seed=0):
+    """The clicks (position, option) of every attempt, with the last option of every question."""
+    rng = random.Random(seed)
+    sessions, final = {}, {}
+    for attempt_id in attempt_ids:
+        sessions[attempt_id] = [(rng.randrange(QUESTIONS), rng.randrange(4)) for _ in range(clicks)]
+        final[attempt_id] = dict(sessions[attempt_id])
+    return sessions, final
+
+
+def write_through(attempt_id, position, option):
+    stored = Attempt.objects.filter(pk=attempt_id).values_list('answers', flat=True).get()
+    Attempt.objects.filter(pk=attempt_id, status=Attempt.in_progress).update(
+        answers=autosave.overlay(stored, QUESTIONS, {position: option}),
+    )
+
+
+def buffered(attempt_id, position, option):
+    while True:
+        try:
+            autosave.save(attempt_id, {position: option})
+            return
+        except autosave.AutosaveBusy:
+            continue
+
+
+def submit(attempt_id):
+    # SubmitAttemptView without answers in the body
+    stored = Attempt.objects.filter(pk=attempt_id).values_list('answers', flat=True).get()
+    Attempt.objects.filter(pk=attempt_id, status=Attempt.in_progress).update(
+        status=Attempt.submitted, answers=autosave.overlay(stored, QUESTIONS, autosave.take(attempt_id)),
+        submitted_at=timezone.now(),
+    )
+
+
+def run(test, sessions, save, threads, flush_seconds=0):
+    Attempt.objects.filter(test=test).update(status=Attempt.in_progress, answers=b'', submitted_at=None)
+    autosave.autosave_cache().clear()
+    counter = WriteCounter()
+
+    def call(fn, *args):
+        with connection.execute_wrapper(counter):
+            fn(*args)
+
+    def take_test(attempt_id):
+        # a student clicks one answer after the other
+        for position, option in sessions[attempt_id]:
+            call(save, attempt_id, position, option)
+
+    stop = threading.Event()
+    flushes = []
+
+    def flush_loop():
+        while not stop.wait(flush_seconds):
+            flushes.append(counter.writes)
+            call(autosave.flush, True)
+        connection.close()
+
+    flusher = threading.Thread(target=flush_loop) if flush_seconds else None
+    if flusher:
+        flusher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(take_test, sessions))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if flusher:
+        flusher.join()
+    click_writes = counter.writes
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda attempt_id: call(submit, attempt_id), sessions))
+    return {
+        'elapsed': elapsed,
+        'click_writes': click_writes,
+        'submit_writes': counter.writes - click_writes,
+        'flushes': len(flushes),
+    }
+
+
+def check(test, final):
+    wrong = 0
+    for pk, blob in Attempt.objects.filter(test=test).values_list('pk', 'answers'):
+        answers = grading.unpack_answers(blob, QUESTIONS)
+        expected = [final.get(pk, {}).get(position) for position in range(QUESTIONS)]
+        wrong += answers != expected
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--clicks', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--flush-seconds', type=float, default=0.1)
+    args = parser.parse_args()
+
+    clicks = args.students * args.clicks
+    # the default cache of the settings only keeps 300 entries, one buffer per attempt is needed
+    with test_database(), override_settings(CACHES=CACHES, QUIZ_AUTOSAVE_CACHE_ALIAS='autosave'):
+        test, attempt_ids = fill(args.students)
+        sessions, final = make_sessions(attempt_ids, args.clicks)
+        print(f'{args.students} students, {clicks} clicks from {args.threads} threads\n')
+
+        rows = []
+        for name, save, flush_seconds in (('write-through', write_through, 0),
+                                          ('buffered', buffered, args.flush_seconds)):
+            result = run(test, sessions, save, args.threads, flush_seconds)
+            rows.append([
+                name, f'{result["elapsed"]:.2f}', f'{clicks / result["elapsed"]:.0f}', result['flushes'],
+                result['click_writes'], result['submit_writes'], check(test, final),
+            ])
+        print_table(['mode', 'seconds', 'clicks/s', 'flushes', 'writes while taking', 'writes on submit', 'wrong'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+The start of a timed test: every student of the class asks for their paper at once.
+
+    python -m benchmarks.load_test_papers --students 2000 --questions 50 --threads 200
+
+The papers are asked --threads at a time against a throwaway database, in three ways:
+    fresh      every request loads the questions, shuffles and serializes them
+    cold       quizzes.papers.get_paper on an empty cache, the misses are coalesced
+    published  quizzes.papers.get_paper after quizzes.papers.publish, as when the
+               test was created ahead of its start
+Every request also loads the test, like TestPaperView does.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import print_table, setup_django, summarize, test_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from core.models import Classroom, Enrollment, Question, Test  # noqa: E402
+from quizzes import grading, papers  # noqa: E402
+
+# the default cache of the settings only keeps 300 entries, one paper per student is needed
+CACHES = {
+    **settings.CACHES,
+    'papers': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 100000}},
+}
+
+
+class QueryCounter:
+    """execute_wrapper counting the queries of every thread."""
+    def __init__(self):
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def fill(students, questions):
+    User = get_user_model()
+    tutor = User.objects.create_user(email='tutor@example.com', username='tutor', role=2, password='x')
+    classroom = Classroom.objects.create_with_code(name='Bench', tutor=tutor)
+    test = Test.objects.create(classroom=classroom, title='Bench')
+    Question.objects.bulk_create([
+        Question(test=test, position=i, text=f'Question {i} ' + 'lorem ipsum ' * 20,
+                 options=[f'Option {j} of question {i}' for j in range(4)], correct_option=0)
+        for i in range(questions)
+    ])
+    grading.compile_key(test)
+    users = User.objects.bulk_create([
+        User(email=f's{i}@example.com', username=f's{i}', password='!') for i in range(students)
+    ])
+    Enrollment.objects.bulk_create([Enrollment(classroom=classroom, student=user) for user in users])
+    return test, [user.pk for user in users]
+
+
+def fresh(test, student_id):
+    return papers.render_paper(test, papers.load_questions(test), student_id)
+
+
+def stampede(test_id, student_ids, get, threads):
+    counter = QueryCounter()
+
+    def start(student_id):
+        began = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            test = Test.objects.select_related('classroom').get(pk=test_id)
+            get(test, student_id)
+        return (time.perf_counter() - began) * 1e6
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = list(pool.map(start, student_ids))
+    return time.perf_counter() - began, latencies, counter.queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=200)
+    args = parser.parse_args()
+
+    with test_database(), override_settings(CACHES=CACHES, QUIZ_PAPER_CACHE_ALIAS='papers'):
+        test, student_ids = fill(args.students, args.questions)
+        print(f'{args.students} students starting a test of {args.questions} questions, '
+              f'{args.threads} at a time\n')
+
+        rows = []
+        for name in ('fresh', 'cold', 'published'):
+            papers.paper_cache().clear()
+            builds = papers.flights.builds
+            if name == 'published':
+                began = time.perf_counter()
+                papers.publish(test.pk)
+                print(f'publish: {time.perf_counter() - began:.2f}s')
+            elapsed, latencies, queries = stampede(test.pk, student_ids, fresh if name == 'fresh' else papers.get_paper,
+                                                   args.threads)
+            stats = summarize(latencies)
+            rows.append([name, f'{elapsed:.2f}', f'{stats["p50"] / 1000:.1f}', f'{stats["p99"] / 1000:.1f}',
+                         queries, papers.flights.builds - builds])
+        print_table(['mode', 'seconds', 'p50 ms', 'p99 ms', 'queries', 'cache fills'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Soak test of the notification stream: idle server-sent event connections held by
+one ASGI worker (uvicorn), and the memory each of them costs.
+
+    python -m benchmarks.soak_sse --connections 10000 --hold 30
+
+The server is started on a fresh sqlite database in a temporary directory, then
+--connections students of one class open /api/notifications/stream/ and stay idle
+for --hold seconds, getting a heartbeat every --heartbeat seconds. The resident
+memory of the server is read from /proc before and after they connect. At the end
+the tutor creates an assignment and the time until every connection got the
+notification is measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load_asgi_vs_wsgi import BASE_DIR, free_port, start_server
+
+SETUP = '''
+from django.contrib.auth import get_user_model
+from core.models import Classroom, Enrollment, TokenFamily
+from core.tokens import create_access_token
+User = get_user_model()
+tutor = User.objects.create_user(email="tutor@example.com", username="tutor", role=2, password="x")
+student = User.objects.create_user(email="student@example.com", username="student", password="x")
+classroom = Classroom.objects.create_with_code(name="Soak", tutor=tutor)
+Enrollment.objects.create(classroom=classroom, student=student)
+print(classroom.pk, create_access_token(tutor, TokenFamily.objects.start(tutor).pk),
+      create_access_token(student, TokenFamily.objects.start(student).pk))
+'''
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def prepare_database(env):
+    manage = [sys.executable, 'manage.py']
+    subprocess.run(manage + ['migrate', '-v', '0'], cwd=BASE_DIR, env=env, check=True)
+    out = subprocess.run(manage + ['shell', '-c', SETUP], cwd=BASE_DIR, env=env, check=True,
+                         capture_output=True, text=True)
+    classroom_id, tutor_token, student_token = out.stdout.strip().splitlines()[-1].split()
+    return int(classroom_id), tutor_token, student_token
+
+
+class Listener:
+    """One idle EventSource: connects, then counts heartbeats until the notification comes."""
+    def __init__(self, port, token):
+        self.port = port
+        self.request = (f'GET /api/notifications/stream/?token={token} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                        'Accept: text/event-stream\r\n\r\n').encode()
+        self.connected = asyncio.Event()
+        self.notified_at = None
+        self.heartbeats = 0
+        self.error = None
+
+    async def run(self):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        except OSError as exc:
+            self.error = type(exc).__name__
+            self.connected.set()
+            return
+        try:
+            writer.write(self.request)
+            await writer.drain()
+            buffer = b''
+            while b'retry:' not in buffer:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    raise ConnectionError('closed')
+                buffer += chunk
+            self.connected.set()
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    raise ConnectionError('closed')
+                self.heartbeats += chunk.count(b': ping')
+                if b'event: notification' in chunk:
+                    self.notified_at = time.perf_counter()
+                    return
+        except (OSError, ConnectionError) as exc:
+            self.error = type(exc).__name__
+            self.connected.set()
+        finally:
+            writer.close()
+
+
+async def create_assignment(port, token, classroom_id):
+    body = json.dumps({'classroom': classroom_id, 'title': 'Soak test'}).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write((f'POST /api/assignments/ HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+                  f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'
+                  ).encode() + body)
+    await writer.drain()
+    status = (await reader.readline()).split()[1]
+    writer.close()
+    return int(status)
+
+
+async def soak(port, pid, classroom_id, tutor_token, student_token, connections, hold, batch):
+    baseline = rss_kb(pid)
+    listeners = [Listener(port, student_token) for _ in range(connections)]
+    tasks = []
+    start = time.perf_counter()
+    for offset in range(0, connections, batch):
+        group = listeners[offset:offset + batch]
+        tasks += [asyncio.create_task(listener.run()) for listener in group]
+        await asyncio.gather(*(listener.connected.wait() for listener in group))
+    connect_seconds = time.perf_counter() - start
+    connected = sum(listener.error is None for listener in listeners)
+    loaded = rss_kb(pid)
+    print(f'{connected} connections open in {connect_seconds:.1f}s, holding them {hold}s', flush=True)
+
+    await asyncio.sleep(hold)
+    held = rss_kb(pid)
+    alive = sum(listener.error is None for listener in listeners)
+
+    sent = time.perf_counter()
+    status = await create_assignment(port, tutor_token, classroom_id)
+    await asyncio.wait(tasks, timeout=60)
+    delays = sorted(listener.notified_at - sent for listener in listeners if listener.notified_at)
+    return {
+        'baseline': baseline, 'loaded': loaded, 'held': held, 'connected': connected, 'alive': alive,
+        'heartbeats': sum(listener.heartbeats for listener in listeners), 'status': status, 'delays': delays,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--hold', type=float, default=30)
+    parser.add_argument('--heartbeat', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=500, help='connections opened at once')
+    args = parser.parse_args()
+
+    # a descriptor per connection on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < args.connections + 100:
+        sys.exit(f'the open files limit ({hard}) is too low for {args.connections} connections')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SQLITE_PATH=os.path.join(tmp, 'soak.sqlite3'), PYTHONUNBUFFERED='1',
+                   SSE_HEARTBEAT_SECONDS=str(args.heartbeat), BACKGROUND_TASKS_EXECUTOR='inline')
+        classroom_id, tutor_token, student_token = prepare_database(env)
+        port = free_port()
+        server = start_server('asgi', port, env, threads=1)
+        try:
+            result = asyncio.run(soak(port, server.pid, classroom_id, tutor_token, student_token,
+                                      args.connections, args.hold, args.batch))
+        finally:
+            server.terminate()
+            server.wait()
+
+    delays = result['delays']
+    per_connection = (result['held'] - result['baseline']) * 1024 / max(result['connected'], 1)
+    print()
+    print(f"server RSS      {result['baseline'] / 1024:.0f} MB idle, {result['loaded'] / 1024:.0f} MB connected, "
+          f"{result['held'] / 1024:.0f} MB after {args.hold:.0f}s")
+    print(f'per connection  {per_connection / 1024:.1f} KB')
+    print(f"alive           {result['alive']} of {result['connected']}, {result['heartbeats']} heartbeats received")
+    print(f"fan-out         assignment created ({result['status']}), {len(delays)} notified, "
+          + (f'last after {delays[-1] * 1000:.0f} ms, median {delays[len(delays) // 2] * 1000:.0f} ms' if delays else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import NotFound
+
+from core.models import Classroom, Enrollment
+
+
+def is_member(user, classroom):
+    """Whether the user is the tutor or a student of the classroom."""
+    return classroom.tutor_id == user.pk or Enrollment.objects.filter(classroom=classroom, student=user).exists()
+
+
+def get_classroom(request, pk, tutor=False):
+    """The classroom if the user is its tutor (or a student of it, unless tutor=True), 404 otherwise."""
+    classroom = get_object_or_404(Classroom, pk=pk)
+    if not (classroom.tutor_id == request.user.pk if tutor else is_member(request.user, classroom)):
+        raise NotFound()
+    return classroom
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ClassroomsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'classrooms'
+
+    def ready(self):
+        # keeps the join code cache in step with the classroom table
+        from classrooms import codes  # noqa: F401
+        # and the version of the announcement feeds with the announcements
+        from classrooms import feed  # noqa: F401
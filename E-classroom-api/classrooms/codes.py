@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Classroom, Enrollment
+
+key_prefix = 'class-code:'
+
+
+class UnknownCode(Exception):
+    pass
+
+
+def code_cache():
+    return caches[settings.CLASS_CODE_CACHE_ALIAS]
+
+
+def normalize(code):
+    return code.strip().upper()
+
+
+def classroom_id_for(code):
+    """
+    The id of the classroom with this join code, from the cache when it is there.
+    Codes nobody has are not cached, a class created meanwhile by another worker
+    would look missing until they expire.
+    """
+    key = key_prefix + code
+    classroom_id = code_cache().get(key)
+    if classroom_id is None:
+        classroom_id = Classroom.objects.filter(code=code).values_list('id', flat=True).first()
+        if classroom_id is None:
+            raise UnknownCode()
+        code_cache().set(key, classroom_id, settings.CLASS_CODE_CACHE_TTL_SECONDS)
+    return classroom_id
+
+
+def join(student, code):
+    """
+    Enrolls the student in the class with this code, returns the classroom id and
+    whether they were not a member yet. On a cache hit this is one INSERT.
+    """
+    code = normalize(code)
+    classroom_id = classroom_id_for(code)
+    try:
+        return classroom_id, Enrollment.objects.join(classroom_id, student.pk)
+    except IntegrityError:
+        # the classroom was deleted after its code was cached by another worker
+        code_cache().delete(key_prefix + code)
+        raise UnknownCode()
+
+
+@receiver(post_save, sender=Classroom)
+def cache_code(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: code_cache().set(key_prefix + instance.code, instance.pk, settings.CLASS_CODE_CACHE_TTL_SECONDS)
+        )
+
+
+@receiver(post_delete, sender=Classroom)
+def forget_code(sender, instance, **kwargs):
+    code_cache().delete(key_prefix + instance.code)
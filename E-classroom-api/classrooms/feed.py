@@ -0,0 +1,25 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Announcement, Classroom
+
+
+def touch(classroom_id):
+    """Moves the feed of the classroom to a new version, changing its ETag and Last-Modified."""
+    Classroom.objects.filter(pk=classroom_id).update(feed_version=F('feed_version') + 1, feed_updated_at=timezone.now())
+
+
+def validators(classroom):
+    """
+    The weak ETag and the Last-Modified time of the feed of the classroom, known from
+    the classroom row alone so an unchanged feed is answered without reading it.
+    """
+    return f'W/"{classroom.pk}.{classroom.feed_version}"', classroom.feed_updated_at or classroom.created_at
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def announcement_changed(sender, instance, **kwargs):
+    touch(instance.classroom_id)
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+from core.models import Announcement, Classroom
+
+
+class ClassroomSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for listing and creating classes
+        member_count is the number of students, annotated on the queryset by the view
+    """
+    tutor_name = serializers.CharField(source='tutor.username', read_only=True)
+    member_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Classroom
+        fields = ['id', 'name', 'description', 'tutor', 'tutor_name', 'code', 'member_count', 'created_at']
+        read_only_fields = ['id', 'tutor', 'code', 'created_at']
+
+    def create(self, validated_data):
+        return Classroom.objects.create_with_code(**validated_data)
+
+
+class JoinClassroomSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=20)
+
+
+class AnnouncementSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for the announcement feed of a class, posted by its tutor
+    """
+    author_name = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Announcement
+        fields = ['id', 'classroom', 'author', 'author_name', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'classroom', 'author', 'created_at', 'updated_at']
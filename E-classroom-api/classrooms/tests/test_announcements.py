@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Announcement, Classroom, Enrollment, Notification
+from classrooms.tests.test_classrooms import create_user
+
+
+def feed_url(classroom):
+    return reverse('classrooms:announcement-list', args=[classroom.pk])
+
+
+def detail_url(announcement):
+    return reverse('classrooms:announcement-detail', args=[announcement.classroom_id, announcement.pk])
+
+
+class AnnouncementFeedTests(TestCase):
+
+    def setUp(self):
+        self.tutor = create_user('tutor@example.com', role=2)
+        self.student = create_user('student@example.com')
+        self.classroom = Classroom.objects.create_with_code(name='React', tutor=self.tutor)
+        Enrollment.objects.create(classroom=self.classroom, student=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+
+    def post(self, content):
+        res = self.client.post(feed_url(self.classroom), {'content': content}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res
+
+    def test_feed_is_read_by_keyset_pages(self):
+        for i in range(25):
+            self.post(f'Announcement {i}')
+        self.client.force_authenticate(user=self.student)
+
+        contents, url = [], f'{feed_url(self.classroom)}?page_size=10'
+        while url:
+            res = self.client.get(url)
+            contents += [item['content'] for item in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(contents, [f'Announcement {i}' for i in reversed(range(25))])
+        self.assertEqual(res.data['results'][0]['author_name'], 'tutor')
+
+    def test_unchanged_feed_is_not_modified(self):
+        self.post('Welcome')
+        self.client.force_authenticate(user=self.student)
+        res = self.client.get(feed_url(self.classroom))
+        etag, last_modified = res['ETag'], res['Last-Modified']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # the classroom and the membership, the feed isn't read
+        with self.assertNumQueries(2):
+            res = self.client.get(feed_url(self.classroom), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+        res = self.client.get(feed_url(self.classroom), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_move_the_version(self):
+        announcement = Announcement.objects.get(pk=self.post('Welcome').data['id'])
+        etags = [self.client.get(feed_url(self.classroom))['ETag']]
+
+        self.client.patch(detail_url(announcement), {'content': 'Welcome all'}, format='json')
+        etags.append(self.client.get(feed_url(self.classroom))['ETag'])
+        self.client.delete(detail_url(announcement))
+        res = self.client.get(feed_url(self.classroom), HTTP_IF_NONE_MATCH=etags[0])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+        self.assertEqual(len({*etags, res['ETag']}), 3)
+
+    def test_only_the_tutor_posts(self):
+        self.client.force_authenticate(user=self.student)
+        res = self.client.post(feed_url(self.classroom), {'content': 'Hi'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        outsider = create_user('outsider@example.com')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(feed_url(self.classroom)).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_students_are_notified(self):
+        self.post('Exam on Friday')
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.kind, 'announcement')
+        self.assertEqual(notification.message, 'Exam on Friday')
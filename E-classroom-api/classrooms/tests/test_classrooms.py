@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Classroom, Enrollment
+
+CLASSES_URL = reverse('classrooms:classroom-list')
+
+
+def create_user(email, role=1):
+    return get_user_model().objects.create_user(email=email, username=email.split('@')[0], role=role, password='testpass123')
+
+
+class ClassroomListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tutor = create_user('tutor@example.com', role=2)
+        cls.other_tutor = create_user('other@example.com', role=2)
+        cls.student = create_user('student@example.com')
+        cls.classmates = [create_user(f'classmate{i}@example.com') for i in range(3)]
+
+        cls.classrooms = [Classroom.objects.create(name=f'Class {i}', tutor=cls.tutor) for i in range(30)]
+        Classroom.objects.create(name='Not mine', tutor=cls.other_tutor)
+        Enrollment.objects.bulk_create(
+            [Enrollment(classroom=classroom, student=cls.student) for classroom in cls.classrooms]
+            + [Enrollment(classroom=classroom, student=classmate)
+               for classroom in cls.classrooms[:5] for classmate in cls.classmates]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def list_all(self, user, page_size):
+        self.client.force_authenticate(user=user)
+        results, url = [], f'{CLASSES_URL}?page_size={page_size}'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            results += res.data['results']
+            url = res.data['next']
+        return results
+
+    def test_tutor_lists_own_classes(self):
+        results = self.list_all(self.tutor, page_size=7)
+
+        self.assertEqual([c['id'] for c in results], [c.pk for c in reversed(self.classrooms)])
+        self.assertEqual(results[-1]['tutor_name'], self.tutor.username)
+
+    def test_student_lists_enrolled_classes_with_member_counts(self):
+        results = self.list_all(self.student, page_size=10)
+
+        counts = {c['id']: c['member_count'] for c in results}
+        self.assertEqual(len(counts), 30)
+        self.assertEqual(counts[self.classrooms[0].pk], 4)
+        self.assertEqual(counts[self.classrooms[-1].pk], 1)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.client.force_authenticate(user=self.student)
+        for page_size in (1, 10, 100):
+            with self.subTest(page_size=page_size), self.assertNumQueries(1):
+                res = self.client.get(CLASSES_URL, {'page_size': page_size})
+            self.assertEqual(len(res.data['results']), min(page_size, 30))
+
+    def test_next_page_costs_one_query(self):
+        self.client.force_authenticate(user=self.tutor)
+        next_url = self.client.get(CLASSES_URL, {'page_size': 5}).data['next']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(next_url)
+
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_tutor_creates_class(self):
+        self.client.force_authenticate(user=self.tutor)
+
+        res = self.client.post(CLASSES_URL, {'name': 'Math 101', 'description': 'Basic Math'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['member_count'], 0)
+        self.assertEqual(len(res.data['code']), 6)
+        self.assertEqual(Classroom.objects.get(pk=res.data['id']).tutor, self.tutor)
+
+    def test_students_cannot_create_classes(self):
+        self.client.force_authenticate(user=self.student)
+
+        res = self.client.post(CLASSES_URL, {'name': 'Math 101'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from classrooms import codes
+from core.models import Classroom, Enrollment
+
+JOIN_URL = reverse('classrooms:classroom-join')
+
+
+def create_user(email, role=1):
+    return get_user_model().objects.create_user(email=email, username=email.split('@')[0], role=role, password='testpass123')
+
+
+class JoinClassroomTests(TestCase):
+
+    def setUp(self):
+        codes.code_cache().clear()
+        self.tutor = create_user('tutor@example.com', role=2)
+        self.student = create_user('student@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.classroom = Classroom.objects.create_with_code(name='Math 101', tutor=self.tutor)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_join_is_idempotent(self):
+        res = self.client.post(JOIN_URL, {'code': self.classroom.code})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'classroom': self.classroom.pk, 'joined': True})
+
+        res = self.client.post(JOIN_URL, {'code': f' {self.classroom.code.lower()} '})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['joined'])
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 1)
+
+    def test_joined_at_is_stored_like_the_orm_does(self):
+        self.client.post(JOIN_URL, {'code': self.classroom.code})
+
+        joined_at = Enrollment.objects.get(student=self.student).joined_at
+        self.assertTrue(Enrollment.objects.filter(student=self.student, joined_at=joined_at).exists())
+
+    def test_cached_code_costs_the_insert_and_the_dashboard_update(self):
+        with self.assertNumQueries(2):
+            res = self.client.post(JOIN_URL, {'code': self.classroom.code})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_code_is_looked_up_once(self):
+        codes.code_cache().clear()
+        other = create_user('other@example.com')
+        self.client.post(JOIN_URL, {'code': self.classroom.code})
+
+        self.client.force_authenticate(user=other)
+        with self.assertNumQueries(2):
+            self.client.post(JOIN_URL, {'code': self.classroom.code})
+
+    def test_unknown_code(self):
+        res = self.client.post(JOIN_URL, {'code': 'NOPE42'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleted_classroom_is_not_joined(self):
+        code = self.classroom.code
+        self.classroom.delete()
+
+        res = self.client.post(JOIN_URL, {'code': code})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tutors_cannot_join(self):
+        self.client.force_authenticate(user=self.tutor)
+        res = self.client.post(JOIN_URL, {'code': self.classroom.code})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_taken_code_is_drawn_again(self):
+        with mock.patch('core.models.generate_class_code', side_effect=[self.classroom.code, 'FRESH2']):
+            classroom = Classroom.objects.create_with_code(name='Science 101', tutor=self.tutor)
+
+        self.assertEqual(classroom.code, 'FRESH2')
+
+
+class ConcurrentJoinTests(TransactionTestCase):
+    """
+    Runs against the configured database, DB_ENGINE=postgresql checks Postgres.
+    """
+
+    def setUp(self):
+        codes.code_cache().clear()
+        tutor = create_user('tutor@example.com', role=2)
+        self.classroom = Classroom.objects.create_with_code(name='Math 101', tutor=tutor)
+        self.students = get_user_model().objects.bulk_create([
+            get_user_model()(email=f'student{i}@example.com', username=f'student{i}', role=1) for i in range(100)
+        ])
+
+    def test_parallel_joins(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # threads sharing an in memory database fail on locks instead of waiting
+            self.skipTest('needs SQLITE_TEST_PATH or DB_ENGINE=postgresql')
+
+        def join(student):
+            try:
+                return codes.join(student, self.classroom.code)[1]
+            finally:
+                connections.close_all()
+
+        # every student joins three times
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            joined = list(executor.map(join, self.students * 3))
+
+        self.assertEqual(joined.count(True), 100)
+        self.assertEqual(Enrollment.objects.filter(classroom=self.classroom).count(), 100)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+app_name = 'classrooms'
+
+urlpatterns = [
+    path('', views.ClassroomListView.as_view(), name='classroom-list'),
+    path('join/', views.JoinClassroomView.as_view(), name='classroom-join'),
+    path('<int:pk>/announcements/', views.AnnouncementListView.as_view(), name='announcement-list'),
+    path('<int:pk>/announcements/<int:announcement_pk>/', views.AnnouncementDetailView.as_view(),
+         name='announcement-detail'),
+]
@@ -0,0 +1,148 @@
+from django.db.models import Count, Exists, OuterRef
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from core.authentication import IsStudent, IsTutor
+from core.models import Announcement, Classroom, Enrollment
+from . import codes, feed
+from .access import get_classroom
+from .serializers import AnnouncementSerializer, ClassroomSerializer, JoinClassroomSerializer
+
+
+class ClassroomPagination(CursorPagination):
+    """
+    Keyset pagination, the next page starts after the created_at of the last class,
+    so a page costs the same however far the user scrolled.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def classrooms_of(user):
+    """
+    The classes a tutor teaches or a student is enrolled in, with their member count
+    and tutor fetched in the same query.
+    """
+    if user.role == user.tutor:
+        classrooms = Classroom.objects.filter(tutor=user)
+    else:
+        # EXISTS and not a join on enrollments, which would make the count below count only the user
+        classrooms = Classroom.objects.filter(
+            Exists(Enrollment.objects.filter(classroom=OuterRef('pk'), student=user))
+        )
+    return classrooms.select_related('tutor').annotate(member_count=Count('enrollments'))
+
+
+@extend_schema(tags=["Classes"])
+class ClassroomListView(generics.ListCreateAPIView):
+    """
+    GET: lists the classes of the user, newest first, by pages of `page_size`
+        (at most 100) linked with `next` and `previous` cursors.
+    POST: creates a class, tutors only, its join code is generated.
+    """
+    serializer_class = ClassroomSerializer
+    pagination_class = ClassroomPagination
+
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [IsTutor()]
+        return [permissions.IsAuthenticated()]
+
+    def get_queryset(self):
+        return classrooms_of(self.request.user)
+
+    def perform_create(self, serializer):
+        classroom = serializer.save(tutor=self.request.user)
+        classroom.member_count = 0
+
+
+@extend_schema(tags=["Classes"])
+class JoinClassroomView(APIView):
+    """
+    Enrolls the student in the class with the given code. Joining twice is harmless,
+    it returns 200 instead of 201.
+    """
+    serializer_class = JoinClassroomSerializer
+    permission_classes = [IsStudent]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            classroom_id, joined = codes.join(request.user, serializer.validated_data['code'])
+        except codes.UnknownCode:
+            return Response({'error': 'Class not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {'classroom': classroom_id, 'joined': joined},
+            status=status.HTTP_201_CREATED if joined else status.HTTP_200_OK,
+        )
+
+
+class AnnouncementPagination(CursorPagination):
+    """Keyset pagination of the feed on the (classroom, created_at, id) index, newest first."""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+@extend_schema(tags=["Classes"])
+class AnnouncementListView(generics.ListCreateAPIView):
+    """
+    GET: the announcements of the class, newest first, by pages linked with cursors.
+        Responses carry a weak ETag and Last-Modified from the version of the feed,
+        If-None-Match or If-Modified-Since get a 304 without the feed being read.
+    POST: posts an announcement, only by the tutor of the class.
+    """
+    serializer_class = AnnouncementSerializer
+    pagination_class = AnnouncementPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Announcement.objects.filter(classroom=self.classroom).select_related('author')
+
+    def list(self, request, *args, **kwargs):
+        self.classroom = get_classroom(request, kwargs['pk'])
+        etag, last_modified = feed.validators(self.classroom)
+        # Last-Modified is to the second, the ETag tells changes within a second apart
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # cached by the browser, and checked with it every time
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def perform_create(self, serializer):
+        classroom = get_classroom(self.request, self.kwargs['pk'])
+        if classroom.tutor_id != self.request.user.pk:
+            raise PermissionDenied('Only the tutor of the class can post announcements.')
+        serializer.save(classroom=classroom, author=self.request.user)
+
+
+@extend_schema(tags=["Classes"])
+class AnnouncementDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    API for an announcement of the class, editing and deleting it is left to the tutor.
+    """
+    serializer_class = AnnouncementSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        classroom = get_classroom(self.request, self.kwargs['pk'])
+        if self.request.method not in permissions.SAFE_METHODS and classroom.tutor_id != self.request.user.pk:
+            raise PermissionDenied('Only the tutor of the class can change announcements.')
+        return get_object_or_404(
+            Announcement.objects.select_related('author'), classroom=classroom, pk=self.kwargs['announcement_pk'],
+        )
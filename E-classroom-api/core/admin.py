@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from core.models import User, BlacklistedToken
+from core.models import User, BlacklistedToken, TokenFamily, EmailOutbox, OneTimeToken, StoredBlob, Lecture, UploadSession, Classroom, Enrollment, Assignment, Submission, Test, Question, Attempt, QuestionStats
 
 class customUserAdmin(UserAdmin):
     list_display = ('username','email','role','is_active', 'last_login')
@@ -12,4 +12,18 @@ class customUserAdmin(UserAdmin):
     ordering = ('-date_joined',)
 
 admin.site.register(User)
-admin.site.register(BlacklistedToken)
\ No newline at end of file
+admin.site.register(BlacklistedToken)
+admin.site.register(TokenFamily)
+admin.site.register(EmailOutbox)
+admin.site.register(OneTimeToken)
+admin.site.register(StoredBlob)
+admin.site.register(Lecture)
+admin.site.register(UploadSession)
+admin.site.register(Classroom)
+admin.site.register(Enrollment)
+admin.site.register(Assignment)
+admin.site.register(Submission)
+admin.site.register(Test)
+admin.site.register(Question)
+admin.site.register(Attempt)
+admin.site.register(QuestionStats)
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import images  # noqa: F401  registers the profile picture variants as media references
+        from core import signals
+        signals.connect_media_references()
+        from core.purge import sweeper
+        sweeper.start()
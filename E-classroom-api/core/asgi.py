@@ -2,6 +2,7 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The server-sent event streams are answered in front of Django, see core.sse.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +14,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.revocation import revoked_tokens  # noqa: E402
+
+revoked_tokens.start()
+
+from core.sse import EventStreamRouter  # noqa: E402
+
+application = EventStreamRouter(django_application, {
+    '/api/notifications/stream/': 'notifications.stream.notification_groups',
+})
@@ -0,0 +1,100 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import exceptions
+from rest_framework.serializers import ValidationError, as_serializer_error
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView for coroutine handlers, meant to be served by core/asgi.py.
+    Authentication, permission checks and the handler all run on the event loop.
+    Authenticators with an `aauthenticate` coroutine (core.authentication.JWTAuthentication)
+    are awaited, any other authenticator is run in a thread.
+    Permissions and throttles are checked synchronously so they must not touch the db.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """Same as rest_framework.request.Request._authenticate, awaiting async authenticators."""
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+
+class AsyncValidationMixin:
+    """
+    Lets a serializer be validated from async views with `await serializer.ais_valid()`.
+    Field validation is the same as is_valid, the object level validation is done by
+    the `avalidate` coroutine instead of `validate`.
+    """
+    async def avalidate(self, attrs):
+        return attrs
+
+    async def ais_valid(self, raise_exception=False):
+        try:
+            (is_empty_value, value) = self.validate_empty_values(self.initial_data)
+            if not is_empty_value:
+                value = self.to_internal_value(value)
+                self.run_validators(value)
+                value = await self.avalidate(value)
+        except (ValidationError, DjangoValidationError) as exc:
+            self._validated_data = {}
+            self._errors = as_serializer_error(exc)
+        else:
+            self._validated_data = value
+            self._errors = {}
+
+        if self._errors and raise_exception:
+            raise ValidationError(self.errors)
+
+        return not bool(self._errors)
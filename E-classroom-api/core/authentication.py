@@ -2,7 +2,7 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
 import jwt
-from django.contrib.auth import get_user_model
+from core.user_cache import user_cache
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 from drf_spectacular.plumbing import build_bearer_security_scheme_object
 from rest_framework.permissions import BasePermission
@@ -16,24 +16,50 @@ class JWTAuthentication(BaseAuthentication):
     validates the JWT token and retrive the user if valid
     """
     def authenticate(self, request):
+        payload, token = self.decode_header(request)
+        if payload is None:
+            return None
+
+        user = user_cache.get(payload['user_id'])
+        if not user:
+            raise AuthenticationFailed('User not found')
+
+        return (user, token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate for async views (core.async_api.AsyncAPIView),
+        the user is loaded with the async ORM so the event loop is never blocked
+        """
+        payload, token = self.decode_header(request)
+        if payload is None:
+            return None
+
+        user = await user_cache.aget(payload['user_id'])
+        if not user:
+            raise AuthenticationFailed('User not found')
+
+        return (user, token)
+
+    def decode_header(self, request):
         auth_header = request.headers.get('Authorization')
         if not auth_header:
-            return None
+            return None, None
 
         try:
             prefix, token = auth_header.split()
             if prefix != 'Bearer':
                 raise AuthenticationFailed('Invalid token prefix')
-
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except (jwt.ExpiredSignatureError, jwt.DecodeError, ValueError) as e:
+        except ValueError:
             raise AuthenticationFailed('Invalid token')
 
-        user = get_user_model().objects.filter(id=payload['user_id']).first()
-        if not user:
-            raise AuthenticationFailed('User not found')
+        return self.decode_token(token), token
 
-        return (user, token)
+    def decode_token(self, token):
+        try:
+            return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        except (jwt.ExpiredSignatureError, jwt.DecodeError):
+            raise AuthenticationFailed('Invalid token')
 
     def authenticate_header(self, request):
         return 'Bearer'
@@ -53,4 +79,20 @@ class IsNotAuthenticated(BasePermission):
     Allows access only to unauthenticated users.
     """
     def has_permission(self, request, view):
-        return not request.user.is_authenticated
\ No newline at end of file
+        return not request.user.is_authenticated
+
+
+class IsTutor(BasePermission):
+    """
+    Allows access only to tutors.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role == request.user.tutor
+
+
+class IsStudent(BasePermission):
+    """
+    Allows access only to students.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role == request.user.student
@@ -0,0 +1,62 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model, load_backend, user_login_failed
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.conf import settings
+
+from core.hashing import hasher_pool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend with a native aauthenticate.
+    The sync path already hashes on core.hashing.hasher_pool through User.set_password
+    and User.check_password, aauthenticate awaits the pool instead of blocking a thread.
+    """
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # hash anyway so a missing user takes as long as a wrong password
+            await hasher_pool.amake_password(password)
+            return None
+
+        if await user.acheck_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Same as django.contrib.auth.authenticate for async code.
+    django.contrib.auth.aauthenticate runs authenticate in the one thread shared by
+    all sync code of an ASGI worker, this awaits the backends that have an
+    aauthenticate and only sends the others to a thread.
+    """
+    for backend_path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(backend_path)
+        try:
+            inspect.signature(backend.authenticate).bind(request, **credentials)
+        except TypeError:
+            continue
+        try:
+            if hasattr(backend, 'aauthenticate'):
+                user = await backend.aauthenticate(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            break
+        if user is None:
+            continue
+        user.backend = backend_path
+        return user
+
+    cleaned = {key: '********************' if 'pass' in key.lower() else value for key, value in credentials.items()}
+    await user_login_failed.asend(sender=__name__, credentials=cleaned, request=request)
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# put in the queue of a subscriber that fell too far behind, ends its stream
+OVERFLOW = object()
+
+
+class Subscription:
+    """
+    The messages of some groups for one listener, queued on its event loop. At most
+    BROADCAST_QUEUE_SIZE are kept, a listener that doesn't keep up is cut off (it gets
+    OVERFLOW) rather than holding more and more memory: it reconnects and reloads.
+    """
+    def __init__(self, groups, loop):
+        self.groups = frozenset(groups)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.BROADCAST_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # runs on the loop of the subscriber
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroadcast:
+    """
+    Delivers messages published to a group ('class:<id>', 'user:<id>') to the subscribers
+    of that group in this process. Messages for core.sse are dicts of the event name,
+    its id and its data already encoded as JSON. publish can be called from any thread, the message
+    is handed to the event loop of each subscriber. With several workers the events
+    only reach the connections of the worker they were published in, BROADCAST_BACKEND
+    can name a class with the same methods sharing them (Redis pub/sub and the like).
+    """
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, groups):
+        subscription = Subscription(groups, asyncio.get_running_loop())
+        with self._lock:
+            for group in subscription.groups:
+                self._groups.setdefault(group, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for group in subscription.groups:
+                members = self._groups.get(group)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self._groups[group]
+
+    def publish(self, group, message):
+        with self._lock:
+            subscriptions = list(self._groups.get(group, ()))
+            self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # the loop is closed, its connections are gone
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'groups': len(self._groups),
+                'subscriptions': len({s for members in self._groups.values() for s in members}),
+                'published': self.published,
+            }
+
+
+_broadcast = None
+_broadcast_lock = threading.Lock()
+
+
+def get_broadcast():
+    global _broadcast
+    with _broadcast_lock:
+        if _broadcast is None:
+            _broadcast = import_string(settings.BROADCAST_BACKEND)()
+        return _broadcast
@@ -0,0 +1,164 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password operations in progress, try again later.'
+    default_code = 'hashing_busy'
+
+
+def _init_worker(password_hashers):
+    # spawned workers start without django. They get the hashers only, a full
+    # django.setup() would run every AppConfig.ready (background threads, receivers)
+    from django.apps import apps
+    if settings.configured:
+        # a main module re-imported by spawn (a script) already set django up
+        return
+    settings.configure(PASSWORD_HASHERS=password_hashers)
+    apps.populate([])
+
+
+def _make_password(raw_password):
+    return hashers.make_password(raw_password)
+
+
+def _check_password(raw_password, encoded):
+    """
+    Returns whether the password matches and, when the hash was made with another
+    hasher or cost than the first of PASSWORD_HASHERS, the password hashed again with it.
+    """
+    outdated = []
+    matches = hashers.check_password(raw_password, encoded, setter=outdated.append)
+    return matches, (hashers.make_password(raw_password) if outdated else None)
+
+
+class InlineExecutor:
+    """Runs the job in the calling thread, for tests and single process setups."""
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class PasswordHasherPool:
+    """
+    Runs password hashing off the request thread.
+
+    PASSWORD_HASHING_EXECUTOR picks where: 'process' (default, a pool of
+    PASSWORD_HASHING_WORKERS processes so hashing never holds the GIL of the web worker),
+    'thread', 'inline' or the dotted path of a callable returning an Executor.
+    At most PASSWORD_HASHING_QUEUE_DEPTH jobs can be waiting or running, past that
+    HashingPoolBusy is raised right away and the request fails with 503.
+    """
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+                self._slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_QUEUE_DEPTH)
+            return self._executor
+
+    def _create_executor(self):
+        kind = settings.PASSWORD_HASHING_EXECUTOR
+        workers = settings.PASSWORD_HASHING_WORKERS or os.cpu_count()
+        if kind == 'process':
+            return ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(list(settings.PASSWORD_HASHERS),),
+            )
+        if kind == 'thread':
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        if kind == 'inline':
+            return InlineExecutor()
+        return import_string(kind)()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def submit(self, fn, *args):
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolBusy()
+
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        slots = self._slots
+
+        def done(future):
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            slots.release()
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            done(None)
+            raise
+        future.add_done_callback(done)
+        return future
+
+    def make_password(self, raw_password):
+        return self.submit(_make_password, raw_password).result()
+
+    async def amake_password(self, raw_password):
+        return await asyncio.wrap_future(self.submit(_make_password, raw_password))
+
+    def check_password(self, raw_password, encoded):
+        return self.submit(_check_password, raw_password, encoded).result()
+
+    async def acheck_password(self, raw_password, encoded):
+        return await asyncio.wrap_future(self.submit(_check_password, raw_password, encoded))
+
+    def stats(self):
+        return {
+            'executor': settings.PASSWORD_HASHING_EXECUTOR,
+            'queue_depth': self.in_flight,
+            'peak_queue_depth': self.peak_in_flight,
+            'max_queue_depth': settings.PASSWORD_HASHING_QUEUE_DEPTH,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_latency_ms': self.total_seconds / self.completed * 1000 if self.completed else 0.0,
+            'max_latency_ms': self.max_seconds * 1000,
+        }
+
+
+hasher_pool = PasswordHasherPool()
@@ -0,0 +1,134 @@
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+from core.media import media_access
+from core.storage import media_storage, reference_source
+from core.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+# format -> (Pillow format, file extension)
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# the uploaded picture is kept close to what was sent, see strip_metadata
+ORIGINAL_JPEG_QUALITY = 95
+
+
+def _encode(image, fmt):
+    pillow_format, _ = FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # jpeg has no alpha, transparent parts become white
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    # nothing from the upload's info (exif, icc, xmp) is passed on, so no metadata is kept
+    image.save(buffer, pillow_format, quality=settings.PROFILE_PIC_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def strip_metadata(upload):
+    """
+    The uploaded picture saved again in its own format without its metadata (exif
+    with the camera and gps position, xmp, comments), it is stored and served as
+    is. It is turned upright first, the exif orientation goes with the rest.
+    Only the colour profile is kept.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    pillow_format = image.format
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+
+    buffer = io.BytesIO()
+    options = {'quality': ORIGINAL_JPEG_QUALITY} if pillow_format == 'JPEG' else {}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    image.save(buffer, pillow_format, **options)
+    return SimpleUploadedFile(upload.name, buffer.getvalue(), content_type=getattr(upload, 'content_type', None))
+
+
+def make_variants(name, storage=media_storage):
+    """
+    Decodes the picture once and saves a square copy of it for every size of
+    PROFILE_PIC_SIZES in every format of PROFILE_PIC_FORMATS, next to it under variants/.
+    Pictures smaller than a size are not scaled up.
+    Returns {format: {size: file name}}.
+    """
+    with storage.open(name) as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+    folder, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    variants = {fmt: {} for fmt in settings.PROFILE_PIC_FORMATS}
+    for size in sorted(settings.PROFILE_PIC_SIZES):
+        side = min(size, *image.size)
+        resized = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+        for fmt in settings.PROFILE_PIC_FORMATS:
+            variant_name = os.path.join(folder, 'variants', f'{stem}_{size}.{FORMATS[fmt][1]}')
+            variants[fmt][str(size)] = storage.save(variant_name, ContentFile(_encode(resized, fmt)))
+    return variants
+
+
+def delete_variants(variants, storage=media_storage):
+    for names in variants.values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def process_profile_pic(user_id, name, old_variants=None):
+    """
+    Background job run after a profile picture upload, stores the variants on the
+    user unless the picture was replaced in the meantime.
+    """
+    try:
+        variants = make_variants(name)
+    except (OSError, Image.DecompressionBombError):
+        logger.exception('could not process profile picture %s of user %s', name, user_id)
+        return
+
+    updated = get_user_model().objects.filter(pk=user_id, profile_pic=name).update(profile_pic_variants=variants)
+    if updated:
+        user_cache.invalidate(user_id)
+        delete_variants(old_variants or {})
+    else:
+        delete_variants(variants)
+
+
+@media_access('students/profile_pics/', public=True)
+def profile_pic_access(user, name):
+    return True
+
+
+@reference_source
+def variant_names():
+    User = get_user_model()
+    for variants in User.objects.exclude(profile_pic_variants={}).values_list('profile_pic_variants', flat=True).iterator():
+        for names in variants.values():
+            yield from names.values()
+
+
+def variant_urls(variants, request=None):
+    """
+    {format: {size: url}} for the API, the sizes are in pixels so clients can turn it
+    into a srcset and fetch the smallest picture that fits.
+    """
+    urls = {}
+    for fmt, names in variants.items():
+        urls[fmt] = {}
+        for size, name in names.items():
+            url = media_storage.url(name)
+            urls[fmt][size] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,99 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, message, to, from_email=None):
+    """
+    Queues an email in the outbox instead of sending it.
+    Call it inside the transaction of the change the email is about.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Takes up to batch_size due emails and pushes their next attempt past the lease,
+    so another sender running at the same time skips them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.pending, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=pks).update(
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+        )
+    return list(EmailOutbox.objects.filter(pk__in=pks).order_by('pk'))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def send_batch(batch_size=None):
+    """
+    Sends one batch of due emails over a single SMTP connection.
+    Returns the number of emails sent, retried later and given up on.
+    """
+    emails = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    result = {'sent': 0, 'retried': 0, 'dead': 0}
+    if not emails:
+        return result
+
+    connection = get_connection()
+    try:
+        connection.open()
+        connection_error = None
+    except Exception as exc:
+        connection_error = exc
+
+    now = timezone.now()
+    try:
+        for email in emails:
+            error = connection_error
+            if error is None:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+                try:
+                    message.send()
+                except Exception as exc:
+                    error = exc
+
+            if error is None:
+                email.status = EmailOutbox.sent
+                email.sent_at = now
+                email.last_error = ''
+                result['sent'] += 1
+                continue
+
+            email.attempts += 1
+            email.last_error = f'{type(error).__name__}: {error}'
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = EmailOutbox.dead
+                result['dead'] += 1
+                logger.error('giving up on email %s after %s attempts: %s', email.pk, email.attempts, email.last_error)
+            else:
+                email.next_attempt_at = now + retry_delay(email.attempts)
+                result['retried'] += 1
+    finally:
+        if connection_error is None:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+    return result
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored media files nothing refers to anymore and prints deduplication stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='recount the references of every file first')
+        parser.add_argument('--grace-seconds', type=int, default=None, help='keep files unreferenced for less than this')
+        parser.add_argument('--dry-run', action='store_true', help='only print the stats')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = media_storage.recount()
+            self.stdout.write(f'recounted references, {fixed} files were off')
+        if not options['dry_run']:
+            result = media_storage.collect_garbage(grace_seconds=options['grace_seconds'])
+            self.stdout.write(
+                'deleted {blobs} files ({bytes} bytes), {orphan_files} files without a row '
+                'and {partial_files} unfinished uploads'.format(**result)
+            )
+        stats = media_storage.stats()
+        self.stdout.write(
+            '{blobs} files, {stored_bytes} bytes stored, {bytes_saved} bytes saved by deduplication, '
+            '{unreferenced} unreferenced files ({unreferenced_bytes} bytes)'.format(**stats)
+        )
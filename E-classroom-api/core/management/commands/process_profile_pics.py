@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.images import process_profile_pic
+
+
+class Command(BaseCommand):
+    help = 'Makes the resized profile pictures of users who have none, e.g. after a restart lost queued jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='redo the pictures of every user')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True)
+        # the default picture is shared by everyone who never uploaded one
+        users = users.exclude(profile_pic=User._meta.get_field('profile_pic').get_default())
+        if not options['all']:
+            users = users.filter(profile_pic_variants={})
+
+        count = 0
+        for pk, name, variants in users.values_list('pk', 'profile_pic', 'profile_pic_variants').iterator():
+            process_profile_pic(pk, name, variants)
+            count += 1
+        self.stdout.write(f'processed {count} profile pictures')
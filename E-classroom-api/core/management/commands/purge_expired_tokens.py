@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.purge import purge_all
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired rows of the token and upload session tables in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='rows deleted per statement')
+        parser.add_argument('--pause', type=float, default=None, help='seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        results = purge_all(batch_size=options['batch_size'], pause=options['pause'])
+        for result in results:
+            self.stdout.write(
+                '{model}: purged {rows} rows in {batches} batches ({seconds:.2f}s)'.format(**result)
+            )
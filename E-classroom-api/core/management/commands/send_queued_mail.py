@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.mail import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Sends the emails queued in the outbox, in batches over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='emails sent per SMTP connection')
+        parser.add_argument('--loop', action='store_true', help='keep running and poll for new emails')
+        parser.add_argument('--interval', type=float, default=5, help='seconds to wait when the outbox is empty')
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'dead': 0}
+        while True:
+            result = send_batch(options['batch_size'])
+            for key, value in result.items():
+                totals[key] += value
+            if any(result.values()):
+                self.stdout.write('sent {sent}, retrying {retried}, dead {dead}'.format(**result))
+                continue
+            if not options['loop']:
+                break
+            connection.close()
+            time.sleep(options['interval'])
+
+        self.stdout.write('done: sent {sent}, retrying {retried}, dead {dead}'.format(**totals))
@@ -0,0 +1,253 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import http_date, parse_etags
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import JWTAuthentication
+from core.storage import media_storage
+from core.user_cache import user_cache
+
+CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+
+class AccessRule:
+    """
+    Who may read the media files under prefix: check(user, name), user being None
+    when anonymous. scope(name) is what a signed url covers, the file itself by default,
+    a whole folder for files that refer to each other by relative urls (HLS playlists).
+    """
+    def __init__(self, prefix, check, public=False, scope=None):
+        self.prefix = prefix
+        self.check = check
+        self.public = public
+        self.scope = scope or (lambda name: name)
+
+
+# files without a rule are never served
+access_rules = []
+
+
+def media_access(prefix, public=False, scope=None):
+    """
+    Registers the access check of the media files under prefix.
+    Public files get plain urls, the others signed ones, see media_url.
+    """
+    def register(check):
+        access_rules.append(AccessRule(prefix, check, public, scope))
+        access_rules.sort(key=lambda rule: len(rule.prefix), reverse=True)
+        return check
+    return register
+
+
+def access_rule(name):
+    for rule in access_rules:
+        if name.startswith(rule.prefix):
+            return rule
+    return None
+
+
+def sign(scope, user_id, expires):
+    return salted_hmac('core.media', f'{scope}:{user_id}:{expires}').hexdigest()
+
+
+def media_url(name, request=None):
+    """
+    Url of a media file for the user of the request. Files that are not public get a
+    signature so <video> and <img> tags, which can't send the Authorization header,
+    can load them. It is part of the path, urls relative to a signed one (the renditions
+    of an HLS playlist) carry it along. The expiry is rounded so the url, and the
+    browser cache, stays the same for MEDIA_URL_EXPIRE_SECONDS.
+    """
+    if not name:
+        return None
+    url = media_storage.url(name)
+    user = getattr(request, 'user', None)
+    rule = access_rule(name)
+    if rule is not None and not rule.public and user is not None and user.is_authenticated:
+        ttl = settings.MEDIA_URL_EXPIRE_SECONDS
+        expires = (int(time.time()) // ttl + 2) * ttl
+        token = f'{user.pk}.{expires}.{sign(rule.scope(name), user.pk, expires)}'
+        url = reverse('media-signed', kwargs={'token': token, 'name': name})
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def content_hash(name):
+    """The sha256 a file of the content addressed storage is named by, None for other files."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem if CONTENT_ADDRESSED.match(stem) else None
+
+
+def file_etag(name, st):
+    # anything not named by its content is tagged by mtime and size
+    return f'"{content_hash(name) or f"{st.st_mtime_ns:x}-{st.st_size:x}"}"'
+
+
+def parse_range(header, size):
+    """
+    Returns the (first, last) byte of a single range, None to send the whole file
+    (no, malformed or multiple ranges) or False when the range is past the end.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return False if last else None
+        return max(0, size - int(last)), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        return False
+    if last < first:
+        return None
+    return first, last
+
+
+class RangeFile:
+    """
+    Part of an open file, read by FileResponse. fileno() lets servers with a
+    wsgi.file_wrapper (gunicorn) send it with os.sendfile from the current position
+    for Content-Length bytes, without reading it into Python.
+    """
+    def __init__(self, f, first, length):
+        f.seek(first)
+        self.f = f
+        self.name = f.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def close(self):
+        self.f.close()
+
+
+class MediaView(View):
+    """
+    Serves the files of the media storage after checking the access rule of their prefix.
+
+    The user comes from the Authorization header or from the signature of a url made
+    by media_url. Depending on MEDIA_SENDFILE the file is then handed to the web server
+    ('x-accel-redirect' for nginx, 'x-sendfile' for apache) or sent from here with
+    support for Range requests. Responses carry a strong ETag and answer If-None-Match
+    with 304, content addressed files never change so they are cached for good.
+    """
+    http_method_names = ['get', 'head']
+
+    def get(self, request, name, token=None):
+        if posixpath.normpath(name) != name or name.startswith('/'):
+            raise Http404()
+        rule = access_rule(name)
+        if rule is None:
+            raise Http404()
+        try:
+            user = self.get_user(request, rule.scope(name), token)
+        except AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=401)
+        if not rule.check(user, name):
+            if user is None:
+                return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            return JsonResponse({'detail': 'You do not have permission to access this file.'}, status=403)
+
+        try:
+            path = media_storage.path(name)
+            st = os.stat(path)
+        except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+            raise Http404()
+        if not stat.S_ISREG(st.st_mode):
+            raise Http404()
+        return self.serve(request, name, path, st, rule.public)
+
+    def get_user(self, request, scope, token):
+        if token is not None:
+            try:
+                user_id, expires, signature = token.split('.')
+                user_id, expires = int(user_id), int(expires)
+            except ValueError:
+                raise AuthenticationFailed('Invalid signature')
+            if expires < time.time() or not constant_time_compare(signature, sign(scope, user_id, expires)):
+                raise AuthenticationFailed('Invalid or expired signature')
+            user = user_cache.get(user_id)
+            if user is None:
+                raise AuthenticationFailed('User not found')
+            return user
+
+        payload, _ = JWTAuthentication().decode_header(request)
+        if payload is None:
+            return None
+        user = user_cache.get(payload['user_id'])
+        if user is None:
+            raise AuthenticationFailed('User not found')
+        return user
+
+    def serve(self, request, name, path, st, public):
+        etag = file_etag(name, st)
+        immutable = content_hash(name) is not None
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(st.st_mtime),
+            'Cache-Control': ('public' if public else 'private')
+            + (', max-age=31536000, immutable' if immutable else ', no-cache'),
+            'Accept-Ranges': 'bytes',
+            'X-Content-Type-Options': 'nosniff',
+        }
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = HttpResponseNotModified()
+            for header in ('ETag', 'Cache-Control', 'Last-Modified'):
+                response[header] = headers[header]
+            return response
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+            headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(name)
+            return HttpResponse(content_type=content_type, headers=headers)
+        if settings.MEDIA_SENDFILE == 'x-sendfile':
+            headers['X-Sendfile'] = path
+            return HttpResponse(content_type=content_type, headers=headers)
+
+        byte_range = None
+        if 'Range' in request.headers:
+            if_range = request.headers.get('If-Range')
+            if not if_range or if_range == etag:
+                byte_range = parse_range(request.headers['Range'], st.st_size)
+        if byte_range is False:
+            headers['Content-Range'] = f'bytes */{st.st_size}'
+            return HttpResponse(status=416, headers=headers)
+
+        f = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(f, content_type=content_type)
+        else:
+            first, last = byte_range
+            length = last - first + 1
+            response = FileResponse(RangeFile(f, first, length), status=206, content_type=content_type)
+            headers['Content-Length'] = str(length)
+            headers['Content-Range'] = f'bytes {first}-{last}/{st.st_size}'
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,57 @@
+import datetime
+import hashlib
+
+import jwt
+from django.db import migrations, models
+
+
+def hash_blacklisted_tokens(apps, schema_editor):
+    BlacklistedToken = apps.get_model('core', 'BlacklistedToken')
+    for row in BlacklistedToken.objects.all().iterator():
+        try:
+            payload = jwt.decode(row.token, options={'verify_signature': False, 'verify_exp': False})
+        except jwt.DecodeError:
+            payload = {}
+
+        source = payload.get('jti') or row.token
+        row.key = hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+        if 'exp' in payload:
+            row.expires_at = datetime.datetime.fromtimestamp(payload['exp'], tz=datetime.timezone.utc)
+        else:
+            row.expires_at = row.created_at + datetime.timedelta(days=7)
+        row.save(update_fields=['key', 'expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blacklistedtoken',
+            name='key',
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='blacklistedtoken',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(hash_blacklisted_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='blacklistedtoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='key',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='expires_at',
+            field=models.DateTimeField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_blacklistedtoken_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
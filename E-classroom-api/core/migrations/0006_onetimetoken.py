@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='email_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='token_created_at',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='token_expiration',
+        ),
+        migrations.CreateModel(
+            name='OneTimeToken',
+            fields=[
+                ('token_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('purpose', models.PositiveSmallIntegerField(choices=[(1, 'activation'), (2, 'password reset')])),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
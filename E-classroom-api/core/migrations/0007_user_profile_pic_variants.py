@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_onetimetoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_pic_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:11
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_profile_pic_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_pic',
+            field=models.ImageField(blank=True, default='students/profile_pics/male.png', null=True, storage=core.storage.get_media_storage, upload_to='students/profile_pics'),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refs', models.PositiveIntegerField(default=1)),
+                ('saves', models.PositiveIntegerField(default=1)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refs', 'released_at'], name='core_stored_refs_1b6e91_idx')],
+            },
+        ),
+    ]
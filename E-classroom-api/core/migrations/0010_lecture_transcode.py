@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_lecture_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lecture',
+            name='hls_playlist',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='poster',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='transcode_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='transcode_progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='transcode_status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'pending'), (2, 'processing'), (3, 'ready'), (4, 'failed')], default=1),
+        ),
+    ]
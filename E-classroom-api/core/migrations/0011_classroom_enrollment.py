@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:29
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_lecture_transcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Classroom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('code', models.CharField(default=core.models.generate_class_code, max_length=8, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tutor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='taught_classrooms', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='core.classroom')),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['tutor', '-created_at', '-id'], name='core_classr_tutor_i_06ee62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['classroom', 'joined_at'], name='core_enroll_classro_724830_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('student', 'classroom'), name='unique_enrollment'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:35
+
+import core.storage
+import core.utils
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_classroom_enrollment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Assignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('max_points', models.PositiveSmallIntegerField(default=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='core.classroom')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(storage=core.storage.get_media_storage, upload_to='assignments/submissions', validators=[core.utils.file_validator])),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('grade', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('feedback', models.TextField(blank=True)),
+                ('graded_at', models.DateTimeField(blank=True, null=True)),
+                ('assignment', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='core.assignment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['classroom', 'due_date'], name='core_assign_classro_82bede_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(fields=('assignment', 'student'), name='unique_submission'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_assignment_submission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Test',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('answer_key', models.BinaryField(default=b'')),
+                ('question_points', models.BinaryField(default=b'')),
+                ('key_version', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tests', to='core.classroom')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('text', models.TextField()),
+                ('options', models.JSONField()),
+                ('correct_option', models.PositiveSmallIntegerField()),
+                ('points', models.PositiveSmallIntegerField(default=1)),
+                ('test', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='core.test')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Attempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'in progress'), (2, 'submitted')], default=1)),
+                ('answers', models.BinaryField(default=b'')),
+                ('score', models.PositiveIntegerField(blank=True, null=True)),
+                ('key_version', models.PositiveIntegerField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to=settings.AUTH_USER_MODEL)),
+                ('test', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='core.test')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['classroom', 'date'], name='core_test_classro_75b7fa_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(fields=('test', 'position'), name='unique_question_position'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['test', 'status'], name='core_attemp_test_id_c28972_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(fields=('test', 'student'), name='unique_attempt'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_test_question_attempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.question')),
+                ('key_version', models.PositiveIntegerField(default=0)),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveBigIntegerField(default=0)),
+                ('score_square_sum', models.PositiveBigIntegerField(default=0)),
+                ('correct_score_sum', models.PositiveBigIntegerField(default=0)),
+                ('option_counts', models.JSONField(default=list)),
+                ('unanswered', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_questionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='paper_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_announcements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDashboardStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('classes', models.PositiveIntegerField(default=0)),
+                ('pending_assignments', models.PositiveIntegerField(default=0)),
+                ('upcoming_tests', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writing_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
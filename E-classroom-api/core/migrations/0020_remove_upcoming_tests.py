@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_upload_writing_until'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userdashboardstats',
+            name='upcoming_tests',
+        ),
+    ]
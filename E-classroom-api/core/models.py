@@ -1,6 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import post_save
+from django.utils.crypto import get_random_string, salted_hmac
+from asgiref.sync import sync_to_async
+from core.hashing import hasher_pool
+from core.storage import get_media_storage
+from core.utils import file_validator
 import secrets
+import uuid
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
@@ -47,36 +57,50 @@ class User(AbstractBaseUser):
     username = models.CharField(max_length=50)
     email = models.EmailField(max_length=254, unique=True)
     role = models.PositiveSmallIntegerField(choices=role_choices, default=1)
-    profile_pic = models.ImageField(upload_to='students/profile_pics', blank=True, null=True, default='students/profile_pics/male.png')
+    profile_pic = models.ImageField(upload_to='students/profile_pics', storage=get_media_storage, blank=True, null=True, default='students/profile_pics/male.png')
+    # resized copies made by core.images.process_profile_pic, {format: {size: file name}}
+    profile_pic_variants = models.JSONField(default=dict, blank=True)
     
     date_joined = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
-    
-    email_token = models.CharField(max_length=64, blank=True, null=True)
-    token_created_at = models.DateTimeField(blank=True, null=True)
-    token_expiration = models.DateTimeField(blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     objects = UserManager()
-    
-    def set_email_token(self):
-        """Generates a new reset token and sets its expiration time."""
-        self.email_token = secrets.token_hex(4)
-        self.token_expiration = timezone.now() + timedelta(minutes=4)
-        self.save()
 
-    def clear_email_token(self):
-        """Clears the reset token and its expiration time."""
-        self.email_token = None
-        self.token_expiration = None
-        self.save()
+    def set_password(self, raw_password):
+        """Hashes on core.hashing.hasher_pool instead of the request thread."""
+        if raw_password is None:
+            self.password = make_password(None)
+        else:
+            self.password = hasher_pool.make_password(raw_password)
+        self._password = raw_password
 
-    def is_email_token_valid(self, token):
-        """Checks if the provided token is valid and not expired."""
-        return self.email_token == token and self.token_expiration > timezone.now()
+    def check_password(self, raw_password):
+        """
+        Checks the password on core.hashing.hasher_pool, a hash made with an outdated
+        hasher is replaced by one made with the first of PASSWORD_HASHERS.
+        """
+        if raw_password is None or not self.has_usable_password():
+            return False
+        matches, rehashed = hasher_pool.check_password(raw_password, self.password)
+        if matches and rehashed:
+            self.password = rehashed
+            self._password = None
+            self.save(update_fields=['password'])
+        return matches
 
+    async def acheck_password(self, raw_password):
+        if raw_password is None or not self.has_usable_password():
+            return False
+        matches, rehashed = await hasher_pool.acheck_password(raw_password, self.password)
+        if matches and rehashed:
+            self.password = rehashed
+            self._password = None
+            await self.asave(update_fields=['password'])
+        return matches
+    
     def __str__(self):
         return self.email
     
@@ -88,9 +112,602 @@ class User(AbstractBaseUser):
     
     
 class BlacklistedToken(models.Model):
-    token=models.CharField(max_length=500, unique=True)
+    """
+    Revoked token, stored under core.tokens.revocation_key instead of the whole token.
+    expires_at is the exp of the token, after that the row is not needed anymore
+    and is deleted by the purge_expired_tokens command or the sweeper in core.purge.
+    """
+    key=models.CharField(max_length=32, unique=True)
+    user=models.ForeignKey('User', on_delete=models.CASCADE)
+    expires_at=models.DateTimeField(db_index=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class TokenFamilyManager(models.Manager):
+
+    def start(self, user):
+        """Starts a new family for a login, its first refresh token is generation 0."""
+        expires_at = timezone.now() + timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS)
+        return self.create(user=user, expires_at=expires_at)
+
+    async def astart(self, user):
+        expires_at = timezone.now() + timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS)
+        return await self.acreate(user=user, expires_at=expires_at)
+
+    def rotate(self, family_id, generation):
+        """
+        Moves the family to the next generation if generation is its current one.
+        It is a single compare-and-increment UPDATE on the primary key, returns the
+        new generation or None when the token was already used, revoked or expired.
+        Presenting an older generation means the token was replayed, so the whole
+        family is revoked and every token issued from it stops working.
+        """
+        updated = self._current(family_id, generation).update(**self._next_generation())
+        if updated:
+            return generation + 1
+
+        self.revoke(family_id)
+        return None
+
+    async def arotate(self, family_id, generation):
+        updated = await self._current(family_id, generation).aupdate(**self._next_generation())
+        if updated:
+            return generation + 1
+
+        await self.arevoke(family_id)
+        return None
+
+    def revoke(self, family_id):
+        return self.filter(pk=family_id, revoked=False).update(revoked=True)
+
+    async def arevoke(self, family_id):
+        return await self.filter(pk=family_id, revoked=False).aupdate(revoked=True)
+
+    def _current(self, family_id, generation):
+        return self.filter(pk=family_id, generation=generation, revoked=False, expires_at__gt=timezone.now())
+
+    def _next_generation(self):
+        return {
+            'generation': models.F('generation') + 1,
+            'expires_at': timezone.now() + timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS),
+        }
+
+
+class TokenFamily(models.Model):
+    """
+    One row per login session. Refresh tokens carry the family id and the generation
+    they were issued for, only the latest generation can be refreshed.
+    expires_at slides forward on every refresh.
+    """
+    id=models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user=models.ForeignKey('User', on_delete=models.CASCADE)
+    generation=models.PositiveIntegerField(default=0)
+    revoked=models.BooleanField(default=False)
+    expires_at=models.DateTimeField(db_index=True)
     created_at=models.DateTimeField(auto_now_add=True)
 
+    objects = TokenFamilyManager()
+
+    def __str__(self):
+        return f'{self.user_id}:{self.id}:{self.generation}'
+
+
+
+class EmailOutbox(models.Model):
+    """
+    Email waiting to be sent by the send_queued_mail command.
+    Rows are written in the same transaction as the change they are about, so an
+    email is only sent if that change was committed.
+    """
+    pending = 1
+    sent = 2
+    dead = 3
+    status_choices = (
+        (pending, "pending"),
+        (sent, "sent"),
+        (dead, "dead"),
+    )
+
+    subject=models.CharField(max_length=255)
+    body=models.TextField()
+    from_email=models.CharField(max_length=254)
+    to=models.JSONField()
+    status=models.PositiveSmallIntegerField(choices=status_choices, default=pending)
+    attempts=models.PositiveSmallIntegerField(default=0)
+    next_attempt_at=models.DateTimeField(default=timezone.now)
+    last_error=models.TextField(blank=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+    sent_at=models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)}'
+
+
+
+class OneTimeTokenManager(models.Manager):
+
+    def hash(self, token):
+        return salted_hmac('core.OneTimeToken', token).hexdigest()
+
+    def issue(self, user, purpose):
+        """
+        Replaces the user's token for purpose with a new one and returns the raw token,
+        only its hash is stored.
+        """
+        token = secrets.token_hex(8)
+        self.filter(user=user, purpose=purpose).delete()
+        self.create(
+            token_hash=self.hash(token),
+            purpose=purpose,
+            user=user,
+            expires_at=timezone.now() + timedelta(minutes=settings.ONE_TIME_TOKEN_EXP_MINUTES),
+        )
+        return token
+
+    def consume(self, token, purpose):
+        """
+        Deletes the token if it is valid for purpose and not expired and returns its user id,
+        None otherwise. It is a single DELETE ... RETURNING so a token can be used only once
+        even when two requests race for it.
+        """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE token_hash = %s AND purpose = %s AND expires_at > %s RETURNING user_id',
+                [self.hash(token), purpose, connection.ops.adapt_datetimefield_value(timezone.now())],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    async def aconsume(self, token, purpose):
+        return await sync_to_async(self.consume)(token, purpose)
+
+
+class OneTimeToken(models.Model):
+    """
+    Token emailed to a user for activating the account or resetting the password,
+    stored by its keyed hash. Expired rows are deleted by purge_expired_tokens.
+    """
+    activation = 1
+    password_reset = 2
+    purpose_choices = (
+        (activation, "activation"),
+        (password_reset, "password reset"),
+    )
+
+    token_hash=models.CharField(max_length=64, primary_key=True)
+    purpose=models.PositiveSmallIntegerField(choices=purpose_choices)
+    user=models.ForeignKey('User', on_delete=models.CASCADE)
+    expires_at=models.DateTimeField(db_index=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    objects = OneTimeTokenManager()
+
+    def __str__(self):
+        return f'{self.user_id}:{self.get_purpose_display()}'
+
+
+class StoredBlob(models.Model):
+    """
+    A file of core.storage.ContentAddressedStorage, named by the sha256 of its content.
+    refs is the number of references to it, saves the number of times it was saved.
+    """
+    name=models.CharField(max_length=255, primary_key=True)
+    size=models.PositiveBigIntegerField()
+    refs=models.PositiveIntegerField(default=1)
+    saves=models.PositiveIntegerField(default=1)
+    released_at=models.DateTimeField(blank=True, null=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['refs', 'released_at'])]
+
+    def __str__(self):
+        return self.name
+
+
+class Lecture(models.Model):
+    """
+    A recorded lecture, the video is uploaded through lectures.uploads and then
+    transcoded to HLS by lectures.transcode.
+    """
+    pending = 1
+    processing = 2
+    ready = 3
+    failed = 4
+    transcode_status_choices = (
+        (pending, "pending"),
+        (processing, "processing"),
+        (ready, "ready"),
+        (failed, "failed"),
+    )
+
+    title=models.CharField(max_length=200)
+    description=models.TextField(blank=True)
+    video=models.FileField(upload_to='lectures/videos', storage=get_media_storage)
+    video_size=models.PositiveBigIntegerField(default=0)
+    uploaded_by=models.ForeignKey('User', on_delete=models.CASCADE, related_name='lectures')
+    transcode_status=models.PositiveSmallIntegerField(choices=transcode_status_choices, default=pending)
+    transcode_progress=models.PositiveSmallIntegerField(default=0)
+    transcode_error=models.TextField(blank=True)
+    # media names of the HLS master playlist and the poster frame, set once transcoded
+    hls_playlist=models.CharField(max_length=255, blank=True)
+    poster=models.CharField(max_length=255, blank=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload of a lecture video. The bytes received so far are in a partial
+    file inside the media storage, `offset` of the `size` bytes are written.
+    A session idle until expires_at is dropped, its partial file is deleted by gc_media.
+    A request writing to the file holds the session until writing_until, a lease it
+    renews while bytes arrive, so two requests never write it at once.
+    """
+    id=models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user=models.ForeignKey('User', on_delete=models.CASCADE, related_name='upload_sessions')
+    filename=models.CharField(max_length=255)
+    size=models.PositiveBigIntegerField()
+    offset=models.PositiveBigIntegerField(default=0)
+    writing_until=models.DateTimeField(blank=True, null=True)
+    expires_at=models.DateTimeField(db_index=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
+
+
+def generate_class_code():
+    # no 0/O or 1/I, students type it in
+    return get_random_string(6, allowed_chars='ABCDEFGHJKLMNPQRSTUVWXYZ23456789')
+
+
+class ClassroomManager(models.Manager):
+
+    def create_with_code(self, attempts=10, **fields):
+        """
+        Creates the classroom with a random join code, drawing a new one when the unique
+        index says it is taken. Each try runs in a savepoint so a collision doesn't
+        break the surrounding transaction.
+        """
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return self.create(code=generate_class_code(), **fields)
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
+
+class Classroom(models.Model):
+    """
+    A class run by a tutor, students join it with its code.
+    Listed through classrooms.views.ClassroomListView. feed_version goes up and
+    feed_updated_at is set whenever an announcement of the class changes, they are
+    the ETag and Last-Modified of its announcement feed (classrooms.feed).
+    """
+    name=models.CharField(max_length=100)
+    description=models.TextField(blank=True)
+    # covered by the (tutor, created_at) index
+    tutor=models.ForeignKey('User', on_delete=models.CASCADE, related_name='taught_classrooms', db_index=False)
+    code=models.CharField(max_length=8, unique=True, default=generate_class_code)
+    created_at=models.DateTimeField(auto_now_add=True)
+    feed_version=models.PositiveIntegerField(default=0)
+    feed_updated_at=models.DateTimeField(blank=True, null=True)
+
+    objects = ClassroomManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['tutor', '-created_at', '-id'])]
+
+    def __str__(self):
+        return self.name
+
+
+class EnrollmentManager(models.Manager):
+
+    def join(self, classroom_id, student_id):
+        """
+        Enrolls the student, returns False when already enrolled. A single
+        INSERT ... ON CONFLICT DO NOTHING, so concurrent joins neither fail on the
+        unique constraint nor wait on a lock taken by a read first. post_save is sent
+        as for a save, the receivers (dashboard counts) see the new enrollment.
+        """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        joined_at = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (classroom_id, student_id, joined_at) VALUES (%s, %s, %s) '
+                f'ON CONFLICT (student_id, classroom_id) DO NOTHING RETURNING id',
+                [classroom_id, student_id, connection.ops.adapt_datetimefield_value(joined_at)],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return False
+        enrollment = self.model(pk=row[0], classroom_id=classroom_id, student_id=student_id, joined_at=joined_at)
+        enrollment._state.adding = False
+        post_save.send(sender=self.model, instance=enrollment, created=True, update_fields=None, raw=False, using=self.db)
+        return True
+
+
+class Enrollment(models.Model):
+    """
+    A student in a classroom. (student, classroom) is unique and finds the classes of a
+    student, (classroom, joined_at) the members of a class.
+    """
+    classroom=models.ForeignKey('Classroom', on_delete=models.CASCADE, related_name='enrollments', db_index=False)
+    student=models.ForeignKey('User', on_delete=models.CASCADE, related_name='enrollments', db_index=False)
+    joined_at=models.DateTimeField(auto_now_add=True)
+
+    objects = EnrollmentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'classroom'], name='unique_enrollment'),
+        ]
+        indexes = [models.Index(fields=['classroom', 'joined_at'])]
+
+    def __str__(self):
+        return f'{self.student_id} in {self.classroom_id}'
+
+
+class Announcement(models.Model):
+    """
+    A post of the tutor to their class. (classroom, created_at, id) is the order of
+    the feed, its pages are read from the index by keyset.
+    """
+    classroom=models.ForeignKey('Classroom', on_delete=models.CASCADE, related_name='announcements', db_index=False)
+    author=models.ForeignKey('User', on_delete=models.CASCADE, related_name='announcements')
+    content=models.TextField()
+    created_at=models.DateTimeField(auto_now_add=True)
+    updated_at=models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['classroom', 'created_at', 'id'])]
+
+    def __str__(self):
+        return self.content[:50]
+
+
+class Assignment(models.Model):
+    """
+    Work set for a classroom, students hand in one file each as a Submission.
+    """
+    classroom=models.ForeignKey('Classroom', on_delete=models.CASCADE, related_name='assignments', db_index=False)
+    title=models.CharField(max_length=200)
+    description=models.TextField(blank=True)
+    due_date=models.DateTimeField(blank=True, null=True)
+    max_points=models.PositiveSmallIntegerField(default=100)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['classroom', 'due_date'])]
+
+    def __str__(self):
+        return self.title
+
+
+class Submission(models.Model):
+    """
+    The file a student handed in for an assignment, handing in again replaces it.
+    (assignment, student) is unique and lists the submissions of an assignment.
+    """
+    assignment=models.ForeignKey('Assignment', on_delete=models.CASCADE, related_name='submissions', db_index=False)
+    student=models.ForeignKey('User', on_delete=models.CASCADE, related_name='submissions')
+    file=models.FileField(upload_to='assignments/submissions', storage=get_media_storage, validators=[file_validator])
+    submitted_at=models.DateTimeField(default=timezone.now)
+    grade=models.PositiveSmallIntegerField(blank=True, null=True)
+    feedback=models.TextField(blank=True)
+    graded_at=models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['assignment', 'student'], name='unique_submission'),
+        ]
+
+    def __str__(self):
+        return f'{self.student_id} for {self.assignment_id}'
+
+
+class Test(models.Model):
+    """
+    A multiple choice test of a classroom. answer_key and question_points are the
+    correct option and the points of every question in position order, packed by
+    quizzes.grading.compile_key as int8 and int16 arrays so attempts are scored
+    without loading the questions. key_version goes up every time they change,
+    paper_version every time what students see of the questions does (quizzes.papers).
+    """
+    classroom=models.ForeignKey('Classroom', on_delete=models.CASCADE, related_name='tests', db_index=False)
+    title=models.CharField(max_length=200)
+    description=models.TextField(blank=True)
+    date=models.DateTimeField(blank=True, null=True)
+    answer_key=models.BinaryField(default=b'')
+    question_points=models.BinaryField(default=b'')
+    key_version=models.PositiveIntegerField(default=0)
+    paper_version=models.PositiveIntegerField(default=1)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['classroom', 'date'])]
+
+    def __str__(self):
+        return self.title
+
+
+class Question(models.Model):
+    """
+    A question of a test, correct_option is the index of the right one in options.
+    Questions are numbered from 0 by position, it is their index in the answer key
+    and in the answers of an attempt.
+    """
+    test=models.ForeignKey('Test', on_delete=models.CASCADE, related_name='questions', db_index=False)
+    position=models.PositiveSmallIntegerField()
+    text=models.TextField()
+    options=models.JSONField()
+    correct_option=models.PositiveSmallIntegerField()
+    points=models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'position'], name='unique_question_position'),
+        ]
+
+    def __str__(self):
+        return self.text[:50]
+
+
+class Attempt(models.Model):
+    """
+    A student taking a test. answers holds the chosen option of every question by
+    position as int8, -1 when not answered. score is set by quizzes.grading once
+    submitted, with the key_version of the test it was graded against.
+    """
+    in_progress = 1
+    submitted = 2
+    status_choices = (
+        (in_progress, "in progress"),
+        (submitted, "submitted"),
+    )
+
+    test=models.ForeignKey('Test', on_delete=models.CASCADE, related_name='attempts', db_index=False)
+    student=models.ForeignKey('User', on_delete=models.CASCADE, related_name='attempts')
+    status=models.PositiveSmallIntegerField(choices=status_choices, default=in_progress)
+    answers=models.BinaryField(default=b'')
+    score=models.PositiveIntegerField(blank=True, null=True)
+    key_version=models.PositiveIntegerField(blank=True, null=True)
+    started_at=models.DateTimeField(auto_now_add=True)
+    submitted_at=models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'student'], name='unique_attempt'),
+        ]
+        indexes = [models.Index(fields=['test', 'status'])]
+
+    def __str__(self):
+        return f'{self.student_id} on {self.test_id}'
+
+
+class QuestionStats(models.Model):
+    """
+    Running sums over the graded attempts of a question, from which quizzes.stats
+    derives its difficulty, discrimination and option distribution without reading
+    the attempts: responses n, correct Σx, score_sum Σy, score_square_sum Σy² and
+    correct_score_sum Σxy, x being 1 for a correct answer and y the attempt's score.
+    They hold for key_version of the test and start over when the key changes.
+    """
+    question=models.OneToOneField('Question', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    key_version=models.PositiveIntegerField(default=0)
+    responses=models.PositiveIntegerField(default=0)
+    correct=models.PositiveIntegerField(default=0)
+    score_sum=models.PositiveBigIntegerField(default=0)
+    score_square_sum=models.PositiveBigIntegerField(default=0)
+    correct_score_sum=models.PositiveBigIntegerField(default=0)
+    # times each option was chosen, by index
+    option_counts=models.JSONField(default=list)
+    unanswered=models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'stats of {self.question_id}'
+
+
+class Notification(models.Model):
+    """
+    An event of the notification bell, stored once whatever the number of people it
+    is for: either for the students of a classroom (recipient empty), who find it by
+    their enrollment when they read their notifications, or for one recipient.
+    Ids grow with time, what a user has read is kept as a watermark on them in
+    NotificationState.
+    """
+    classroom=models.ForeignKey('Classroom', on_delete=models.CASCADE, related_name='notifications', blank=True, null=True, db_index=False)
+    recipient=models.ForeignKey('User', on_delete=models.CASCADE, related_name='notifications', blank=True, null=True, db_index=False)
+    kind=models.CharField(max_length=30)
+    title=models.CharField(max_length=200)
+    message=models.TextField(blank=True)
+    data=models.JSONField(default=dict, blank=True)
+    created_at=models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'id']),
+            models.Index(fields=['recipient', 'id']),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class NotificationStateManager(models.Manager):
+
+    def _bump(self, sql, params, many=False):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            (cursor.executemany if many else cursor.execute)(
+                sql.format(table=table) + f' ON CONFLICT (user_id) DO UPDATE SET unread_count = {table}.unread_count + 1',
+                params,
+            )
+
+    def bump_class(self, classroom_id):
+        """
+        Counts a new notification of the classroom as unread for its students, one
+        INSERT ... SELECT ... ON CONFLICT DO UPDATE however big the class is.
+        """
+        enrollments = connection.ops.quote_name(Enrollment._meta.db_table)
+        self._bump(
+            f"INSERT INTO {{table}} (user_id, read_until, read_ids, unread_count) "
+            f"SELECT student_id, 0, '[]', 1 FROM {enrollments} WHERE classroom_id = %s",
+            [classroom_id],
+        )
+
+    def bump_users(self, user_ids):
+        self._bump(
+            "INSERT INTO {table} (user_id, read_until, read_ids, unread_count) VALUES (%s, 0, '[]', 1)",
+            [[user_id] for user_id in user_ids], many=True,
+        )
+
+
+class NotificationState(models.Model):
+    """
+    What a user has read of their notifications: everything up to the id read_until
+    and the ids in read_ids above it. unread_count is kept up to date by
+    notifications.inbox when notifications are published and read, the bell never
+    has to count them.
+    """
+    user=models.OneToOneField('User', on_delete=models.CASCADE, primary_key=True, related_name='notification_state')
+    read_until=models.BigIntegerField(default=0)
+    read_ids=models.JSONField(default=list)
+    unread_count=models.PositiveIntegerField(default=0)
+
+    objects = NotificationStateManager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count} unread'
+
+
+class UserDashboardStats(models.Model):
+    """
+    The counts on the dashboard of a user, kept up to date by dashboard.stats as
+    classes, assignments, enrollments and submissions are written, so the dashboard
+    is read with one primary key lookup. For a student: the classes they are in and
+    the assignments of those they haven't handed in. For a tutor: the classes they
+    teach and the submissions waiting for a grade. The upcoming tests change as time
+    passes, they are counted when the dashboard is read.
+    `manage.py rebuild_dashboard_stats` recomputes them from the tables.
+    """
+    user=models.OneToOneField('User', on_delete=models.CASCADE, primary_key=True, related_name='dashboard_stats')
+    classes=models.PositiveIntegerField(default=0)
+    pending_assignments=models.PositiveIntegerField(default=0)
+
     def __str__(self):
-        return self.token
\ No newline at end of file
+        return f'dashboard of {self.user_id}'
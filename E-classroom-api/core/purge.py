@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# models whose rows are useless once their expiry passed: (model label, expiry field)
+EXPIRING_MODELS = [
+    ('core.BlacklistedToken', 'expires_at'),
+    ('core.TokenFamily', 'expires_at'),
+    ('core.OneTimeToken', 'expires_at'),
+    ('core.UploadSession', 'expires_at'),
+]
+
+
+def purge_expired(model, field='expires_at', batch_size=None, pause=None):
+    """
+    Deletes the rows of model whose expiry is in the past.
+
+    Rows go in batches of at most batch_size primary keys, every batch is its own
+    short DELETE so the table is never locked for long, pause seconds are slept
+    between batches to leave room for other writers. The DELETE checks the expiry
+    again, a row pushed forward since it was selected (a refreshed token family,
+    an upload that got a chunk) is kept.
+    Returns the number of rows deleted, the number of batches and the time it took.
+    """
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH_SIZE
+    pause = settings.TOKEN_PURGE_PAUSE_SECONDS if pause is None else pause
+    now = timezone.now()
+    expired = model.objects.filter(**{f'{field}__lte': now}).order_by(field)
+
+    start = time.monotonic()
+    rows = batches = 0
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        deleted, _ = model.objects.filter(pk__in=pks, **{f'{field}__lte': now}).delete()
+        rows += deleted
+        batches += 1
+        if len(pks) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return {
+        'model': model._meta.label,
+        'rows': rows,
+        'batches': batches,
+        'seconds': time.monotonic() - start,
+    }
+
+
+def purge_all(batch_size=None, pause=None):
+    return [
+        purge_expired(apps.get_model(label), field, batch_size=batch_size, pause=pause)
+        for label, field in EXPIRING_MODELS
+    ]
+
+
+class Sweeper:
+    """
+    Optional in-process purge, runs purge_all every TOKEN_PURGE_INTERVAL_SECONDS
+    on a daemon thread. Keeps totals of what it purged so they can be inspected.
+    """
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.last_run = None
+
+    def start(self):
+        if self._thread is not None or settings.TOKEN_PURGE_INTERVAL_SECONDS <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='token-purge', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def sweep(self):
+        from core.revocation import revoked_tokens
+
+        results = purge_all()
+        self.runs += 1
+        self.rows += sum(result['rows'] for result in results)
+        self.seconds += sum(result['seconds'] for result in results)
+        self.last_run = {'at': timezone.now(), 'results': results}
+
+        for result in results:
+            if result['rows']:
+                logger.info('purged %(rows)d expired %(model)s rows in %(batches)d batches (%(seconds).2fs)', result)
+            # expired keys can stay in the bloom filter, they only cost false positives,
+            # it is rebuilt once a good part of it is gone
+            if result['model'] == 'core.BlacklistedToken' and result['rows'] > revoked_tokens.stats()['keys'] // 4:
+                revoked_tokens.reset()
+        return results
+
+    def stats(self):
+        return {'runs': self.runs, 'rows': self.rows, 'seconds': self.seconds, 'last_run': self.last_run}
+
+    def _run(self):
+        while not self._stop.wait(settings.TOKEN_PURGE_INTERVAL_SECONDS):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception('expired token purge failed')
+            finally:
+                connection.close()
+
+
+sweeper = Sweeper()
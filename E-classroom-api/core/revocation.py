@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Plain bloom filter over string keys.
+    Never gives false negatives, so a key it does not contain was never added.
+    """
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """
+    Per-process front for core.models.BlacklistedToken.
+
+    The filter is filled from the table when a server process starts, on a thread
+    started by core.wsgi and core.asgi when REVOCATION_WARM_ON_START is set, else
+    the first time it is used. Every token revoked through this process is added to it right away.
+    Tokens revoked by other workers are picked up by reading the rows added since
+    the last sync, at most once every REVOCATION_SYNC_SECONDS.
+    Only keys that hit the filter are checked against the table, so the common case
+    of a token that was never revoked costs no query.
+    """
+    # rows are read again from a little below the highest id seen so inserts that
+    # committed out of id order are not missed
+    sync_overlap = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._high_water = 0
+        self._synced_at = 0.0
+        # bumped by reset, a warm started before it does not put its filter in place
+        self._generation = 0
+        self._warming = None
+        self.filter_hits = 0
+        self.filter_misses = 0
+        self.false_positives = 0
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._high_water = 0
+            self._synced_at = 0.0
+            self._generation += 1
+
+    def start(self):
+        """Warms the filter on a daemon thread, lookups made meanwhile wait for it."""
+        if self._warming is not None or not settings.REVOCATION_WARM_ON_START:
+            return
+        self._warming = threading.Thread(target=self._warm_on_start, name='revocation-warm', daemon=True)
+        self._warming.start()
+
+    def _warm_on_start(self):
+        try:
+            self.warm()
+        except Exception:
+            logger.exception('revocation filter warm up failed, it is built on first use')
+        finally:
+            connection.close()
+
+    def warm(self):
+        """(Re)builds the filter from every unexpired row in the table."""
+        from core.models import BlacklistedToken
+
+        generation = self._generation
+        rows = BlacklistedToken.objects.filter(expires_at__gt=timezone.now())
+        capacity = max(settings.REVOCATION_FILTER_CAPACITY, rows.count() * 2)
+        bloom = BloomFilter(capacity, settings.REVOCATION_FILTER_ERROR_RATE)
+        high_water = 0
+        for pk, key in rows.values_list('pk', 'key').iterator(chunk_size=10000):
+            bloom.add(key)
+            high_water = max(high_water, pk)
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._filter = bloom
+            self._high_water = high_water
+            self._synced_at = time.monotonic()
+
+    def sync(self):
+        """Adds the rows other workers inserted since the last sync."""
+        from core.models import BlacklistedToken
+
+        warming = self._warming
+        if self._filter is None and warming is not None and warming is not threading.current_thread():
+            warming.join()
+        if self._filter is None:
+            self.warm()
+            return
+        if time.monotonic() - self._synced_at < settings.REVOCATION_SYNC_SECONDS:
+            return
+
+        rows = BlacklistedToken.objects.filter(pk__gt=self._high_water - self.sync_overlap)
+        with self._lock:
+            for pk, key in rows.values_list('pk', 'key').iterator(chunk_size=10000):
+                self._filter.add(key)
+                self._high_water = max(self._high_water, pk)
+            self._synced_at = time.monotonic()
+            needs_resize = self._filter.count > self._filter.capacity
+
+        if needs_resize:
+            self.warm()
+
+    def is_revoked(self, key):
+        from core.models import BlacklistedToken
+
+        self.sync()
+        if key not in self._filter:
+            self.filter_misses += 1
+            return False
+
+        self.filter_hits += 1
+        revoked = BlacklistedToken.objects.filter(key=key).exists()
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def revoke(self, user, key, expires_at):
+        from core.models import BlacklistedToken
+
+        BlacklistedToken.objects.get_or_create(key=key, defaults={'user': user, 'expires_at': expires_at})
+        self.add(key)
+
+    def add(self, key):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(key)
+
+    def stats(self):
+        bloom = self._filter
+        return {
+            'filter_hits': self.filter_hits,
+            'filter_misses': self.filter_misses,
+            'false_positives': self.false_positives,
+            'keys': bloom.count if bloom else 0,
+            'capacity': bloom.capacity if bloom else 0,
+            'size_bytes': len(bloom._bits) if bloom else 0,
+        }
+
+
+revoked_tokens = RevocationList()
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 import environ
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +43,12 @@ INSTALLED_APPS = [
 
     'core',
     'users',
+    'lectures',
+    'classrooms',
+    'assignments',
+    'quizzes',
+    'notifications',
+    'dashboard',
 
     'rest_framework',
     'drf_spectacular',
@@ -69,7 +75,7 @@ SOCIAL_AUTH_PIPELINE = (
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.google.GoogleOAuth2',
 
-    'django.contrib.auth.backends.ModelBackend',
+    'core.backends.PooledModelBackend',
 )
 
 LOGIN_REDIRECT_URL = '/'
@@ -113,26 +119,55 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql switches to Postgres (needs psycopg installed), SQLite otherwise.
+# SQLite transactions take the write lock when they start, so concurrent writers wait
+# on the busy timeout instead of failing when a read lock can't be upgraded.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        }
     }
-}
-'''
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql', 
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST', default='localhost'),
-        'PORT': config('DB_PORT', default='5432'),
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            # a file and not the in memory default, so tests running requests from
+            # several threads see the same locking as a real server
+            'TEST': {'NAME': config('SQLITE_TEST_PATH', default=str(BASE_DIR / 'test_db.sqlite3'))},
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': config('SQLITE_TIMEOUT_SECONDS', default=20, cast=int),
+            },
+        }
     }
-}
-'''
+
 SOCIAL_AUTH_JSONFIELD_ENABLED = True
 
+# The first hasher is used for new passwords, logins rehash passwords made with the others
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Password hashing runs on core.hashing.hasher_pool: 'process', 'thread', 'inline'
+# or the dotted path of an executor factory. Requests fail with 503 once
+# PASSWORD_HASHING_QUEUE_DEPTH hashes are waiting or running.
+PASSWORD_HASHING_EXECUTOR = config('PASSWORD_HASHING_EXECUTOR', default='process')
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=0, cast=int)
+PASSWORD_HASHING_QUEUE_DEPTH = config('PASSWORD_HASHING_QUEUE_DEPTH', default=64, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -184,16 +219,126 @@ JWT_SECRET = config('JWT_SECRET')
 JWT_ALGORITHM = 'HS256'
 JWT_ACCESS_EXP_DELTA_SECONDS = 3600
 JWT_REFRESH_EXP_DELTA_DAYS = 7
+ONE_TIME_TOKEN_EXP_MINUTES = 4
+
+# Users loaded by JWTAuthentication are cached so an authenticated request does not
+# have to query the user table. USER_CACHE_ALIAS can name one of CACHES to share
+# the cache between workers, a size or ttl of 0 turns the cache off.
+USER_CACHE_MAX_SIZE = config('USER_CACHE_MAX_SIZE', default=10000, cast=int)
+USER_CACHE_TTL_SECONDS = config('USER_CACHE_TTL_SECONDS', default=60, cast=int)
+USER_CACHE_ALIAS = config('USER_CACHE_ALIAS', default=None)
+
+# Join codes are looked up in this cache before the classroom table, see classrooms.codes.
+# Give it a cache shared by the workers in production, the default one is per process.
+CLASS_CODE_CACHE_ALIAS = config('CLASS_CODE_CACHE_ALIAS', default='default')
+CLASS_CODE_CACHE_TTL_SECONDS = config('CLASS_CODE_CACHE_TTL_SECONDS', default=24 * 3600, cast=int)
+
+# Grades posted at once to assignments.views.BulkGradeView and the rows per UPDATE
+GRADE_BULK_MAX_ITEMS = config('GRADE_BULK_MAX_ITEMS', default=5000, cast=int)
+GRADE_BULK_UPDATE_BATCH_SIZE = config('GRADE_BULK_UPDATE_BATCH_SIZE', default=500, cast=int)
+# Students read per query by the gradebook export, bounds the memory it uses
+GRADEBOOK_CHUNK_SIZE = config('GRADEBOOK_CHUNK_SIZE', default=2000, cast=int)
+
+# Attempts scored per numpy operation by quizzes.grading
+QUIZ_GRADING_CHUNK_SIZE = config('QUIZ_GRADING_CHUNK_SIZE', default=10000, cast=int)
+
+# Answers autosaved during a test are buffered in the cache QUIZ_AUTOSAVE_CACHE_ALIAS
+# names and written by quizzes.autosave.flush, on submit, from the flush_quiz_autosaves
+# command or every QUIZ_AUTOSAVE_FLUSH_SECONDS in the web process (0 turns that off).
+# The cache has to be shared by the workers and hold a buffer per attempt in progress,
+# a per process one (locmem) is refused by the system checks. Left empty, every
+# autosave is written through to the attempt.
+QUIZ_AUTOSAVE_CACHE_ALIAS = config('QUIZ_AUTOSAVE_CACHE_ALIAS', default='')
+QUIZ_AUTOSAVE_TTL_SECONDS = config('QUIZ_AUTOSAVE_TTL_SECONDS', default=6 * 3600, cast=int)
+QUIZ_AUTOSAVE_FLUSH_SECONDS = config('QUIZ_AUTOSAVE_FLUSH_SECONDS', default=30, cast=int)
+
+# Events pushed to the browsers over /api/notifications/stream/ (served by core/asgi.py)
+# go through this broadcast layer, the default one only reaches the connections of its
+# own process. A connection more than BROADCAST_QUEUE_SIZE events behind is closed,
+# idle ones get a comment every SSE_HEARTBEAT_SECONDS so proxies keep them open.
+BROADCAST_BACKEND = config('BROADCAST_BACKEND', default='core.broadcast.InProcessBroadcast')
+BROADCAST_QUEUE_SIZE = config('BROADCAST_QUEUE_SIZE', default=100, cast=int)
+SSE_HEARTBEAT_SECONDS = config('SSE_HEARTBEAT_SECONDS', default=25, cast=int)
+
+# The shuffled paper of every student is rendered into this cache when a test is
+# created, see quizzes.papers. Like the autosave cache it has to be shared and big
+# enough for a paper per student. A worker missing a paper waits up to
+# QUIZ_PAPER_LOCK_SECONDS for the one rendering it before doing it itself.
+QUIZ_PAPER_CACHE_ALIAS = config('QUIZ_PAPER_CACHE_ALIAS', default='default')
+QUIZ_PAPER_TTL_SECONDS = config('QUIZ_PAPER_TTL_SECONDS', default=7 * 24 * 3600, cast=int)
+QUIZ_PAPER_LOCK_SECONDS = config('QUIZ_PAPER_LOCK_SECONDS', default=5, cast=int)
+QUIZ_PAPER_PUBLISH_CHUNK_SIZE = config('QUIZ_PAPER_PUBLISH_CHUNK_SIZE', default=1000, cast=int)
+
+# Users whose dashboard counts are recomputed per upsert by dashboard.stats.rebuild,
+# after deletions and by `manage.py rebuild_dashboard_stats`
+DASHBOARD_REBUILD_CHUNK_SIZE = config('DASHBOARD_REBUILD_CHUNK_SIZE', default=1000, cast=int)
+
+# Bloom filter kept by every worker in front of the token blacklist,
+# see core.revocation for how it is filled and kept in sync. It is filled when
+# the server process starts unless REVOCATION_WARM_ON_START is off, then on first use.
+REVOCATION_WARM_ON_START = config('REVOCATION_WARM_ON_START', default=True, cast=bool)
+REVOCATION_FILTER_CAPACITY = config('REVOCATION_FILTER_CAPACITY', default=1000000, cast=int)
+REVOCATION_FILTER_ERROR_RATE = config('REVOCATION_FILTER_ERROR_RATE', default=0.001, cast=float)
+REVOCATION_SYNC_SECONDS = config('REVOCATION_SYNC_SECONDS', default=1, cast=float)
+
+# Expired rows are deleted by `manage.py purge_expired_tokens` in batches,
+# setting the interval runs the same purge on a thread inside each process.
+TOKEN_PURGE_BATCH_SIZE = config('TOKEN_PURGE_BATCH_SIZE', default=5000, cast=int)
+TOKEN_PURGE_PAUSE_SECONDS = config('TOKEN_PURGE_PAUSE_SECONDS', default=0.05, cast=float)
+TOKEN_PURGE_INTERVAL_SECONDS = config('TOKEN_PURGE_INTERVAL_SECONDS', default=0, cast=int)
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = '/static/'
-MEDIA_URL = '/media/'
+# media files are served by core.media.MediaView, which checks who may read them
+MEDIA_URL = config('MEDIA_URL', default='/api/media/')
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# After the access check MediaView hands the file to the web server: 'x-accel-redirect'
+# for nginx (an internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT)
+# or 'x-sendfile' for apache. Left empty it sends the file itself, with Range support.
+# Urls of files that are not public are signed for MEDIA_URL_EXPIRE_SECONDS.
+MEDIA_SENDFILE = config('MEDIA_SENDFILE', default='')
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+MEDIA_URL_EXPIRE_SECONDS = config('MEDIA_URL_EXPIRE_SECONDS', default=6 * 3600, cast=int)
+
+# Uploads are stored by content hash (core.storage), files without references are
+# deleted by `manage.py gc_media` once unreferenced for MEDIA_GC_GRACE_SECONDS.
+# Files found without a row are looked up MEDIA_GC_BATCH_SIZE names per query.
+MEDIA_GC_GRACE_SECONDS = config('MEDIA_GC_GRACE_SECONDS', default=3600, cast=int)
+MEDIA_GC_BATCH_SIZE = config('MEDIA_GC_BATCH_SIZE', default=1000, cast=int)
+
+# Lecture videos are uploaded in chunks through lectures.uploads, an upload left
+# idle for MEDIA_GC_GRACE_SECONDS expires. A request writing to an upload holds it
+# for LECTURE_UPLOAD_LEASE_SECONDS at a time, the lease of a worker that died lapses.
+LECTURE_UPLOAD_MAX_BYTES = config('LECTURE_UPLOAD_MAX_BYTES', default=2 * 1024 ** 3, cast=int)
+LECTURE_UPLOAD_LEASE_SECONDS = config('LECTURE_UPLOAD_LEASE_SECONDS', default=60, cast=int)
+
+# Uploaded lectures are transcoded to HLS by lectures.transcode with a local ffmpeg,
+# at most HLS_TRANSCODE_WORKERS at a time per process. Set HLS_TRANSCODE_EXECUTOR
+# to '' to leave it to `manage.py transcode_lectures` instead.
+# Renditions are (height, video kbps, audio kbps), the ones taller than the video are skipped.
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+FFPROBE_BINARY = config('FFPROBE_BINARY', default='ffprobe')
+HLS_TRANSCODE_EXECUTOR = config('HLS_TRANSCODE_EXECUTOR', default='thread')
+HLS_TRANSCODE_WORKERS = config('HLS_TRANSCODE_WORKERS', default=1, cast=int)
+HLS_RENDITIONS = [(360, 800, 96), (720, 2800, 128), (1080, 5000, 160)]
+HLS_SEGMENT_SECONDS = config('HLS_SEGMENT_SECONDS', default=6, cast=int)
+
+# Jobs deferred with core.tasks.background_tasks run after commit on this executor:
+# 'thread', 'inline' or the dotted path of an executor factory.
+BACKGROUND_TASKS_EXECUTOR = config('BACKGROUND_TASKS_EXECUTOR', default='thread')
+BACKGROUND_TASKS_WORKERS = config('BACKGROUND_TASKS_WORKERS', default=2, cast=int)
+
+# Uploaded profile pictures are re-encoded in the background into square copies of
+# these sizes (px) and formats, see core.images.
+PROFILE_PIC_SIZES = config('PROFILE_PIC_SIZES', default='48,128,512', cast=Csv(int))
+PROFILE_PIC_FORMATS = config('PROFILE_PIC_FORMATS', default='webp,jpeg', cast=Csv())
+PROFILE_PIC_QUALITY = config('PROFILE_PIC_QUALITY', default=80, cast=int)
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = config('EMAIL_PORT')
@@ -202,6 +347,14 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = 'E-classroom-API <dkz20041506@gmail.com>'
 
+# Emails are queued in core.models.EmailOutbox and sent by `manage.py send_queued_mail`,
+# a failed email is retried after EMAIL_OUTBOX_RETRY_SECONDS, doubling every attempt,
+# and given up on after EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_RETRY_SECONDS = config('EMAIL_OUTBOX_RETRY_SECONDS', default=60, cast=int)
+EMAIL_OUTBOX_LEASE_SECONDS = config('EMAIL_OUTBOX_LEASE_SECONDS', default=300, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
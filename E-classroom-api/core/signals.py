@@ -0,0 +1,82 @@
+from functools import partial
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from core.storage import media_storage
+from core.user_cache import user_cache
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drops the cached copy of a user whenever its row changes."""
+    user_cache.invalidate(instance.pk)
+
+
+# References to files of core.storage.media_storage are dropped when the row
+# holding them is deleted or points at another file.
+
+def media_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and field.storage is media_storage
+    ]
+
+
+def stored_name(value):
+    # a name loaded from the db or a file already saved, not an upload waiting to be saved
+    if isinstance(value, FieldFile):
+        return value.name if value._committed else ''
+    return value if isinstance(value, str) else ''
+
+
+def remember_media_names(sender, instance, **kwargs):
+    instance._media_names = {
+        field.attname: stored_name(instance.__dict__[field.attname])
+        for field in media_fields(sender) if field.attname in instance.__dict__
+    }
+
+
+def is_upload(value):
+    # a file assigned to the field, saved to the storage by this save
+    if isinstance(value, FieldFile):
+        return not value._committed
+    return isinstance(value, File)
+
+
+def remember_media_uploads(sender, instance, **kwargs):
+    # each upload adds a reference, even when its content is the one already held
+    instance._media_uploads = {
+        field.attname for field in media_fields(sender) if is_upload(instance.__dict__.get(field.attname))
+    }
+
+
+def release_replaced_media(sender, instance, **kwargs):
+    old_names = getattr(instance, '_media_names', {})
+    uploads = getattr(instance, '_media_uploads', set())
+    for attname, old_name in old_names.items():
+        if old_name and (old_name != getattr(instance, attname).name or attname in uploads):
+            transaction.on_commit(partial(media_storage.delete, old_name))
+    remember_media_names(sender, instance)
+
+
+def release_deleted_media(sender, instance, **kwargs):
+    for field in media_fields(sender):
+        name = getattr(instance, field.attname).name
+        if name:
+            transaction.on_commit(partial(media_storage.delete, name))
+
+
+def connect_media_references():
+    for model in apps.get_models():
+        if media_fields(model):
+            post_init.connect(remember_media_names, sender=model, dispatch_uid=f'media-init-{model._meta.label}')
+            pre_save.connect(remember_media_uploads, sender=model, dispatch_uid=f'media-pre-save-{model._meta.label}')
+            post_save.connect(release_replaced_media, sender=model, dispatch_uid=f'media-save-{model._meta.label}')
+            post_delete.connect(release_deleted_media, sender=model, dispatch_uid=f'media-delete-{model._meta.label}')
@@ -0,0 +1,131 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core import signals
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import JWTAuthentication
+from core.broadcast import OVERFLOW, get_broadcast
+from core.user_cache import user_cache
+
+
+class StreamError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class EventStreamRouter:
+    """
+    ASGI application in front of Django's (core/asgi.py) serving the server-sent event
+    streams of `routes`, {path: dotted path of `async def groups(user, params)`}
+    returning the broadcast groups the user listens to, or raising StreamError.
+
+    The streams don't go through Django's handler: it gives every request a thread
+    of its own for the sync code it calls, kept for as long as the request lasts,
+    which for streams held open by thousands of idle tabs means thousands of threads.
+    Here a connection is a coroutine and a queue. The user is authenticated with the
+    access token of the Authorization header, or of the `token` query parameter since
+    EventSource can't send headers.
+    """
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._handlers = {}
+
+    def handler(self, path):
+        if path not in self._handlers:
+            self._handlers[path] = import_string(self.routes[path])
+        return self._handlers[path]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.routes:
+            return await self.app(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await send_json(send, 405, {'detail': f'Method "{scope["method"]}" not allowed.'})
+        params = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode()).items()}
+        # the database is used like in a Django request, its connections closed at the end
+        await signals.request_started.asend(sender=self.__class__, scope=scope)
+        try:
+            user = await authenticate(scope, params)
+            groups = await self.handler(scope['path'])(user, params)
+        except StreamError as exc:
+            return await send_json(send, exc.status, {'detail': exc.message})
+        finally:
+            await signals.request_finished.asend(sender=self.__class__)
+        await stream(receive, send, groups, settings.SSE_HEARTBEAT_SECONDS)
+
+
+async def authenticate(scope, params):
+    headers = dict(scope['headers'])
+    authorization = headers.get(b'authorization', b'').decode()
+    token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else params.get('token')
+    if not token:
+        raise StreamError(401, 'Authentication credentials were not provided.')
+    try:
+        payload = JWTAuthentication().decode_token(token)
+    except AuthenticationFailed as exc:
+        raise StreamError(401, str(exc.detail))
+    user = await user_cache.aget(payload['user_id'])
+    if user is None:
+        raise StreamError(401, 'User not found')
+    return user
+
+
+async def send_json(send, status, data):
+    body = json.dumps(data).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(receive, send, groups, heartbeat):
+    """
+    Sends the messages of the groups as events until the client goes away, with a
+    comment every `heartbeat` seconds when idle. A slow client makes send wait (the
+    server applies flow control), its queue fills up meanwhile and it is cut off
+    with an overflow event.
+    """
+    broadcast = get_broadcast()
+    subscription = broadcast.subscribe(groups)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            # nginx would hold the events back in its buffer
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+        while True:
+            message = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({message, disconnected}, timeout=heartbeat,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if message not in done:
+                message.cancel()
+                if disconnected in done:
+                    return
+                await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                continue
+            message = message.result()
+            if message is OVERFLOW:
+                # too far behind, the client reconnects and reloads what it missed
+                await send({'type': 'http.response.body', 'body': b'event: overflow\ndata: {}\n\n'})
+                return
+            event = f"id: {message['id']}\nevent: {message['event']}\ndata: {message['data']}\n\n"
+            await send({'type': 'http.response.body', 'body': event.encode(), 'more_body': True})
+    except OSError:
+        # the client went away while we were sending
+        pass
+    finally:
+        broadcast.unsubscribe(subscription)
+        disconnected.cancel()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+# callables returning names of stored files referenced outside of FileFields,
+# e.g. the resized profile pictures kept in a JSONField, see `reference_source`
+reference_sources = []
+
+# the base name of a file stored by hash, <sha256>.<extension>
+BLOB_NAME = re.compile(r'^[0-9a-f]{64}(\.[0-9a-z]+)?$')
+
+
+def reference_source(func):
+    reference_sources.append(func)
+    return func
+
+
+def _blobs():
+    return apps.get_model('core', 'StoredBlob').objects
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the sha256 of its content, keeping the folder and the
+    extension of the name it was saved as: students/profile_pics/<sha256>.jpg.
+
+    The hash is computed while the upload is streamed to a temporary file next to its
+    final place. Saving content that is already stored only adds a reference to its
+    core.models.StoredBlob row and the temporary file is dropped, `delete` only removes
+    a reference. Files left without references are deleted by `manage.py gc_media`.
+    Files not saved through this storage (older uploads, the default profile picture)
+    are never deleted by it.
+    """
+    def get_available_name(self, name, max_length=None):
+        # the name is only known once the content is hashed, see _save
+        return name
+
+    def _save(self, name, content):
+        folder = posixpath.dirname(name)
+        directory = self.path(folder)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            return self.adopt(tmp_path, digest.hexdigest(), size, folder, os.path.splitext(name)[1])
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def adopt(self, tmp_path, sha256, size, folder, extension):
+        """
+        Adds a reference to the blob with this hash and returns its name. When it is not
+        stored yet tmp_path (a file inside this storage's location) is moved in place,
+        otherwise tmp_path is left for the caller to remove.
+        The file is moved before the transaction around the call commits, when that
+        rolls back the file is left without a row and collect_garbage removes it.
+        """
+        name = posixpath.join(folder, sha256 + extension.lower())
+        with transaction.atomic():
+            # the row lock keeps collect_garbage from removing the file while it is adopted
+            blob, created = _blobs().select_for_update().get_or_create(name=name, defaults={'size': size})
+            if not created:
+                _blobs().filter(pk=name).update(refs=F('refs') + 1, saves=F('saves') + 1, released_at=None)
+            path = self.path(name)
+            if not os.path.exists(path):
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, path)
+                # the grace period of collect_garbage counts from now, not from the upload's start
+                os.utime(path)
+        return name
+
+    def delete(self, name):
+        """Drops one reference, the file stays until gc_media finds it unreferenced."""
+        if name:
+            _blobs().filter(pk=name, refs__gt=0).update(refs=F('refs') - 1, released_at=timezone.now())
+
+    def count_references(self):
+        """Counts the names of stored files held by FileFields using this storage and by reference_sources."""
+        counts = Counter()
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.FileField) and field.storage is self:
+                    names = model._default_manager.exclude(**{field.attname: ''}).values_list(field.attname, flat=True)
+                    counts.update(name for name in names.iterator() if name)
+        for source in reference_sources:
+            counts.update(source())
+        return counts
+
+    def recount(self):
+        """
+        Sets every blob's refs to the number of references actually found, for when
+        references were changed without going through the model (queryset updates, raw sql).
+        Returns the number of blobs that were off.
+        """
+        counts = self.count_references()
+        fixed = 0
+        with transaction.atomic():
+            for blob in _blobs().select_for_update().iterator():
+                refs = counts.get(blob.name, 0)
+                if blob.refs != refs:
+                    blob.refs = refs
+                    blob.released_at = timezone.now() if refs == 0 else None
+                    blob.save(update_fields=['refs', 'released_at'])
+                    fixed += 1
+        return fixed
+
+    def collect_garbage(self, grace_seconds=None):
+        """
+        Deletes the blobs left without references for longer than grace_seconds,
+        files stored by hash that have no blob row (their transaction rolled back)
+        and temporary files of uploads that never finished.
+        The grace period covers files saved for a row that is not committed yet.
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.MEDIA_GC_GRACE_SECONDS
+        cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+        result = {'blobs': 0, 'bytes': 0, 'orphan_files': 0, 'partial_files': 0}
+
+        names = list(_blobs().filter(refs__lte=0, released_at__lte=cutoff).values_list('pk', flat=True))
+        for name in names:
+            with transaction.atomic():
+                blob = _blobs().select_for_update().filter(pk=name, refs__lte=0).first()
+                if blob is None:
+                    continue
+                super().delete(name)
+                blob.delete()
+            result['blobs'] += 1
+            result['bytes'] += blob.size
+
+        orphans = []
+        for root, _, files in os.walk(self.location):
+            for filename in files:
+                path = os.path.join(root, filename)
+                if os.path.getmtime(path) >= cutoff.timestamp():
+                    continue
+                if filename.startswith('.upload-') and filename.endswith('.part'):
+                    os.unlink(path)
+                    result['partial_files'] += 1
+                elif BLOB_NAME.match(filename):
+                    orphans.append(os.path.relpath(path, self.location).replace(os.sep, '/'))
+
+        size = settings.MEDIA_GC_BATCH_SIZE
+        for start in range(0, len(orphans), size):
+            names = orphans[start:start + size]
+            stored = set(_blobs().filter(pk__in=names).values_list('pk', flat=True))
+            for name in names:
+                if name not in stored and self._delete_orphan(name):
+                    result['orphan_files'] += 1
+        return result
+
+    def _delete_orphan(self, name):
+        with transaction.atomic():
+            # the row taken here makes an adopt of the same content wait until the file is gone
+            _, created = _blobs().select_for_update().get_or_create(name=name, defaults={'size': 0, 'refs': 0})
+            if not created:
+                return False
+            super().delete(name)
+            _blobs().filter(pk=name).delete()
+        return True
+
+    def stats(self):
+        totals = _blobs().aggregate(
+            blobs=Count('pk'),
+            stored_bytes=Sum('size'),
+            unreferenced=Count('pk', filter=Q(refs__lte=0)),
+            unreferenced_bytes=Sum('size', filter=Q(refs__lte=0)),
+            # every save after the first of the same content is a copy that was not written
+            bytes_saved=Sum(F('size') * (F('saves') - 1)),
+        )
+        return {key: value or 0 for key, value in totals.items()}
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    # fields take the callable so migrations don't depend on the storage's arguments
+    return media_storage
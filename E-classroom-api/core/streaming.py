@@ -0,0 +1,155 @@
+import csv
+import re
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+
+class _Sink:
+    """
+    Write only file for ZipFile. It can't seek, so zipfile writes every entry's sizes
+    after its data and needs nothing but what was written since the last drain.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(entries, compress=True, zip64=True):
+    """
+    Builds a zip archive as it is iterated, for StreamingHttpResponse. entries yields
+    (name, chunks) pairs, chunks an iterable of bytes that is consumed only when the
+    archive gets to it, so at most one chunk of one entry is held in memory.
+    Files that are already compressed (PDF, DOCX, ...) are better stored with compress=False.
+    zip64 lets entries grow past 2GB, their size isn't known when they are started,
+    it is left off for office files, which are never that big.
+    """
+    sink = _Sink()
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(sink, 'w', compression=method, allowZip64=True) as archive:
+        for name, chunks in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = method
+            with archive.open(info, 'w', force_zip64=zip64) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def read_chunks(f, chunk_size=64 * 1024):
+    """Reads an open file in chunks and closes it, for stream_zip."""
+    with f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+# what a spreadsheet reads as the start of a formula, cells starting with one
+# get a ' in front so a name chosen by a user stays text (formula injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# characters XML 1.0 does not allow, an xlsx holding one doesn't open
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def spreadsheet_text(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """Yields the csv lines of rows one by one, strings are made safe for spreadsheets."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([spreadsheet_text(value) for value in header])
+    for row in rows:
+        yield writer.writerow([spreadsheet_text(value) for value in row])
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(XML_ILLEGAL.sub('', spreadsheet_text(str(value))))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_sheet(header, rows):
+    yield ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>').encode()
+    if header:
+        yield ('<row>' + ''.join(_xlsx_cell(value) for value in header) + '</row>').encode()
+    batch = []
+    for row in rows:
+        batch.append('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>')
+        if len(batch) == 500:
+            yield ''.join(batch).encode()
+            batch = []
+    yield (''.join(batch) + '</sheetData></worksheet>').encode()
+
+
+def stream_xlsx(header, rows, sheet_name='Sheet1'):
+    """
+    Yields an xlsx workbook of a single sheet written row by row. Strings are inline
+    and there are no styles, which keeps it a one pass write any spreadsheet opens.
+    """
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+    entries = [(name, [content.encode()]) for name, content in XLSX_PARTS.items()]
+    entries.append(('xl/workbook.xml', [workbook.encode()]))
+    entries.append(('xl/worksheets/sheet1.xml', _xlsx_sheet(header, rows)))
+    return stream_zip(entries, zip64=False)
@@ -0,0 +1,98 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from core.hashing import InlineExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTasks:
+    """
+    Runs slow jobs (image processing and the like) off the request path.
+
+    A job is handed to the executor once the current transaction commits, so it never
+    sees rows that end up rolled back. BACKGROUND_TASKS_EXECUTOR picks where it runs:
+    'thread' (default, a pool of BACKGROUND_TASKS_WORKERS threads), 'inline' or the
+    dotted path of a callable returning an Executor, left empty jobs are not run in
+    this process at all. Jobs are not persisted, work skipped or lost
+    to a restart has to be picked up by the management command of the feature.
+    Features with long jobs get their own instance, named after other settings, so
+    they can't hold up the short ones.
+    """
+    def __init__(self, executor_setting='BACKGROUND_TASKS_EXECUTOR', workers_setting='BACKGROUND_TASKS_WORKERS'):
+        self.executor_setting = executor_setting
+        self.workers_setting = workers_setting
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _create_executor(self):
+        kind = getattr(settings, self.executor_setting)
+        if kind == 'thread':
+            return ThreadPoolExecutor(
+                max_workers=getattr(settings, self.workers_setting),
+                thread_name_prefix=self.executor_setting.lower(),
+            )
+        if kind == 'inline':
+            return InlineExecutor()
+        return import_string(kind)()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def defer(self, fn, *args, using=None):
+        """Runs fn(*args) in the background after the transaction on `using` commits."""
+        if not getattr(settings, self.executor_setting):
+            return
+        transaction.on_commit(lambda: self.submit(fn, *args), using=using)
+
+    def submit(self, fn, *args):
+        executor = self._get_executor()
+        with self._lock:
+            self.queued += 1
+        return executor.submit(self._run, fn, args, not isinstance(executor, InlineExecutor))
+
+    def _run(self, fn, args, own_thread):
+        try:
+            result = fn(*args)
+        except Exception:
+            logger.exception('background task %s failed', getattr(fn, '__name__', fn))
+            with self._lock:
+                self.queued -= 1
+                self.failed += 1
+            raise
+        finally:
+            if own_thread:
+                # connections are per thread, pool threads would keep theirs open forever
+                connections.close_all()
+        with self._lock:
+            self.queued -= 1
+            self.completed += 1
+        return result
+
+    def stats(self):
+        return {
+            'executor': getattr(settings, self.executor_setting),
+            'queued': self.queued,
+            'completed': self.completed,
+            'failed': self.failed,
+        }
+
+
+background_tasks = BackgroundTasks()
@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+import datetime
+import jwt
+
+from core.user_cache import user_cache
+
+ME_URL = reverse('user:me')
+
+def create_user(email='test@example.com', **params):
+    user = get_user_model().objects.create_user(
+        email=email,
+        username=params.get('username', 'Test Name'),
+        password=params.get('password', 'testpass123'),
+    )
+    user.is_active = True
+    user.save()
+    return user
+
+def access_token_for(user):
+    payload = {
+        'user_id': user.id,
+        'exp': timezone.now() + datetime.timedelta(seconds=settings.JWT_ACCESS_EXP_DELTA_SECONDS),
+        'iat': timezone.now()
+    }
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+@override_settings(USER_CACHE_MAX_SIZE=2, USER_CACHE_TTL_SECONDS=60, USER_CACHE_ALIAS=None)
+class JWTAuthenticationCacheTests(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access_token_for(self.user))
+
+    def test_user_loaded_once(self):
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(user_cache.stats()['hits'], 1)
+        self.assertEqual(user_cache.stats()['misses'], 1)
+
+    def test_user_save_invalidates_cache(self):
+        self.client.get(ME_URL)
+        self.user.username = 'changed name'
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['username'], 'changed name')
+        self.assertEqual(user_cache.stats()['misses'], 2)
+
+    def test_deleted_user_rejected(self):
+        self.client.get(ME_URL)
+        self.user.delete()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_is_bounded(self):
+        users = [create_user(email=f'user{i}@example.com') for i in range(3)]
+        for user in users:
+            user_cache.get(user.id)
+
+        self.assertEqual(user_cache.stats()['size'], 2)
+        with self.assertNumQueries(1):
+            user_cache.get(users[0].id)
+
+    @override_settings(USER_CACHE_TTL_SECONDS=0)
+    def test_cache_disabled(self):
+        self.client.get(ME_URL)
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
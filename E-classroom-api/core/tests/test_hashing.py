@@ -0,0 +1,73 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.hashing import HashingPoolBusy, PasswordHasherPool, hasher_pool
+
+TOKEN_URL = reverse('user:token')
+ASYNC_TOKEN_URL = reverse('user:async-token')
+
+
+class PasswordHasherPoolTests(TestCase):
+
+    @override_settings(PASSWORD_HASHING_EXECUTOR='thread', PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_DEPTH=1)
+    def test_full_queue_fails_fast(self):
+        pool = PasswordHasherPool()
+        release = threading.Event()
+        future = pool.submit(release.wait)
+
+        with self.assertRaises(HashingPoolBusy):
+            pool.submit(make_password, 'testpass123')
+
+        release.set()
+        future.result()
+        self.assertEqual(pool.stats()['rejected'], 1)
+        self.assertEqual(pool.stats()['queue_depth'], 0)
+        pool.submit(make_password, 'testpass123').result()
+        pool.shutdown()
+
+    @override_settings(PASSWORD_HASHING_EXECUTOR='inline')
+    def test_outdated_hash_is_replaced(self):
+        pool = PasswordHasherPool()
+        encoded = make_password('testpass123', hasher='pbkdf2_sha1')
+
+        matches, rehashed = pool.check_password('testpass123', encoded)
+
+        self.assertTrue(matches)
+        self.assertTrue(rehashed.startswith('pbkdf2_sha256$'))
+        self.assertEqual(pool.check_password('wrong', encoded), (False, None))
+        self.assertEqual(pool.stats()['completed'], 2)
+
+
+class PooledLoginTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        self.user.is_active = True
+        self.user.save()
+        self.client = APIClient()
+        self.payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+    def test_login_rehashes_outdated_password(self):
+        self.user.password = make_password('testpass123', hasher='pbkdf2_sha1')
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+    def test_busy_pool_returns_503(self):
+        with mock.patch.object(hasher_pool, 'submit', side_effect=HashingPoolBusy):
+            res = self.client.post(TOKEN_URL, self.payload)
+            async_res = self.client.post(ASYNC_TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(async_res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.mail import queue_email, send_batch
+from core.models import EmailOutbox
+
+CREATE_USER_URL = reverse('user:create-user')
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('relay down')
+
+
+class CountingBackend(BaseEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, email_messages):
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+class EmailOutboxTests(TestCase):
+
+    def test_registration_queues_activation_email(self):
+        payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'confirm_password': 'testpass123',
+            'username': 'Test Name',
+        }
+        res = APIClient().post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.to, ['test@example.com'])
+
+        call_command('send_queued_mail', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Activate your account')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, EmailOutbox.sent)
+
+    @override_settings(EMAIL_BACKEND='core.tests.test_mail.CountingBackend')
+    def test_batch_uses_one_connection(self):
+        CountingBackend.opened = 0
+        for i in range(5):
+            queue_email('Hello', 'body', [f'user{i}@example.com'])
+
+        result = send_batch(batch_size=3)
+
+        self.assertEqual(result, {'sent': 3, 'retried': 0, 'dead': 0})
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.pending).count(), 2)
+
+    @override_settings(EMAIL_BACKEND='core.tests.test_mail.FailingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_SECONDS=60)
+    def test_retry_with_backoff_then_dead_letter(self):
+        queued = queue_email('Hello', 'body', ['test@example.com'])
+
+        self.assertEqual(send_batch(), {'sent': 0, 'retried': 1, 'dead': 0})
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('relay down', queued.last_error)
+        self.assertGreater(queued.next_attempt_at, timezone.now() + timezone.timedelta(seconds=50))
+
+        # not due yet
+        self.assertEqual(send_batch(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_batch(), {'sent': 0, 'retried': 0, 'dead': 1})
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, EmailOutbox.dead)
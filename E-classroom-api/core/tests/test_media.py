@@ -0,0 +1,130 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Lecture, TokenFamily
+from core.storage import media_storage
+from core.tokens import create_access_token
+
+VIDEO = b'\x00\x00\x00\x18ftypmp42' + bytes(range(256)) * 40
+
+
+def media_path(name):
+    return reverse('media', args=[name])
+
+
+def read(response):
+    return b''.join(response.streaming_content)
+
+
+class MediaViewTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        self.lecture = Lecture.objects.create(
+            title='Intro', uploaded_by=self.user, video_size=len(VIDEO),
+            video=media_storage.save('lectures/videos/intro.mp4', ContentFile(VIDEO)),
+        )
+        self.url = media_path(self.lecture.video.name)
+        self.client = APIClient()
+        token = create_access_token(self.user, TokenFamily.objects.start(self.user).pk)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_lecture_video_needs_a_user(self):
+        res = APIClient().get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_signed_url_from_the_api(self):
+        res = self.client.get(reverse('lectures:lecture-detail', args=[self.lecture.pk]))
+        path = urlsplit(res.data['video']).path
+        self.assertTrue(path.startswith('/api/media/signed/'))
+
+        res = APIClient().get(path)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(read(res), VIDEO)
+        self.assertEqual(res['Content-Type'], 'video/mp4')
+
+        res = APIClient().get(path.replace('/signed/', '/signed/9'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_whole_file_with_strong_etag(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['ETag'], f'"{hashlib.sha256(VIDEO).hexdigest()}"')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(res['Content-Length']), len(VIDEO))
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_ranges(self):
+        size = len(VIDEO)
+        for header, first, last in (
+            ('bytes=0-99', 0, 99),
+            ('bytes=100-', 100, size - 1),
+            ('bytes=-500', size - 500, size - 1),
+            ('bytes=9000-99999', 9000, size - 1),
+        ):
+            res = self.client.get(self.url, HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT, header)
+            self.assertEqual(res['Content-Range'], f'bytes {first}-{last}/{size}')
+            self.assertEqual(int(res['Content-Length']), last - first + 1)
+            self.assertEqual(read(res), VIDEO[first:last + 1])
+
+    def test_range_past_the_end(self):
+        res = self.client.get(self.url, HTTP_RANGE=f'bytes={len(VIDEO)}-')
+
+        self.assertEqual(res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(VIDEO)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        res = self.client.get(self.url, HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"older"')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(read(res), VIDEO)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_hand_off_to_nginx(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'], '/protected-media/' + self.lecture.video.name)
+        self.assertEqual(res.content, b'')
+
+    def test_files_without_rule_or_outside_media(self):
+        media_storage.save('private/notes.pdf', ContentFile(b'notes'))
+
+        self.assertEqual(self.client.get(media_path('private/notes.pdf')).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(media_path('lectures/videos/../../etc/passwd')).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        partial = os.path.join('lectures/videos', '.upload-0.part')
+        media_storage.save(partial, ContentFile(b'x'))
+        self.assertEqual(self.client.get(media_path(partial)).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_profile_pics_are_public(self):
+        name = media_storage.save('students/profile_pics/me.jpg', ContentFile(b'jpeg'))
+
+        res = APIClient().get(media_path(name))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Cache-Control'].startswith('public'))
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import OneTimeToken
+from core.purge import purge_expired
+
+
+class OneTimeTokenTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+
+    def test_only_the_hash_is_stored(self):
+        token = OneTimeToken.objects.issue(self.user, OneTimeToken.activation)
+
+        stored = OneTimeToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.token_hash, token)
+        self.assertEqual(stored.token_hash, OneTimeToken.objects.hash(token))
+
+    def test_consume_once(self):
+        token = OneTimeToken.objects.issue(self.user, OneTimeToken.activation)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(OneTimeToken.objects.consume(token, OneTimeToken.activation), self.user.pk)
+        self.assertIsNone(OneTimeToken.objects.consume(token, OneTimeToken.activation))
+
+    def test_purpose_must_match(self):
+        token = OneTimeToken.objects.issue(self.user, OneTimeToken.activation)
+
+        self.assertIsNone(OneTimeToken.objects.consume(token, OneTimeToken.password_reset))
+        self.assertEqual(OneTimeToken.objects.consume(token, OneTimeToken.activation), self.user.pk)
+
+    def test_new_token_replaces_old_one(self):
+        old = OneTimeToken.objects.issue(self.user, OneTimeToken.password_reset)
+        new = OneTimeToken.objects.issue(self.user, OneTimeToken.password_reset)
+
+        self.assertEqual(OneTimeToken.objects.filter(user=self.user).count(), 1)
+        self.assertIsNone(OneTimeToken.objects.consume(old, OneTimeToken.password_reset))
+        self.assertEqual(OneTimeToken.objects.consume(new, OneTimeToken.password_reset), self.user.pk)
+
+    def test_expired_token_is_rejected_and_purged(self):
+        token = OneTimeToken.objects.issue(self.user, OneTimeToken.activation)
+        OneTimeToken.objects.update(expires_at=timezone.now() - timezone.timedelta(minutes=1))
+
+        self.assertIsNone(OneTimeToken.objects.consume(token, OneTimeToken.activation))
+        self.assertEqual(purge_expired(OneTimeToken, pause=0)['rows'], 1)
+        self.assertFalse(OneTimeToken.objects.exists())
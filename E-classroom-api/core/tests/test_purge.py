@@ -0,0 +1,60 @@
+import builtins
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import BlacklistedToken, TokenFamily
+from core.purge import purge_expired, sweeper
+
+
+@override_settings(TOKEN_PURGE_PAUSE_SECONDS=0)
+class PurgeExpiredTokensTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        now = timezone.now()
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(key=f'{i:032x}', user=self.user, expires_at=now - timezone.timedelta(hours=1)) for i in range(25)]
+            + [BlacklistedToken(key=f'{i:032x}', user=self.user, expires_at=now + timezone.timedelta(days=1)) for i in range(25, 30)]
+        )
+
+    def test_purge_in_batches(self):
+        result = purge_expired(BlacklistedToken, batch_size=10)
+
+        self.assertEqual(result['rows'], 25)
+        self.assertEqual(result['batches'], 3)
+        self.assertEqual(BlacklistedToken.objects.count(), 5)
+        self.assertFalse(BlacklistedToken.objects.filter(expires_at__lte=timezone.now()).exists())
+
+    def test_purge_command(self):
+        out = StringIO()
+        call_command('purge_expired_tokens', '--batch-size', '100', stdout=out)
+
+        self.assertIn('core.BlacklistedToken: purged 25 rows in 1 batches', out.getvalue())
+        self.assertEqual(BlacklistedToken.objects.count(), 5)
+
+    def test_sweeper_keeps_totals(self):
+        runs = sweeper.stats()['runs']
+        sweeper.sweep()
+
+        stats = sweeper.stats()
+        self.assertEqual(stats['runs'], runs + 1)
+        self.assertEqual(stats['last_run']['results'][0]['rows'], 25)
+
+    def test_row_refreshed_after_select_is_kept(self):
+        family = TokenFamily.objects.create(user=self.user, expires_at=timezone.now() - timezone.timedelta(minutes=1))
+
+        def refresh_after_select(rows):
+            pks = builtins.list(rows)
+            TokenFamily.objects.filter(pk=family.pk).update(expires_at=timezone.now() + timezone.timedelta(days=1))
+            return pks
+
+        with mock.patch('core.purge.list', create=True, side_effect=refresh_after_select):
+            result = purge_expired(TokenFamily)
+
+        self.assertEqual(result['rows'], 0)
+        self.assertTrue(TokenFamily.objects.filter(pk=family.pk).exists())
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+
+from core.models import StoredBlob
+from core.storage import media_storage
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_GC_GRACE_SECONDS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def test_same_content_is_stored_once(self):
+        first = media_storage.save('students/profile_pics/danish.jpg', ContentFile(b'avatar'))
+        second = media_storage.save('students/profile_pics/danish.JPG', ContentFile(b'avatar'))
+        other = media_storage.save('students/profile_pics/danish.jpg', ContentFile(b'another avatar'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^students/profile_pics/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, 'students/profile_pics'))),
+                         sorted([os.path.basename(first), os.path.basename(other)]))
+        self.assertEqual(StoredBlob.objects.get(pk=first).refs, 2)
+        self.assertEqual(media_storage.stats()['bytes_saved'], len(b'avatar'))
+
+    def test_file_is_collected_after_last_reference(self):
+        name = media_storage.save('files/a.pdf', ContentFile(b'notes'))
+        media_storage.save('files/b.pdf', ContentFile(b'notes'))
+
+        media_storage.delete(name)
+        self.assertEqual(media_storage.collect_garbage()['blobs'], 0)
+        self.assertTrue(media_storage.exists(name))
+
+        media_storage.delete(name)
+        self.assertEqual(media_storage.collect_garbage(), {'blobs': 1, 'bytes': 5, 'orphan_files': 0, 'partial_files': 0})
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_replaced_profile_pic_is_released(self):
+        user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile_pic = ContentFile(b'first', name='first.jpg')
+            user.save()
+        first = user.profile_pic.name
+
+        user = get_user_model().objects.get(pk=user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile_pic = ContentFile(b'second', name='second.jpg')
+            user.save()
+
+        self.assertEqual(StoredBlob.objects.get(pk=first).refs, 0)
+        self.assertEqual(StoredBlob.objects.get(pk=user.profile_pic.name).refs, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(StoredBlob.objects.filter(refs=0).count(), 2)
+
+    def test_uploading_the_same_picture_again_keeps_one_reference(self):
+        user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                user.profile_pic = ContentFile(b'avatar', name='avatar.jpg')
+                user.save()
+
+        self.assertEqual(StoredBlob.objects.get(pk=user.profile_pic.name).refs, 1)
+
+    def test_file_of_a_rolled_back_save_is_collected(self):
+        try:
+            with transaction.atomic():
+                name = media_storage.save('files/notes.pdf', ContentFile(b'notes'))
+                raise DatabaseError('the row holding it failed')
+        except DatabaseError:
+            pass
+        self.assertTrue(media_storage.exists(name))
+        self.assertFalse(StoredBlob.objects.exists())
+
+        self.assertEqual(media_storage.collect_garbage()['orphan_files'], 1)
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_gc_command_recounts(self):
+        user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        user.profile_pic = ContentFile(b'avatar', name='avatar.jpg')
+        user.save()
+        orphan = media_storage.save('files/orphan.pdf', ContentFile(b'orphan'))
+        out = StringIO()
+
+        call_command('gc_media', '--recount', stdout=out)
+
+        self.assertIn('1 files were off', out.getvalue())
+        self.assertIn('deleted 1 files (6 bytes)', out.getvalue())
+        self.assertFalse(media_storage.exists(orphan))
+        self.assertTrue(media_storage.exists(user.profile_pic.name))
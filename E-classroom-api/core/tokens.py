@@ -0,0 +1,62 @@
+import datetime
+import hashlib
+import uuid
+
+import jwt
+from django.conf import settings
+from django.utils import timezone
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+def _encode(user, token_type, lifetime, **claims):
+    now = timezone.now()
+    payload = {
+        'user_id': user.id,
+        'type': token_type,
+        'jti': uuid.uuid4().hex,
+        'exp': now + lifetime,
+        'iat': now,
+        **claims,
+    }
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+def create_access_token(user, family_id):
+    lifetime = datetime.timedelta(seconds=settings.JWT_ACCESS_EXP_DELTA_SECONDS)
+    return _encode(user, ACCESS, lifetime, fam=str(family_id))
+
+
+def create_refresh_token(user, family_id, generation):
+    lifetime = datetime.timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS)
+    return _encode(user, REFRESH, lifetime, fam=str(family_id), gen=generation)
+
+
+def create_token_pair(user, family_id, generation=0):
+    """
+    Access and refresh token of a login session (core.models.TokenFamily),
+    the refresh token can be used once, for the given generation only.
+    """
+    return {
+        'access_token': create_access_token(user, family_id),
+        'refresh_token': create_refresh_token(user, family_id, generation),
+    }
+
+
+def decode_token(token):
+    """Decodes and verifies a token, raises the jwt errors on failure."""
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+
+def revocation_key(payload, token):
+    """
+    Compact key a token without a family is revoked under in the blacklist.
+    Tokens carry a random jti, tokens issued before that are keyed by the whole token.
+    """
+    source = payload.get('jti') or token
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def token_expiry(payload):
+    return datetime.datetime.fromtimestamp(payload['exp'], tz=datetime.timezone.utc)
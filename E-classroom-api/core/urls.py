@@ -18,18 +18,19 @@ from django.contrib import admin
 from django.urls import include, path
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from django.conf.urls.static import static
-from django.conf import settings
+from core.media import MediaView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/schema", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="api-docs"),
-    path("api/user/", include("users.urls"))
-]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT,
-    )
\ No newline at end of file
+    path("api/user/", include("users.urls")),
+    path("api/lectures/", include("lectures.urls")),
+    path("api/classes/", include("classrooms.urls")),
+    path("api/assignments/", include("assignments.urls")),
+    path("api/tests/", include("quizzes.urls")),
+    path("api/notifications/", include("notifications.urls")),
+    path("api/dashboard/", include("dashboard.urls")),
+    path("api/media/signed/<str:token>/<path:name>", MediaView.as_view(), name="media-signed"),
+    path("api/media/<path:name>", MediaView.as_view(), name="media"),
+]
\ No newline at end of file
@@ -0,0 +1,153 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+
+class UserCache:
+    """
+    Bounded LRU + TTL cache of user rows used by JWTAuthentication.
+
+    By default every process keeps its own copy of the most recently seen users.
+    When USER_CACHE_ALIAS names a cache from settings.CACHES the users are stored
+    there instead so several workers share one copy.
+    Entries are dropped by the post_save/post_delete handlers in core.signals,
+    the TTL bounds how stale a user can get when it is changed with queryset.update()
+    or from another worker that does not share the cache.
+    """
+    key_prefix = 'auth:user:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return settings.USER_CACHE_MAX_SIZE
+
+    @property
+    def ttl(self):
+        return settings.USER_CACHE_TTL_SECONDS
+
+    @property
+    def shared_cache(self):
+        alias = settings.USER_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, user_id):
+        """Returns the user with the given id, loading it from the db on a miss."""
+        if not self.enabled:
+            return self._load(user_id)
+
+        shared = self.shared_cache
+        if shared is not None:
+            user = shared.get(self.key_prefix + str(user_id))
+        else:
+            user = self._local_lookup(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        generation = self._generation
+        user = self._load(user_id)
+        if user is not None:
+            if shared is not None:
+                shared.set(self.key_prefix + str(user.pk), user, self.ttl)
+            else:
+                self._local_store(user, generation)
+        return user
+
+    async def aget(self, user_id):
+        """Same as get for async code, uses the async ORM and cache methods."""
+        if not self.enabled:
+            return await self._aload(user_id)
+
+        shared = self.shared_cache
+        if shared is not None:
+            user = await shared.aget(self.key_prefix + str(user_id))
+        else:
+            user = self._local_lookup(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        generation = self._generation
+        user = await self._aload(user_id)
+        if user is not None:
+            if shared is not None:
+                await shared.aset(self.key_prefix + str(user.pk), user, self.ttl)
+            else:
+                self._local_store(user, generation)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+        shared = self.shared_cache
+        if shared is not None:
+            shared.delete(self.key_prefix + str(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'shared': settings.USER_CACHE_ALIAS,
+        }
+
+    def _load(self, user_id):
+        return get_user_model().objects.filter(id=user_id).first()
+
+    async def _aload(self, user_id):
+        return await get_user_model().objects.filter(id=user_id).afirst()
+
+    def _local_lookup(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # every request gets its own instance so changes made while handling
+        # one request never leak into another thread through the cache
+        return copy.copy(user)
+
+    def _local_store(self, user, generation):
+        with self._lock:
+            if generation != self._generation:
+                # the user (or another one) was saved while we were loading it
+                return
+            self._entries[user.pk] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._entries.move_to_end(user.pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+user_cache = UserCache()
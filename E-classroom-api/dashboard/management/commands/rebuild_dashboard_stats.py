@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from dashboard.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the dashboard counts of users from the classes, assignments and submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', type=int, help='ids of the users, all of them by default')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['users']:
+            users = users.filter(pk__in=options['users'])
+        size = settings.DASHBOARD_REBUILD_CHUNK_SIZE
+        chunk, total = [], 0
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=size):
+            chunk.append(user_id)
+            if len(chunk) == size:
+                rebuild(chunk)
+                total += len(chunk)
+                chunk = []
+        rebuild(chunk)
+        total += len(chunk)
+        self.stdout.write(f'{total} users rebuilt')
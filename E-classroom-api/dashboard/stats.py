@@ -0,0 +1,184 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, F, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    Assignment, Attempt, Classroom, Enrollment, NotificationState, Submission, Test, UserDashboardStats,
+)
+from core.tasks import background_tasks
+
+FIELDS = ['classes', 'pending_assignments']
+
+
+def add(users, **deltas):
+    """
+    Adds deltas to the counts of users, a list of ids or a subquery of them, in one
+    UPDATE. Users without counts yet are left out, theirs are built when first read.
+    """
+    UserDashboardStats.objects.filter(pk__in=users).update(
+        **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta != 0}
+    )
+
+
+def students_of(classroom_id):
+    return Enrollment.objects.filter(classroom=classroom_id).values('student')
+
+
+def tutor_of(classroom_id):
+    return Classroom.objects.filter(pk=classroom_id).values('tutor')
+
+
+def compute(user_ids):
+    """The counts of the users from the tables, five grouped queries whatever their number."""
+    counts = {user_id: dict.fromkeys(FIELDS, 0) for user_id in user_ids}
+    enrollments = Enrollment.objects.filter(student__in=user_ids).values('student')
+    queries = [
+        ('classes', 1, enrollments.annotate(n=Count('id'))),
+        ('classes', 1, Classroom.objects.filter(tutor__in=user_ids).values('tutor').annotate(n=Count('id'))),
+        ('pending_assignments', 1, enrollments.annotate(n=Count('classroom__assignments'))),
+        # what was handed in counts while the student is in the class
+        ('pending_assignments', -1, Submission.objects.filter(
+            student__in=user_ids, assignment__classroom__enrollments__student=F('student'),
+        ).values('student').annotate(n=Count('id'))),
+        ('pending_assignments', 1, Submission.objects.filter(
+            assignment__classroom__tutor__in=user_ids, grade__isnull=True,
+        ).values('assignment__classroom__tutor').annotate(n=Count('id'))),
+    ]
+    for field, sign, rows in queries:
+        for row in rows:
+            user_id, n = row.values()
+            counts[user_id][field] += sign * n
+    return counts
+
+
+def rebuild(user_ids):
+    """
+    Recomputes the counts of the users, DASHBOARD_REBUILD_CHUNK_SIZE of them per
+    upsert. Ids of users that no longer exist are skipped.
+    """
+    user_ids = list(user_ids)
+    size = settings.DASHBOARD_REBUILD_CHUNK_SIZE
+    for start in range(0, len(user_ids), size):
+        chunk = get_user_model().objects.filter(pk__in=user_ids[start:start + size]).values_list('pk', flat=True)
+        counts = compute(list(chunk))
+        UserDashboardStats.objects.bulk_create(
+            [UserDashboardStats(user_id=user_id, **values) for user_id, values in counts.items()],
+            update_conflicts=True, unique_fields=['user'], update_fields=FIELDS,
+        )
+
+
+def rebuild_class(classroom_id, students=None):
+    """Rebuilds the counts of the tutor of the classroom and of students, all of them by default."""
+    if students is None:
+        students = Enrollment.objects.filter(classroom=classroom_id).values_list('student', flat=True)
+    rebuild([*Classroom.objects.filter(pk=classroom_id).values_list('tutor', flat=True), *students])
+
+
+def upcoming_tests(user_id):
+    """
+    The tests still to come for the user, without a date or dated ahead: of the
+    classes they teach, or of the classes they are in and not submitted yet.
+    Tests leave the count as their date passes, so it is counted when read, from
+    the (classroom, date) index of the classes of the user.
+    """
+    enrolled = Enrollment.objects.filter(student=user_id).values('classroom')
+    classes = Classroom.objects.filter(Q(tutor=user_id) | Q(pk__in=enrolled)).values('pk')
+    submitted = Attempt.objects.filter(test=OuterRef('pk'), student=user_id, status=Attempt.submitted)
+    tests = Test.objects.filter(
+        Q(date__isnull=True) | Q(date__gt=timezone.now()), classroom__in=classes,
+    ).exclude(Exists(submitted))
+    return Coalesce(Subquery(tests.annotate(n=Func(F('pk'), function='COUNT')).values('n')), 0)
+
+
+def summary(user):
+    """
+    The dashboard of the user with their unread notifications, counted by
+    NotificationState, and their upcoming tests in the same primary key lookup.
+    Users without counts yet get them built first.
+    """
+    unread = NotificationState.objects.filter(user=OuterRef('pk')).values('unread_count')
+    rows = UserDashboardStats.objects.filter(pk=user.pk).annotate(
+        upcoming_tests=upcoming_tests(user.pk),
+        unread_notifications=Coalesce(Subquery(unread), 0),
+    ).values(*FIELDS, 'upcoming_tests', 'unread_notifications')
+    row = rows.first()
+    if row is None:
+        rebuild([user.pk])
+        row = rows.first()
+    return row
+
+
+@receiver(post_save, sender=Classroom)
+def classroom_created(sender, instance, created, **kwargs):
+    if created:
+        add([instance.tutor_id], classes=1)
+
+
+def count(queryset):
+    return Coalesce(Subquery(queryset.order_by().values('classroom').annotate(n=Count('id')).values('n')), 0)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_created(sender, instance, created, **kwargs):
+    # the assignments of the class are counted inside the UPDATE, a join stays two queries
+    if not created:
+        return
+    student_id = instance.student_id
+    assignments = Assignment.objects.filter(classroom=instance.classroom_id).exclude(
+        Exists(Submission.objects.filter(assignment=OuterRef('pk'), student=student_id)),
+    )
+    add([student_id], classes=1, pending_assignments=count(assignments))
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_created(sender, instance, created, **kwargs):
+    if created:
+        add(students_of(instance.classroom_id), pending_assignments=1)
+
+
+@receiver(pre_save, sender=Submission)
+def remember_grade(sender, instance, **kwargs):
+    # handing in again clears the grade, the submission is back on the tutor's pile
+    instance._was_ungraded = not instance._state.adding and Submission.objects.filter(
+        pk=instance.pk, grade__isnull=True,
+    ).exists()
+
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, created, **kwargs):
+    if created:
+        add(Enrollment.objects.filter(classroom__assignments=instance.assignment_id, student=instance.student_id)
+            .values('student'), pending_assignments=-1)
+    delta = (instance.grade is None) - getattr(instance, '_was_ungraded', False)
+    if delta:
+        add(Classroom.objects.filter(assignments=instance.assignment_id).values('tutor'), pending_assignments=delta)
+
+
+def from_classroom(origin):
+    return isinstance(origin, Classroom) or getattr(origin, 'model', None) is Classroom
+
+
+# Deletes are rare and cascade, the counts of the people concerned are rebuilt once
+# the deletion is committed rather than worked out row by row.
+
+@receiver(pre_delete, sender=Classroom)
+def classroom_deleted(sender, instance, **kwargs):
+    students = Enrollment.objects.filter(classroom=instance.pk).values_list('student', flat=True)
+    background_tasks.defer(rebuild, [instance.tutor_id, *students])
+
+
+@receiver(post_delete, sender=Assignment)
+def work_deleted(sender, instance, origin=None, **kwargs):
+    if not from_classroom(origin):
+        background_tasks.defer(rebuild_class, instance.classroom_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, origin=None, **kwargs):
+    # also when the student's account is deleted, taking their submissions with it
+    if not from_classroom(origin):
+        background_tasks.defer(rebuild_class, instance.classroom_id, [instance.student_id])
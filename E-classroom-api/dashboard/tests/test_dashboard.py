@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from assignments import grading
+from core.models import Assignment, Classroom, Enrollment, Submission, Test, UserDashboardStats
+from dashboard import stats
+from notifications import inbox
+
+DASHBOARD_URL = reverse('dashboard:dashboard')
+QUESTIONS = [{'text': f'Question {i}', 'options': ['a', 'b'], 'correct_option': i % 2} for i in range(3)]
+
+
+def create_user(email, role=1):
+    return get_user_model().objects.create_user(email=email, username=email.split('@')[0], role=role, password='testpass123')
+
+
+@override_settings(BACKGROUND_TASKS_EXECUTOR='inline')
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        self.tutor = create_user('tutor@example.com', role=2)
+        self.student = create_user('student@example.com')
+        stats.rebuild([self.tutor.pk, self.student.pk])
+        self.classroom = Classroom.objects.create_with_code(name='Math 101', tutor=self.tutor)
+        self.homework = Assignment.objects.create(classroom=self.classroom, title='Homework 1', max_points=20)
+        self.client = APIClient()
+
+    def counts(self, user):
+        return {field: getattr(UserDashboardStats.objects.get(pk=user.pk), field) for field in stats.FIELDS}
+
+    def assertUpToDate(self, user, **expected):
+        self.assertEqual(self.counts(user), {**dict.fromkeys(stats.FIELDS, 0), **expected})
+        self.assertEqual(self.counts(user), stats.compute([user.pk])[user.pk])
+
+    def upcoming(self, user):
+        return stats.summary(user)['upcoming_tests']
+
+    def create_test(self, **fields):
+        self.client.force_authenticate(user=self.tutor)
+        res = self.client.post(reverse('quizzes:test-list'), {
+            'classroom': self.classroom.pk, 'title': 'Quiz', 'questions': QUESTIONS, **fields,
+        }, format='json')
+        return Test.objects.get(pk=res.data['id'])
+
+    def test_counts_follow_the_writes(self):
+        self.assertTrue(Enrollment.objects.join(self.classroom.pk, self.student.pk))
+        self.assertUpToDate(self.student, classes=1, pending_assignments=1)
+
+        Assignment.objects.create(classroom=self.classroom, title='Homework 2')
+        self.assertUpToDate(self.student, classes=1, pending_assignments=2)
+        self.assertUpToDate(self.tutor, classes=1)
+
+        submission = Submission.objects.create(assignment=self.homework, student=self.student, file='assignments/submissions/1.pdf')
+        self.assertUpToDate(self.student, classes=1, pending_assignments=1)
+        self.assertUpToDate(self.tutor, classes=1, pending_assignments=1)
+
+        grading.grade(self.homework, [{'submission': submission.pk, 'grade': 15}])
+        self.assertUpToDate(self.tutor, classes=1)
+
+        # handing in again clears the grade
+        submission.refresh_from_db()
+        submission.grade = None
+        submission.save()
+        self.assertUpToDate(self.tutor, classes=1, pending_assignments=1)
+
+    def test_joining_counts_what_is_left_to_do(self):
+        other = create_user('other@example.com')
+        Enrollment.objects.create(classroom=self.classroom, student=other)
+        Submission.objects.create(assignment=self.homework, student=other, file='assignments/submissions/2.pdf')
+        Enrollment.objects.filter(student=other).delete()
+        stats.rebuild([other.pk])
+
+        Enrollment.objects.join(self.classroom.pk, other.pk)
+
+        self.assertUpToDate(other, classes=1)
+
+    def test_upcoming_tests_are_those_still_to_come(self):
+        Enrollment.objects.join(self.classroom.pk, self.student.pk)
+        self.create_test(date=timezone.now() - timedelta(days=1))
+        undated = self.create_test()
+        later = self.create_test(date=timezone.now() + timedelta(days=1))
+        self.assertEqual((self.upcoming(self.tutor), self.upcoming(self.student)), (2, 2))
+
+        self.client.force_authenticate(user=self.student)
+        self.client.post(reverse('quizzes:attempt', args=[undated.pk]))
+        res = self.client.post(reverse('quizzes:attempt-submit', args=[undated.pk]), {'answers': [0, 1, 0]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((self.upcoming(self.tutor), self.upcoming(self.student)), (2, 1))
+
+        # its date passes
+        Test.objects.filter(pk=later.pk).update(date=timezone.now() - timedelta(hours=1))
+        self.assertEqual((self.upcoming(self.tutor), self.upcoming(self.student)), (1, 0))
+
+    def test_deletions_rebuild_the_counts(self):
+        Enrollment.objects.join(self.classroom.pk, self.student.pk)
+        self.create_test()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.homework.delete()
+        self.assertUpToDate(self.student, classes=1)
+        self.assertEqual(self.upcoming(self.student), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.classroom.delete()
+        self.assertUpToDate(self.student)
+        self.assertUpToDate(self.tutor)
+        self.assertEqual(self.upcoming(self.student), 0)
+
+    def test_dashboard_is_one_query(self):
+        Enrollment.objects.join(self.classroom.pk, self.student.pk)
+        inbox.notify_users([self.student.pk], 'grade', 'Graded')
+        # notifies the class too
+        self.create_test()
+        self.client.force_authenticate(user=self.student)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'classes': 1, 'pending_assignments': 1, 'upcoming_tests': 1, 'unread_notifications': 2,
+        })
+
+    def test_counts_are_built_on_first_read(self):
+        UserDashboardStats.objects.all().delete()
+        self.client.force_authenticate(user=self.tutor)
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.data['classes'], 1)
+        self.assertEqual(res.data['unread_notifications'], 0)
+        self.assertTrue(UserDashboardStats.objects.filter(pk=self.tutor.pk).exists())
+
+    def test_rebuild_command(self):
+        # written in bulk, no signal was sent
+        Enrollment.objects.bulk_create([Enrollment(classroom=self.classroom, student=self.student)])
+        UserDashboardStats.objects.filter(pk=self.tutor.pk).update(classes=7)
+
+        out = StringIO()
+        call_command('rebuild_dashboard_stats', stdout=out)
+
+        self.assertIn('2 users rebuilt', out.getvalue())
+        self.assertUpToDate(self.student, classes=1, pending_assignments=1)
+        self.assertUpToDate(self.tutor, classes=1)
@@ -0,0 +1,19 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from . import stats
+
+
+@extend_schema(tags=["Dashboard"])
+class DashboardView(APIView):
+    """
+    The counts on the dashboard of the user: their classes, pending assignments,
+    upcoming tests and unread notifications. One query, a primary key lookup in the
+    counts kept by dashboard.stats with the upcoming tests counted alongside.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(stats.summary(request.user))
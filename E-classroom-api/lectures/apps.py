@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LecturesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'lectures'
+
+    def ready(self):
+        # register who can read lecture videos and renditions
+        from lectures import media, transcode  # noqa: F401
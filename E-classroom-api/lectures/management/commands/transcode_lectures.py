@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Lecture
+from lectures.transcode import transcode_lecture
+
+
+class Command(BaseCommand):
+    help = 'Transcodes the lectures still waiting for their HLS renditions, one after the other'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry', action='store_true',
+                            help='also redo failed lectures and ones left processing by a stopped worker, '
+                                 'only run it when no other transcoder is running')
+
+    def handle(self, *args, **options):
+        if options['retry']:
+            Lecture.objects.filter(transcode_status__in=[Lecture.processing, Lecture.failed]).update(
+                transcode_status=Lecture.pending,
+            )
+        pks = list(Lecture.objects.filter(transcode_status=Lecture.pending).order_by('pk').values_list('pk', flat=True))
+        for pk in pks:
+            transcode_lecture(pk)
+            lecture = Lecture.objects.get(pk=pk)
+            self.stdout.write(f'lecture {pk}: {lecture.get_transcode_status_display()}')
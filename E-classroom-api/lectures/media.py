@@ -0,0 +1,8 @@
+from core.media import media_access
+from core.models import Lecture
+
+
+@media_access('lectures/videos/')
+def lecture_video_access(user, name):
+    # every signed in user can see the lectures, like LectureListView
+    return user is not None and Lecture.objects.filter(video=name).exists()
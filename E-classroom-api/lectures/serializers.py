@@ -0,0 +1,81 @@
+import os
+
+from django.conf import settings
+from django.utils.translation import gettext as _
+from rest_framework import serializers
+
+from core.media import media_url
+from core.models import Lecture, UploadSession
+from .uploads import SIGNATURES
+
+
+class LectureSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for retrieving lectures, the video is uploaded through UploadSessionSerializer
+        video is a url signed for the requesting user, so it can go straight into a <video> tag
+        it is the mp4 that was uploaded until the HLS renditions are ready, then their master playlist,
+        video_type tells which one it is
+    """
+    video = serializers.SerializerMethodField()
+    video_type = serializers.SerializerMethodField()
+    poster = serializers.SerializerMethodField()
+    transcode_status = serializers.CharField(source='get_transcode_status_display')
+
+    class Meta:
+        model = Lecture
+        fields = ['id', 'title', 'description', 'video', 'video_type', 'poster', 'video_size',
+                  'transcode_status', 'transcode_progress', 'uploaded_by', 'created_at']
+        read_only_fields = fields
+
+    def get_video(self, obj):
+        name = obj.hls_playlist if obj.transcode_status == Lecture.ready else obj.video.name
+        return media_url(name, self.context.get('request'))
+
+    def get_video_type(self, obj):
+        return 'application/vnd.apple.mpegurl' if obj.transcode_status == Lecture.ready else 'video/mp4'
+
+    def get_poster(self, obj):
+        return media_url(obj.poster, self.context.get('request')) if obj.transcode_status == Lecture.ready else None
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Starts a resumable upload of a lecture video
+        Fields: filename and size in bytes of the video, offset tells how much of it was received
+
+    Validation:
+    -----------
+        the extension has to be one of the video types and the size at most LECTURE_UPLOAD_MAX_BYTES
+    """
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'expires_at']
+        read_only_fields = ['id', 'offset', 'expires_at']
+
+    def validate_filename(self, value):
+        if os.path.splitext(value)[1].lower() not in SIGNATURES:
+            msg = _('Unsupported file type, upload supported file type: ') + str(list(SIGNATURES))
+            raise serializers.ValidationError(msg)
+        return os.path.basename(value)
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError(_('The video is empty.'))
+        if value > settings.LECTURE_UPLOAD_MAX_BYTES:
+            msg = _('File size exceeds the maximum limit of {} bytes.').format(settings.LECTURE_UPLOAD_MAX_BYTES)
+            raise serializers.ValidationError(msg)
+        return value
+
+
+class FinalizeUploadSerializer(serializers.Serializer):
+    """
+    What it does:
+    -------------
+        Title and description of the lecture created once the upload is complete
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
@@ -0,0 +1,155 @@
+import hashlib
+import io
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import textwrap
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Lecture, TokenFamily
+from core.tokens import create_access_token
+from lectures.tests.test_uploads import VIDEO
+from lectures.transcode import transcode_lecture, transcode_tasks
+from lectures.uploads import finalize, start, write_chunk
+
+# stand-ins for ffprobe and ffmpeg, writing what the real ones would
+FFPROBE = textwrap.dedent('''
+    import json
+    print(json.dumps({'streams': [{'codec_type': 'video', 'height': 720}, {'codec_type': 'audio'}],
+                      'format': {'duration': '60.0'}}))
+''')
+FFMPEG = textwrap.dedent('''
+    import os, sys
+    args = sys.argv[1:]
+    if '-var_stream_map' not in args:
+        open(args[-1], 'wb').write(b'jpeg')
+        sys.exit(0)
+    names = [part.split('name:')[1] for part in args[args.index('-var_stream_map') + 1].split()]
+    out_dir = os.path.dirname(os.path.dirname(args[-1]))
+    for name in names:
+        with open(os.path.join(out_dir, name, 'index.m3u8'), 'w') as f:
+            f.write('#EXTM3U\\nsegment_00000.ts\\n')
+        open(os.path.join(out_dir, name, 'segment_00000.ts'), 'wb').write(b'ts ' + name.encode())
+    with open(os.path.join(out_dir, args[args.index('-master_pl_name') + 1]), 'w') as f:
+        f.write('#EXTM3U\\n' + ''.join(name + '/index.m3u8\\n' for name in names))
+    for us in (15000000, 30000000, 60000000):
+        print(f'out_time_us={us}', flush=True)
+''')
+
+
+def write_script(folder, name, source):
+    path = os.path.join(folder, name)
+    with open(path, 'w') as f:
+        f.write(f'#!{sys.executable}\n{source}')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+class TranscodeTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        bin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, bin_dir)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FFPROBE_BINARY=write_script(bin_dir, 'ffprobe', FFPROBE),
+            FFMPEG_BINARY=write_script(bin_dir, 'ffmpeg', FFMPEG),
+            HLS_TRANSCODE_EXECUTOR='inline',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(transcode_tasks.shutdown)
+
+        self.tutor = get_user_model().objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + create_access_token(self.tutor, TokenFamily.objects.start(self.tutor).pk))
+
+    def upload(self):
+        session = start(self.tutor, 'lecture.mp4', len(VIDEO))
+        write_chunk(session, 0, io.BytesIO(VIDEO))
+        with self.captureOnCommitCallbacks(execute=True):
+            lecture = finalize(session, title='Intro')
+        return Lecture.objects.get(pk=lecture.pk)
+
+    def test_finalized_upload_is_transcoded(self):
+        lecture = self.upload()
+
+        folder = f'lectures/hls/{hashlib.sha256(VIDEO).hexdigest()}'
+        self.assertEqual(lecture.transcode_status, Lecture.ready)
+        self.assertEqual(lecture.transcode_progress, 100)
+        self.assertEqual(lecture.hls_playlist, f'{folder}/master.m3u8')
+        self.assertEqual(lecture.poster, f'{folder}/poster.jpg')
+        # nothing taller than the video
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, folder))),
+                         ['360p', '720p', 'master.m3u8', 'poster.jpg'])
+
+    def test_api_serves_the_playlist_and_its_segments(self):
+        lecture = self.upload()
+
+        res = self.client.get(reverse('lectures:lecture-detail', args=[lecture.pk]))
+
+        self.assertEqual(res.data['video_type'], 'application/vnd.apple.mpegurl')
+        self.assertEqual(res.data['transcode_status'], 'ready')
+        playlist_url = res.data['video']
+        self.assertTrue(playlist_url.endswith('/master.m3u8'))
+
+        anonymous = APIClient()
+        res = anonymous.get(playlist_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/vnd.apple.mpegurl')
+        # the players resolve the renditions and segments against the playlist url
+        segment_url = playlist_url.rsplit('/', 1)[0] + '/720p/segment_00000.ts'
+        res = anonymous.get(segment_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), b'ts 720p')
+
+        res = anonymous.get(reverse('media', args=[lecture.hls_playlist]))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_mp4_is_served_until_transcoded(self):
+        with override_settings(HLS_TRANSCODE_EXECUTOR=''):
+            lecture = self.upload()
+
+        res = self.client.get(reverse('lectures:lecture-detail', args=[lecture.pk]))
+
+        self.assertEqual(res.data['transcode_status'], 'pending')
+        self.assertEqual(res.data['video_type'], 'video/mp4')
+        self.assertIsNone(res.data['poster'])
+
+    def test_failed_transcode(self):
+        with override_settings(FFMPEG_BINARY=shutil.which('false')):
+            lecture = self.upload()
+
+        self.assertEqual(lecture.transcode_status, Lecture.failed)
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'lectures/hls')))
+
+    def test_same_video_is_transcoded_once(self):
+        first = self.upload()
+        second = self.upload()
+
+        self.assertEqual(second.hls_playlist, first.hls_playlist)
+        # the first lecture still uses the renditions
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, first.hls_playlist)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, os.path.dirname(first.hls_playlist))))
+
+    def test_lecture_is_claimed_once(self):
+        lecture = self.upload()
+        Lecture.objects.filter(pk=lecture.pk).update(transcode_error='kept')
+
+        transcode_lecture(lecture.pk)
+
+        self.assertEqual(Lecture.objects.get(pk=lecture.pk).transcode_error, 'kept')
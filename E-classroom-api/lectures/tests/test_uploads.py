@@ -0,0 +1,194 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Lecture, StoredBlob, UploadSession
+from lectures import uploads
+from lectures.uploads import hashers, partial_path
+
+CREATE_URL = reverse('lectures:upload-create')
+
+# an mp4 starts with the size of its ftyp box followed by 'ftyp'
+VIDEO = b'\x00\x00\x00\x18ftypmp42' + os.urandom(300 * 1024)
+
+
+def upload_url(session_id):
+    return reverse('lectures:upload', args=[session_id])
+
+
+def finalize_url(session_id):
+    return reverse('lectures:upload-finalize', args=[session_id])
+
+
+class ResumableUploadTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, LECTURE_UPLOAD_MAX_BYTES=1024 * 1024)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.tutor = get_user_model().objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+
+    def start(self, filename='lecture.mp4', size=len(VIDEO)):
+        res = self.client.post(CREATE_URL, {'filename': filename, 'size': size}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res
+
+    def send(self, session_id, offset, data):
+        return self.client.patch(
+            upload_url(session_id), data, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_upload_in_chunks(self):
+        res = self.start()
+        session_id = res.data['id']
+        self.assertTrue(res['Location'].endswith(upload_url(session_id)))
+        self.assertEqual(res['Upload-Offset'], '0')
+
+        for offset in range(0, len(VIDEO), 100 * 1024):
+            res = self.send(session_id, offset, VIDEO[offset:offset + 100 * 1024])
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res['Upload-Offset'], str(len(VIDEO)))
+
+        res = self.client.post(finalize_url(session_id), {'title': 'Intro'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        lecture = Lecture.objects.get()
+        self.assertEqual(lecture.video.name, f'lectures/videos/{hashlib.sha256(VIDEO).hexdigest()}.mp4')
+        self.assertEqual(lecture.video_size, len(VIDEO))
+        with lecture.video.open('rb') as f:
+            self.assertEqual(f.read(), VIDEO)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'lectures/videos')), [os.path.basename(lecture.video.name)])
+
+    def test_resume_from_reported_offset(self):
+        session_id = self.start().data['id']
+        self.send(session_id, 0, VIDEO[:1000])
+
+        res = self.send(session_id, 0, VIDEO[:5000])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        res = self.client.head(upload_url(session_id))
+        self.assertEqual(res['Upload-Offset'], '1000')
+
+        # the worker that received the first chunk is gone, finalize hashes the file itself
+        hashers.clear()
+        self.send(session_id, 1000, VIDEO[1000:])
+        res = self.client.post(finalize_url(session_id), {'title': 'Intro'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Lecture.objects.get().video.name, f'lectures/videos/{hashlib.sha256(VIDEO).hexdigest()}.mp4')
+
+    def test_finalize_incomplete_upload(self):
+        session_id = self.start().data['id']
+        self.send(session_id, 0, VIDEO[:1000])
+
+        res = self.client.post(finalize_url(session_id), {'title': 'Intro'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Lecture.objects.exists())
+
+    def test_upload_is_finalized_once(self):
+        session_id = self.start().data['id']
+        self.send(session_id, 0, VIDEO)
+        # both requests loaded the upload before either finalized it
+        first, second = UploadSession.objects.get(), UploadSession.objects.get()
+
+        lecture = uploads.finalize(first, title='Intro')
+        with self.assertRaises(Http404):
+            uploads.finalize(second, title='Intro')
+
+        self.assertEqual(list(Lecture.objects.all()), [lecture])
+        self.assertEqual(StoredBlob.objects.get(pk=lecture.video.name).refs, 1)
+
+    def test_finalize_waits_for_the_writing_request(self):
+        session_id = self.start().data['id']
+        self.send(session_id, 0, VIDEO)
+        UploadSession.objects.filter(pk=session_id).update(writing_until=timezone.now() + timedelta(seconds=60))
+
+        res = self.client.post(finalize_url(session_id), {'title': 'Intro'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['detail'].code, 'upload_in_progress')
+        self.assertFalse(Lecture.objects.exists())
+
+    def test_rejects_what_is_not_a_video(self):
+        session_id = self.start().data['id']
+
+        res = self.send(session_id, 0, b'%PDF-1.7' + VIDEO[8:])
+
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_signature_can_span_requests(self):
+        session_id = self.start().data['id']
+
+        res = self.send(session_id, 0, VIDEO[:5])
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.send(session_id, 5, b'%PDF-1.7' + VIDEO[13:1000])
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        res = self.send(session_id, 5, VIDEO[5:])
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res['Upload-Offset'], str(len(VIDEO)))
+
+    def test_one_request_writes_at_a_time(self):
+        session_id = self.start().data['id']
+        UploadSession.objects.filter(pk=session_id).update(writing_until=timezone.now() + timedelta(seconds=60))
+
+        res = self.send(session_id, 0, VIDEO[:1000])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['detail'].code, 'upload_in_progress')
+
+        # the lease of a request that died lapses
+        UploadSession.objects.filter(pk=session_id).update(writing_until=timezone.now() - timedelta(seconds=1))
+        res = self.send(session_id, 0, VIDEO[:1000])
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(UploadSession.objects.get().writing_until)
+
+    def test_rejects_more_bytes_than_declared(self):
+        session_id = self.start(size=1000).data['id']
+
+        res = self.send(session_id, 0, VIDEO[:2000])
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_size_and_type_are_checked_upfront(self):
+        res = self.client.post(CREATE_URL, {'filename': 'lecture.mp4', 'size': 2 * 1024 * 1024}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(CREATE_URL, {'filename': 'lecture.exe', 'size': 1000}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancel_removes_partial_file(self):
+        session_id = self.start().data['id']
+        self.send(session_id, 0, VIDEO[:1000])
+        path = partial_path(UploadSession.objects.get())
+
+        res = self.client.delete(upload_url(session_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+
+    def test_only_tutors_upload(self):
+        student = get_user_model().objects.create_user(email='student@example.com', username='Student', password='testpass123')
+        self.client.force_authenticate(user=student)
+
+        res = self.client.post(CREATE_URL, {'filename': 'lecture.mp4', 'size': 1000}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core.media import content_hash, media_access
+from core.models import Lecture
+from core.storage import media_storage
+from core.tasks import BackgroundTasks
+
+logger = logging.getLogger(__name__)
+
+HLS_FOLDER = 'lectures/hls'
+MASTER_PLAYLIST = 'master.m3u8'
+POSTER = 'poster.jpg'
+
+transcode_tasks = BackgroundTasks('HLS_TRANSCODE_EXECUTOR', 'HLS_TRANSCODE_WORKERS')
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def rendition_folder(name):
+    # lectures/hls/<sha256 of the video>, the video is transcoded once whatever the lectures using it
+    return '/'.join(name.split('/')[:3])
+
+
+@media_access(HLS_FOLDER + '/', scope=rendition_folder)
+def rendition_access(user, name):
+    # one signature covers the playlists, segments and poster of a video
+    return user is not None and Lecture.objects.filter(hls_playlist__startswith=rendition_folder(name) + '/').exists()
+
+
+def probe(path):
+    """Returns the duration in seconds, the height and whether there is an audio stream."""
+    result = subprocess.run(
+        [settings.FFPROBE_BINARY, '-v', 'error', '-show_entries', 'stream=codec_type,height:format=duration',
+         '-of', 'json', path],
+        capture_output=True, text=True, timeout=120,
+    )
+    if result.returncode != 0:
+        raise TranscodeError(f'ffprobe failed: {result.stderr[-2000:]}')
+    info = json.loads(result.stdout)
+    streams = info.get('streams', [])
+    heights = [stream['height'] for stream in streams if stream.get('codec_type') == 'video' and stream.get('height')]
+    if not heights:
+        raise TranscodeError('no video stream')
+    duration = float(info.get('format', {}).get('duration') or 0)
+    return duration, heights[0], any(stream.get('codec_type') == 'audio' for stream in streams)
+
+
+def renditions_for(height):
+    """The renditions not taller than the video, at least the smallest one."""
+    renditions = sorted(settings.HLS_RENDITIONS)
+    return [rendition for rendition in renditions if rendition[0] <= height] or renditions[:1]
+
+
+def hls_command(source, out_dir, renditions, has_audio):
+    """
+    One ffmpeg run decoding the video once and encoding every rendition from it,
+    keyframes are forced on segment boundaries so players can switch between renditions.
+    """
+    count = len(renditions)
+    segment = settings.HLS_SEGMENT_SECONDS
+    filters = [f'[0:v]split={count}' + ''.join(f'[v{i}]' for i in range(count))]
+    filters += [f'[v{i}]scale=-2:{height}[v{i}out]' for i, (height, _, _) in enumerate(renditions)]
+
+    command = [settings.FFMPEG_BINARY, '-hide_banner', '-nostdin', '-y', '-i', source,
+               '-filter_complex', ';'.join(filters)]
+    stream_map = []
+    for i, (height, video_kbps, audio_kbps) in enumerate(renditions):
+        command += ['-map', f'[v{i}out]', f'-c:v:{i}', 'libx264', f'-b:v:{i}', f'{video_kbps}k',
+                    f'-maxrate:v:{i}', f'{video_kbps * 107 // 100}k', f'-bufsize:v:{i}', f'{video_kbps * 3 // 2}k']
+        if has_audio:
+            command += ['-map', 'a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', f'{audio_kbps}k', f'-ac:a:{i}', '2']
+            stream_map.append(f'v:{i},a:{i},name:{height}p')
+        else:
+            stream_map.append(f'v:{i},name:{height}p')
+    command += [
+        '-preset', 'veryfast', '-sc_threshold', '0', '-force_key_frames', f'expr:gte(t,n_forced*{segment})',
+        '-f', 'hls', '-hls_time', str(segment), '-hls_playlist_type', 'vod', '-hls_flags', 'independent_segments',
+        '-master_pl_name', MASTER_PLAYLIST, '-var_stream_map', ' '.join(stream_map),
+        '-hls_segment_filename', os.path.join(out_dir, '%v', 'segment_%05d.ts'),
+        '-progress', 'pipe:1', '-nostats',
+        os.path.join(out_dir, '%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def poster_command(source, out_path, duration, height):
+    # a frame a tenth into the video, the first one is often black
+    return [settings.FFMPEG_BINARY, '-hide_banner', '-nostdin', '-y', '-ss', f'{duration / 10:.2f}', '-i', source,
+            '-frames:v', '1', '-vf', f'scale=-2:{min(height, 720)}', '-q:v', '3', out_path]
+
+
+def run(command, duration=0, on_progress=None):
+    """Runs ffmpeg, calling on_progress with the percentage done from its -progress output."""
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'out_time_us' and value.isdigit() and duration and on_progress:
+                on_progress(min(99, int(int(value) / 1e6 / duration * 100)))
+        if process.wait() != 0:
+            stderr.seek(0)
+            raise TranscodeError(stderr.read()[-2000:].decode(errors='replace'))
+
+
+def render(lecture, on_progress=None):
+    """
+    Transcodes the lecture's video into lectures/hls/<sha256>/ unless it already is,
+    returns the names of the master playlist and the poster. The work is done in a
+    temporary folder renamed into place at the end, so a half written folder is never served.
+    """
+    folder = f'{HLS_FOLDER}/{content_hash(lecture.video.name) or f"lecture-{lecture.pk}"}'
+    names = (f'{folder}/{MASTER_PLAYLIST}', f'{folder}/{POSTER}')
+    final_dir = media_storage.path(folder)
+    if os.path.exists(os.path.join(final_dir, MASTER_PLAYLIST)):
+        return names
+
+    source = media_storage.path(lecture.video.name)
+    duration, height, has_audio = probe(source)
+    os.makedirs(media_storage.path(HLS_FOLDER), exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=media_storage.path(HLS_FOLDER), prefix='.work-')
+    try:
+        renditions = renditions_for(height)
+        for rendition_height, _, _ in renditions:
+            os.makedirs(os.path.join(work_dir, f'{rendition_height}p'))
+        run(hls_command(source, work_dir, renditions, has_audio), duration, on_progress)
+        run(poster_command(source, os.path.join(work_dir, POSTER), duration, height))
+        os.chmod(work_dir, 0o755)
+        try:
+            os.rename(work_dir, final_dir)
+        except OSError:
+            # the same video was transcoded for another lecture meanwhile
+            if not os.path.exists(os.path.join(final_dir, MASTER_PLAYLIST)):
+                raise
+    finally:
+        if os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+    return names
+
+
+def transcode_lecture(lecture_id):
+    """
+    Background job started when a lecture is created. The lecture is claimed by moving
+    it from pending to processing, so it is transcoded once even with several workers.
+    """
+    claimed = Lecture.objects.filter(pk=lecture_id, transcode_status=Lecture.pending).update(
+        transcode_status=Lecture.processing, transcode_progress=0, transcode_error='',
+    )
+    if not claimed:
+        return
+    lecture = Lecture.objects.get(pk=lecture_id)
+    progress = [0]
+
+    def on_progress(percent):
+        if percent > progress[0]:
+            progress[0] = percent
+            Lecture.objects.filter(pk=lecture_id).update(transcode_progress=percent)
+
+    try:
+        playlist, poster = render(lecture, on_progress)
+    except (TranscodeError, OSError, subprocess.SubprocessError, ValueError) as exc:
+        logger.exception('transcoding lecture %s failed', lecture_id)
+        Lecture.objects.filter(pk=lecture_id).update(transcode_status=Lecture.failed, transcode_error=str(exc)[-2000:])
+        return
+
+    Lecture.objects.filter(pk=lecture_id).update(
+        transcode_status=Lecture.ready, transcode_progress=100, hls_playlist=playlist, poster=poster,
+    )
+
+
+@receiver(post_delete, sender=Lecture)
+def remove_unused_renditions(sender, instance, **kwargs):
+    if not instance.hls_playlist:
+        return
+    folder = rendition_folder(instance.hls_playlist)
+
+    def remove():
+        if not Lecture.objects.filter(hls_playlist__startswith=folder + '/').exists():
+            shutil.rmtree(media_storage.path(folder), ignore_errors=True)
+    transaction.on_commit(remove)
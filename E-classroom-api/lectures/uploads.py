@@ -0,0 +1,267 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import Lecture, UploadSession
+from core.storage import media_storage
+from .transcode import transcode_lecture, transcode_tasks
+
+UPLOAD_TO = Lecture._meta.get_field('video').upload_to
+READ_SIZE = 1024 * 1024
+# bytes the signatures below look at
+SIGNATURE_SIZE = 12
+
+# what the first bytes of a file have to look like, by extension
+SIGNATURES = {
+    '.mp4': lambda head: head[4:8] == b'ftyp',
+    '.webm': lambda head: head[:4] == b'\x1a\x45\xdf\xa3',
+}
+
+
+class OffsetMismatch(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload-Offset does not match the offset of the upload.'
+    default_code = 'offset_mismatch'
+
+
+class UploadInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Another request is writing to this upload.'
+    default_code = 'upload_in_progress'
+
+
+class IncompleteUpload(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The upload is not complete yet.'
+    default_code = 'incomplete_upload'
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'More bytes were sent than the declared size of the upload.'
+    default_code = 'upload_too_large'
+
+
+class UnsupportedVideo(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = 'The file is not a video of the type its extension says.'
+    default_code = 'unsupported_video'
+
+
+class HasherCache:
+    """
+    sha256 state of the uploads written by this process, so the hash is computed
+    while the chunks arrive. An entry is only used when it was updated up to the
+    offset the next chunk starts at, a chunk handled by another worker makes
+    finalize hash the file again.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.rehashed = 0
+
+    def take(self, key, offset):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+        return hashlib.sha256() if offset == 0 else None
+
+    def put(self, key, offset, hasher):
+        with self._lock:
+            self._entries[key] = (offset, hasher)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+hashers = HasherCache()
+
+
+def extension(filename):
+    return os.path.splitext(filename)[1].lower()
+
+
+def partial_path(session):
+    return media_storage.path(f'{UPLOAD_TO}/.upload-{session.pk.hex}.part')
+
+
+def idle_expiry():
+    return timezone.now() + timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+
+
+def check_signature(filename, head):
+    if not SIGNATURES[extension(filename)](head):
+        raise UnsupportedVideo()
+
+
+def check_head(f, filename, written, chunk, head_size):
+    # the first bytes can come in several requests, they are checked once enough arrived
+    f.seek(0)
+    head = f.read(written) + chunk
+    f.seek(written)
+    if len(head) >= head_size:
+        check_signature(filename, head)
+
+
+def lease_expiry():
+    return timezone.now() + timedelta(seconds=settings.LECTURE_UPLOAD_LEASE_SECONDS)
+
+
+def claim(session, offset):
+    """
+    Takes the upload for a request writing at offset, one conditional UPDATE that
+    only succeeds when the offset matches and no other request holds a lease.
+    Returns the expiry of the lease.
+    """
+    lease = lease_expiry()
+    claimed = UploadSession.objects.filter(
+        Q(writing_until__isnull=True) | Q(writing_until__lt=timezone.now()), pk=session.pk, offset=offset,
+    ).update(writing_until=lease)
+    if claimed:
+        return lease
+    current = UploadSession.objects.filter(pk=session.pk).values_list('offset', flat=True).first()
+    if current is None:
+        raise Http404('Upload not found.')
+    if current != offset:
+        raise OffsetMismatch()
+    raise UploadInProgress()
+
+
+def renew(session, lease):
+    renewed = lease_expiry()
+    if not UploadSession.objects.filter(pk=session.pk, writing_until=lease).update(writing_until=renewed):
+        # the lease lapsed and another request took the upload
+        raise UploadInProgress()
+    return renewed
+
+
+def start(user, filename, size):
+    session = UploadSession.objects.create(user=user, filename=filename, size=size, expires_at=idle_expiry())
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'xb').close()
+    return session
+
+
+def write_chunk(session, offset, stream):
+    """
+    Writes the request body to the partial file at offset, which has to be where the
+    upload stands. Whatever arrived before an error or a dropped connection is kept,
+    so the client can ask for the offset and resume from there. Returns the new offset.
+    """
+    path = partial_path(session)
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        raise Http404('Upload not found.')
+
+    with f:
+        lease = claim(session, offset)
+        renew_at = time.monotonic() + settings.LECTURE_UPLOAD_LEASE_SECONDS / 2
+        # bytes past the offset are left over from a request that failed before recording them
+        f.truncate(offset)
+        f.seek(offset)
+        head_size = min(SIGNATURE_SIZE, session.size)
+        hasher = hashers.take(session.pk, offset)
+        received = 0
+        try:
+            while stream is not None:
+                chunk = stream.read(READ_SIZE)
+                if not chunk:
+                    break
+                if offset + received + len(chunk) > session.size:
+                    raise UploadTooLarge()
+                if offset + received < head_size:
+                    check_head(f, session.filename, offset + received, chunk, head_size)
+                if time.monotonic() > renew_at:
+                    lease = renew(session, lease)
+                    renew_at = time.monotonic() + settings.LECTURE_UPLOAD_LEASE_SECONDS / 2
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                received += len(chunk)
+        finally:
+            f.flush()
+            session.offset = offset + received
+            released = UploadSession.objects.filter(pk=session.pk, writing_until=lease).update(
+                offset=session.offset, writing_until=None, expires_at=idle_expiry(),
+            )
+            if released and hasher is not None:
+                hashers.put(session.pk, session.offset, hasher)
+    return session.offset
+
+
+def sha256_of(session):
+    hasher = hashers.take(session.pk, session.size)
+    if hasher is None:
+        hashers.rehashed += 1
+        hasher = hashlib.sha256()
+        with open(partial_path(session), 'rb') as f:
+            for chunk in iter(lambda: f.read(READ_SIZE), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def finalize(session, **fields):
+    """
+    Moves the complete file to its place in the media storage, without copying it,
+    creates the lecture and queues its transcoding.
+    The upload is claimed first by a conditional DELETE of its row, a second finalize
+    of the same upload (a retry, a double click) finds it gone and changes nothing.
+    """
+    if session.offset != session.size:
+        raise IncompleteUpload()
+    path = partial_path(session)
+    try:
+        with open(path, 'rb') as f:
+            check_signature(session.filename, f.read(SIGNATURE_SIZE))
+        digest = sha256_of(session)
+    except FileNotFoundError:
+        # moved in place by a finalize that ran first
+        raise Http404('Upload not found.')
+
+    with transaction.atomic():
+        claimed, _ = UploadSession.objects.filter(
+            Q(writing_until__isnull=True) | Q(writing_until__lt=timezone.now()), pk=session.pk, offset=session.size,
+        ).delete()
+        if not claimed:
+            current = UploadSession.objects.filter(pk=session.pk).values_list('offset', flat=True).first()
+            if current is None:
+                raise Http404('Upload not found.')
+            if current != session.size:
+                raise IncompleteUpload()
+            raise UploadInProgress()
+        name = media_storage.adopt(path, digest, session.size, UPLOAD_TO, extension(session.filename))
+        lecture = Lecture.objects.create(video=name, video_size=session.size, uploaded_by=session.user, **fields)
+        transcode_tasks.defer(transcode_lecture, lecture.pk)
+    if os.path.exists(path):
+        # the same video was already stored
+        os.unlink(path)
+    return lecture
+
+
+def cancel(session):
+    hashers.discard(session.pk)
+    if os.path.exists(partial_path(session)):
+        os.unlink(partial_path(session))
+    session.delete()
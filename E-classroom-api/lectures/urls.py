@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+app_name = 'lectures'
+
+urlpatterns = [
+    path('', views.LectureListView.as_view(), name='lecture-list'),
+    path('<int:pk>/', views.LectureDetailView.as_view(), name='lecture-detail'),
+    path('uploads/', views.UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', views.UploadSessionView.as_view(), name='upload'),
+    path('uploads/<uuid:pk>/finalize/', views.FinalizeUploadView.as_view(), name='upload-finalize'),
+]
@@ -0,0 +1,119 @@
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from core.authentication import IsTutor
+from core.models import Lecture, UploadSession
+from . import uploads
+from .serializers import FinalizeUploadSerializer, LectureSerializer, UploadSessionSerializer
+
+
+def upload_headers(session):
+    return {
+        'Upload-Offset': str(session.offset),
+        'Upload-Length': str(session.size),
+        'Cache-Control': 'no-store',
+    }
+
+
+def get_session(request, pk):
+    return get_object_or_404(UploadSession, pk=pk, user=request.user, expires_at__gt=timezone.now())
+
+
+@extend_schema(tags=["Lectures"])
+class LectureListView(generics.ListAPIView):
+    """
+    API for listing the lectures.
+    """
+    serializer_class = LectureSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Lecture.objects.order_by('-created_at')
+
+
+@extend_schema(tags=["Lectures"])
+class LectureDetailView(generics.RetrieveAPIView):
+    """
+    API for retrieving a lecture.
+    """
+    serializer_class = LectureSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Lecture.objects.all()
+
+
+@extend_schema(tags=["Lecture Uploads"])
+class UploadSessionCreateView(APIView):
+    """
+    Starts a resumable upload of a lecture video.
+    The video is then sent with PATCH requests to the returned Location, each one
+    carrying an Upload-Offset header and the next bytes of the file as body, and
+    turned into a lecture by POSTing its title to <Location>finalize/.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsTutor]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = uploads.start(request.user, **serializer.validated_data)
+
+        headers = upload_headers(session)
+        headers['Location'] = request.build_absolute_uri(f'{session.pk}/')
+        return Response(self.serializer_class(session).data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+@extend_schema(tags=["Lecture Uploads"])
+class UploadSessionView(APIView):
+    """
+    HEAD: returns how many bytes of the upload were received in the Upload-Offset header.
+    PATCH: writes the body (Content-Type application/offset+octet-stream) at Upload-Offset,
+        which has to match the offset of the upload, and returns the new offset.
+        The body is read as it arrives and written straight to the file, it is never
+        buffered in memory or in a temporary upload file.
+    DELETE: cancels the upload.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsTutor]
+
+    def get(self, request, pk):
+        session = get_session(request, pk)
+        return Response(self.serializer_class(session).data, headers=upload_headers(session))
+
+    def head(self, request, pk):
+        session = get_session(request, pk)
+        return Response(status=status.HTTP_200_OK, headers=upload_headers(session))
+
+    def patch(self, request, pk):
+        session = get_session(request, pk)
+        if request.content_type != 'application/offset+octet-stream':
+            return Response({'error': 'Content-Type must be application/offset+octet-stream'},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset header required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        uploads.write_chunk(session, offset, request.stream)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=upload_headers(session))
+
+    def delete(self, request, pk):
+        uploads.cancel(get_session(request, pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(tags=["Lecture Uploads"])
+class FinalizeUploadView(APIView):
+    """
+    Creates the lecture from a complete upload, returns it.
+    """
+    serializer_class = FinalizeUploadSerializer
+    permission_classes = [IsTutor]
+
+    def post(self, request, pk):
+        session = get_session(request, pk)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lecture = uploads.finalize(session, **serializer.validated_data)
+        return Response(LectureSerializer(lecture, context={'request': request}).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.models import Announcement, Assignment, Test
+from .inbox import notify_class
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_created(sender, instance, created, **kwargs):
+    if created:
+        notify_class(instance.classroom_id, 'assignment', f'New assignment: {instance.title}',
+                     data={'assignment': instance.pk})
+
+
+@receiver(post_save, sender=Test)
+def test_created(sender, instance, created, **kwargs):
+    if created:
+        notify_class(instance.classroom_id, 'test', f'New test: {instance.title}', data={'test': instance.pk})
+
+
+@receiver(post_save, sender=Announcement)
+def announcement_posted(sender, instance, created, **kwargs):
+    if created:
+        notify_class(instance.classroom_id, 'announcement', 'New announcement', message=instance.content[:200],
+                     data={'announcement': instance.pk})
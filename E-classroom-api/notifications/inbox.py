@@ -0,0 +1,114 @@
+import json
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core.broadcast import get_broadcast
+from core.models import Enrollment, Notification, NotificationState
+from .serializers import NotificationSerializer
+
+
+def push(group, notification):
+    """Pushes the notification to the open streams of the group once it is committed."""
+    # a notification that was just published is unread for everyone, encoded once for all the streams
+    data = NotificationSerializer(notification, context={'state': NotificationState()}).data
+    message = {'event': 'notification', 'id': notification.pk, 'data': json.dumps(data)}
+    transaction.on_commit(lambda: get_broadcast().publish(group, message))
+
+
+def notify_class(classroom_id, kind, title, message='', data=None):
+    """
+    Notifies the students of the classroom: one notification row and one statement
+    counting it as unread for all of them, instead of a row per student.
+    """
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            classroom_id=classroom_id, kind=kind, title=title, message=message, data=data or {},
+        )
+        NotificationState.objects.bump_class(classroom_id)
+        push(f'class:{classroom_id}', notification)
+    return notification
+
+
+def notify_users(user_ids, kind, title, message='', data=None, classroom_id=None):
+    """Notifies each of the users on their own, for events that are about them (a grade)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(recipient_id=user_id, classroom_id=classroom_id, kind=kind, title=title,
+                         message=message, data=data or {})
+            for user_id in user_ids
+        ])
+        NotificationState.objects.bump_users(user_ids)
+        for notification in notifications:
+            push(f'user:{notification.recipient_id}', notification)
+    return notifications
+
+
+def visible_to(user):
+    """
+    The notifications of the user: their own and those of the classes they are in,
+    found when read (fan-out on read). Class notifications from before the student
+    joined are left out, they were not counted as unread either.
+    The two kinds are found apart and UNIONed, the (recipient, id) and
+    (classroom, id) indexes serve each, so the cost follows the classes of the
+    user and not the size of the table.
+    """
+    member = Enrollment.objects.filter(
+        classroom=OuterRef('classroom'), student=user, joined_at__lte=OuterRef('created_at'),
+    )
+    own = Notification.objects.filter(recipient=user).values('pk')
+    of_classes = Notification.objects.filter(
+        Exists(member), classroom__in=Enrollment.objects.filter(student=user).values('classroom'),
+        recipient__isnull=True,
+    ).values('pk')
+    return Notification.objects.filter(pk__in=own.union(of_classes, all=True))
+
+
+def get_state(user):
+    """The read state of the user, unsaved and empty when they never had a notification."""
+    return NotificationState.objects.filter(user=user).first() or NotificationState(user=user)
+
+
+def locked_state(user):
+    NotificationState.objects.bulk_create([NotificationState(user=user)], ignore_conflicts=True)
+    return NotificationState.objects.select_for_update().get(user=user)
+
+
+def mark_all_read(user):
+    """Moves the watermark of the user past their latest notification."""
+    with transaction.atomic():
+        state = locked_state(user)
+        latest = visible_to(user).order_by('-id').values_list('pk', flat=True).first() or 0
+        state.read_until = max(state.read_until, latest)
+        state.read_ids = []
+        state.unread_count = 0
+        state.save()
+    return state
+
+
+def mark_read(user, ids):
+    """
+    Marks some notifications of the user read. Those above the watermark are kept
+    in read_ids, then the watermark moves up to just below the lowest notification
+    still unread and drops the ids it now covers, so read_ids stays as short as
+    the unread notifications are scattered.
+    """
+    with transaction.atomic():
+        state = locked_state(user)
+        newly_read = set(
+            visible_to(user).filter(pk__in=ids, pk__gt=state.read_until).values_list('pk', flat=True)
+        ) - set(state.read_ids)
+        if newly_read:
+            read_ids = set(state.read_ids) | newly_read
+            lowest_unread = (
+                visible_to(user).filter(pk__gt=state.read_until).exclude(pk__in=read_ids)
+                .order_by('pk').values_list('pk', flat=True).first()
+            )
+            state.read_until = max(read_ids) if lowest_unread is None else lowest_unread - 1
+            state.read_ids = sorted(pk for pk in read_ids if pk > state.read_until)
+            state.unread_count = max(0, state.unread_count - len(newly_read))
+            state.save()
+    return state
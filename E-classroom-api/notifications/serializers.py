@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+from core.models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for listing the notifications of the bell
+        read comes from the read state of the user, given as state in the context
+    """
+    read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'title', 'message', 'classroom', 'data', 'created_at', 'read']
+        read_only_fields = fields
+
+    def get_read(self, obj):
+        state = self.context['state']
+        if 'read_ids' not in self.context:
+            self.context['read_ids'] = set(state.read_ids)
+        return obj.pk <= state.read_until or obj.pk in self.context['read_ids']
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    What it does:
+    -------------
+        ids of the notifications to mark read, all of them when left out
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=500, required=False)
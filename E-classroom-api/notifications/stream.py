@@ -0,0 +1,20 @@
+from core.models import Enrollment
+from core.sse import StreamError
+
+
+async def notification_groups(user, params):
+    """
+    The groups of /api/notifications/stream/ (see core.sse): the notifications for the
+    user and those of their classes, the `classes` parameter (ids separated by commas)
+    narrows them down to some of the classes.
+    """
+    classes = {
+        classroom_id async for classroom_id
+        in Enrollment.objects.filter(student=user).values_list('classroom_id', flat=True)
+    }
+    if params.get('classes'):
+        try:
+            classes &= {int(classroom_id) for classroom_id in params['classes'].split(',')}
+        except ValueError:
+            raise StreamError(400, 'classes must be ids separated by commas')
+    return [f'user:{user.pk}'] + [f'class:{classroom_id}' for classroom_id in sorted(classes)]
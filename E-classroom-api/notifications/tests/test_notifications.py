@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Assignment, Classroom, Enrollment, Notification, NotificationState
+from notifications import inbox
+
+LIST_URL = reverse('notifications:notification-list')
+UNREAD_URL = reverse('notifications:notification-unread')
+READ_URL = reverse('notifications:notification-read')
+
+
+class NotificationTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.small = Classroom.objects.create_with_code(name='Small', tutor=self.tutor)
+        self.big = Classroom.objects.create_with_code(name='Big', tutor=self.tutor)
+        self.student = User.objects.create_user(email='student@example.com', username='Student', password='testpass123')
+        others = User.objects.bulk_create([
+            User(email=f's{i}@example.com', username=f's{i}', password='!') for i in range(40)
+        ])
+        Enrollment.objects.bulk_create(
+            [Enrollment(classroom=self.small, student=self.student)]
+            + [Enrollment(classroom=self.big, student=user) for user in [self.student] + others]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def writes(self, publish):
+        with CaptureQueriesContext(connection) as queries:
+            publish()
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+
+    def test_class_notification_is_stored_once(self):
+        small = self.writes(lambda: inbox.notify_class(self.small.pk, 'announcement', 'Hello'))
+        big = self.writes(lambda: inbox.notify_class(self.big.pk, 'announcement', 'Hello'))
+
+        # the notification and the unread counters, whatever the size of the class
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(big), 2)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(NotificationState.objects.get(user=self.student).unread_count, 2)
+        self.assertEqual(NotificationState.objects.filter(unread_count=1).count(), 40)
+
+    def test_listing_is_two_queries_whatever_the_class_size(self):
+        for i in range(25):
+            inbox.notify_class(self.big.pk if i % 2 else self.small.pk, 'announcement', f'News {i}')
+        inbox.notify_users([self.student.pk], 'grade', 'Graded')
+
+        with self.assertNumQueries(2):
+            res = self.client.get(LIST_URL)
+
+        self.assertEqual(res.data['unread_count'], 26)
+        self.assertEqual(len(res.data['results']), 20)
+        self.assertEqual(res.data['results'][0]['title'], 'Graded')
+        self.assertFalse(res.data['results'][0]['read'])
+
+        with self.assertNumQueries(2):
+            res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 6)
+        self.assertIsNone(res.data['next'])
+
+    def test_others_and_late_joiners_do_not_see_it(self):
+        inbox.notify_users([self.tutor.pk], 'submission', 'Handed in')
+        inbox.notify_class(self.small.pk, 'announcement', 'Before')
+        late = get_user_model().objects.create_user(email='late@example.com', username='Late', password='testpass123')
+        Enrollment.objects.join(self.small.pk, late.pk)
+        inbox.notify_class(self.small.pk, 'announcement', 'After')
+
+        self.client.force_authenticate(user=late)
+        res = self.client.get(LIST_URL)
+
+        self.assertEqual([n['title'] for n in res.data['results']], ['After'])
+        self.assertEqual(self.client.get(UNREAD_URL).data['unread_count'], 1)
+
+    def test_mark_read(self):
+        first = inbox.notify_class(self.small.pk, 'announcement', 'First')
+        second = inbox.notify_class(self.small.pk, 'announcement', 'Second')
+        inbox.notify_class(self.small.pk, 'announcement', 'Third')
+
+        res = self.client.post(READ_URL, {'ids': [second.pk, second.pk, 10 ** 6]}, format='json')
+        self.assertEqual(res.data['unread_count'], 2)
+        res = self.client.post(READ_URL, {'ids': [second.pk]}, format='json')
+        self.assertEqual(res.data['unread_count'], 2)
+
+        read = {n['id']: n['read'] for n in self.client.get(LIST_URL).data['results']}
+        self.assertEqual(read[second.pk], True)
+        self.assertEqual(read[first.pk], False)
+
+        res = self.client.post(READ_URL, {}, format='json')
+        self.assertEqual(res.data['unread_count'], 0)
+        self.assertTrue(all(n['read'] for n in self.client.get(LIST_URL).data['results']))
+
+        inbox.notify_class(self.small.pk, 'announcement', 'Fourth')
+        with self.assertNumQueries(1):
+            res = self.client.get(UNREAD_URL)
+        self.assertEqual(res.data['unread_count'], 1)
+
+    def test_reading_one_at_a_time_moves_the_watermark(self):
+        first, second, third = [inbox.notify_class(self.small.pk, 'announcement', title)
+                                for title in ('First', 'Second', 'Third')]
+
+        state = inbox.mark_read(self.student, [second.pk])
+        self.assertEqual((state.read_until, state.read_ids), (first.pk - 1, [second.pk]))
+
+        state = inbox.mark_read(self.student, [first.pk])
+        self.assertEqual((state.read_until, state.read_ids), (second.pk, []))
+
+        state = inbox.mark_read(self.student, [third.pk])
+        self.assertEqual((state.read_until, state.read_ids, state.unread_count), (third.pk, [], 0))
+
+    def test_new_assignment_notifies_the_class(self):
+        Assignment.objects.create(classroom=self.small, title='Homework 1')
+
+        res = self.client.get(LIST_URL)
+
+        self.assertEqual(res.data['results'][0]['kind'], 'assignment')
+        self.assertEqual(res.data['results'][0]['title'], 'New assignment: Homework 1')
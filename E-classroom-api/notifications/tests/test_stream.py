@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.asgi import application
+from core.broadcast import OVERFLOW, InProcessBroadcast, get_broadcast
+from core.models import Classroom, Enrollment, TokenFamily
+from core.tokens import create_access_token
+from notifications import inbox
+
+
+class BroadcastTests(SimpleTestCase):
+
+    def test_publish_from_another_thread(self):
+        broadcast = InProcessBroadcast()
+
+        async def listen():
+            subscription = broadcast.subscribe(['class:1', 'user:2'])
+            thread = threading.Thread(target=lambda: [broadcast.publish(group, group) for group in ('class:1', 'class:9', 'user:2')])
+            thread.start()
+            received = [await subscription.get(), await subscription.get()]
+            thread.join()
+            broadcast.unsubscribe(subscription)
+            return received
+
+        self.assertEqual(asyncio.run(listen()), ['class:1', 'user:2'])
+        self.assertEqual(broadcast.stats()['subscriptions'], 0)
+
+    @override_settings(BROADCAST_QUEUE_SIZE=3)
+    def test_slow_subscriber_is_cut_off(self):
+        broadcast = InProcessBroadcast()
+
+        async def listen():
+            subscription = broadcast.subscribe(['class:1'])
+            for i in range(5):
+                broadcast.publish('class:1', i)
+            await asyncio.sleep(0)
+            return await subscription.get(), subscription.queue.qsize()
+
+        self.assertEqual(asyncio.run(listen()), (OVERFLOW, 0))
+
+
+class StreamClient:
+    """Calls the ASGI application like a server, the response messages land in a queue."""
+    def __init__(self, query):
+        self.scope = {'type': 'http', 'method': 'GET', 'path': '/api/notifications/stream/', 'headers': [],
+                      'query_string': query.encode(), 'root_path': ''}
+        self.sent = asyncio.Queue()
+        self.gone = asyncio.Event()
+        self.task = asyncio.ensure_future(application(self.scope, self.receive, self.sent.put))
+
+    async def receive(self):
+        await self.gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def next(self):
+        return await asyncio.wait_for(self.sent.get(), 5)
+
+    async def disconnect(self):
+        self.gone.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=1)
+class NotificationStreamTests(TestCase):
+
+    def setUp(self):
+        # like Django's test client, the test transaction has to outlive the requests
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        User = get_user_model()
+        tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.student = User.objects.create_user(email='student@example.com', username='Student', password='testpass123')
+        self.classroom = Classroom.objects.create_with_code(name='React', tutor=tutor)
+        self.other = Classroom.objects.create_with_code(name='Vue', tutor=tutor)
+        Enrollment.objects.create(classroom=self.classroom, student=self.student)
+        self.token = create_access_token(self.student, TokenFamily.objects.start(self.student).pk)
+
+    async def open(self):
+        client = StreamClient(f'token={self.token}')
+        start = await client.next()
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual((await client.next())['body'], b'retry: 5000\n\n')
+        return client
+
+    async def test_notifications_of_the_classes_are_pushed(self):
+        client = await self.open()
+
+        def publish():
+            with self.captureOnCommitCallbacks(execute=True):
+                inbox.notify_class(self.other.pk, 'announcement', 'Not for you')
+                inbox.notify_class(self.classroom.pk, 'announcement', 'Exam moved')
+        await sync_to_async(publish)()
+
+        event = (await client.next())['body'].decode()
+        self.assertTrue(event.startswith('id: '))
+        self.assertIn('event: notification\n', event)
+        self.assertIn('"title": "Exam moved"', event)
+
+        await client.disconnect()
+        self.assertEqual(get_broadcast().stats()['subscriptions'], 0)
+
+    async def test_idle_stream_gets_heartbeats(self):
+        client = await self.open()
+
+        self.assertEqual((await client.next())['body'], b': ping\n\n')
+        await client.disconnect()
+
+    async def test_token_is_required(self):
+        for query in ('', 'token=nope'):
+            client = StreamClient(query)
+            self.assertEqual((await client.next())['status'], 401)
+            await client.disconnect()
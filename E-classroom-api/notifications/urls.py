@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', views.NotificationListView.as_view(), name='notification-list'),
+    path('unread/', views.UnreadCountView.as_view(), name='notification-unread'),
+    path('read/', views.MarkReadView.as_view(), name='notification-read'),
+]
@@ -0,0 +1,77 @@
+from rest_framework import generics, permissions
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from . import inbox
+from .serializers import MarkReadSerializer, NotificationSerializer
+
+
+class NotificationPagination(CursorPagination):
+    """Keyset pagination on the id, newest first, with the unread count of the user."""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['unread_count'] = self.unread_count
+        return response
+
+
+@extend_schema(tags=["Notifications"])
+class NotificationListView(generics.ListAPIView):
+    """
+    API for the notifications of the user, newest first. Two queries whatever the
+    size of their classes: the read state and the page.
+    """
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        self.state = inbox.get_state(request.user)
+        self.paginator.unread_count = self.state.unread_count
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return inbox.visible_to(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['state'] = self.state
+        return context
+
+
+@extend_schema(tags=["Notifications"])
+class UnreadCountView(APIView):
+    """
+    The number of unread notifications, for the badge of the bell. Read from the
+    counter of the user, nothing is counted.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': inbox.get_state(request.user).unread_count})
+
+
+@extend_schema(tags=["Notifications"])
+class MarkReadView(APIView):
+    """
+    Marks the notifications given by ids read, or all of them without ids.
+    Returns the unread count left.
+    """
+    serializer_class = MarkReadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get('ids')
+        if ids is None:
+            state = inbox.mark_all_read(request.user)
+        else:
+            state = inbox.mark_read(request.user, ids)
+        return Response({'unread_count': state.unread_count})
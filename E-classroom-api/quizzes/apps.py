@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class QuizzesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'quizzes'
+
+    def ready(self):
+        from quizzes import checks  # noqa: F401
+        from quizzes.autosave import flusher
+        flusher.start()
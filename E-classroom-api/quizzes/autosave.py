@@ -0,0 +1,259 @@
+import contextlib
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from core.models import Attempt, Test
+from .grading import UNANSWERED
+
+logger = logging.getLogger(__name__)
+
+key_prefix = 'quiz-autosave:'
+FLUSH_LOCK = key_prefix + 'flush-lock'
+# the attempts saved since the last flush: DIRTY_COUNT numbers the entries
+# dirty:<n>, one per attempt, the flush reads those past FLUSHED_UPTO and
+# announces in FLUSHING_UPTO how far it reads before it does
+DIRTY_COUNT = key_prefix + 'dirty-count'
+FLUSHING_UPTO = key_prefix + 'flushing-upto'
+FLUSHED_UPTO = key_prefix + 'flushed-upto'
+# times a save numbers its entry again when a flush read past it before it was written
+MARK_ATTEMPTS = 3
+
+# cache backends keeping their entries in the memory of each process, see checks.py
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class AutosaveBusy(Exception):
+    pass
+
+
+def buffering():
+    """Answers are buffered when QUIZ_AUTOSAVE_CACHE_ALIAS names a cache, else written through."""
+    return bool(settings.QUIZ_AUTOSAVE_CACHE_ALIAS)
+
+
+def autosave_cache():
+    return caches[settings.QUIZ_AUTOSAVE_CACHE_ALIAS]
+
+
+def buffer_key(attempt_id):
+    return f'{key_prefix}{attempt_id}'
+
+
+@contextlib.contextmanager
+def attempt_lock(attempt_id, wait=1.0):
+    """
+    Keeps the requests of one attempt (a double click, two tabs) from merging into
+    the buffer at the same time, cache.add only succeeds for one of them.
+    """
+    cache, key = autosave_cache(), buffer_key(attempt_id) + ':lock'
+    deadline = time.monotonic() + wait
+    while not cache.add(key, 1, timeout=5):
+        if time.monotonic() > deadline:
+            raise AutosaveBusy()
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def next_number(cache):
+    if cache.add(DIRTY_COUNT, 0, timeout=None):
+        # the counter starts (over), how far the flushes read means nothing anymore
+        cache.delete_many([FLUSHING_UPTO, FLUSHED_UPTO])
+    try:
+        return cache.incr(DIRTY_COUNT)
+    except ValueError:
+        # evicted in between
+        cache.add(DIRTY_COUNT, 0, timeout=None)
+        return cache.incr(DIRTY_COUNT)
+
+
+def mark_dirty(attempt_id):
+    """
+    Queues the attempt for the next flush, once however many times it is saved
+    before it. Called after the buffer is written, a flush clears the mark before
+    reading the buffers so a save it misses marks the attempt again.
+    The entry is numbered before it is written, a flush that announced it reads past
+    that number in between may have missed it, the entry is then numbered again.
+    """
+    cache = autosave_cache()
+    if not cache.add(buffer_key(attempt_id) + ':dirty', 1, settings.QUIZ_AUTOSAVE_TTL_SECONDS):
+        return
+    for _ in range(MARK_ATTEMPTS):
+        number = next_number(cache)
+        cache.set(f'{key_prefix}dirty:{number}', attempt_id, settings.QUIZ_AUTOSAVE_TTL_SECONDS)
+        if (cache.get(FLUSHING_UPTO) or 0) < number:
+            return
+
+
+def take_dirty(chunk_size):
+    """Yields chunks of the ids of the attempts saved since the last flush, clearing their marks."""
+    cache = autosave_cache()
+    upto = cache.get(DIRTY_COUNT) or 0
+    start = cache.get(FLUSHED_UPTO) or 0
+    if start > upto:
+        # the counter was lost and started over
+        start = 0
+    cache.set(FLUSHING_UPTO, upto, timeout=None)
+    for first in range(start + 1, upto + 1, chunk_size):
+        entries = cache.get_many([f'{key_prefix}dirty:{n}' for n in range(first, min(first + chunk_size, upto + 1))])
+        ids = sorted(set(entries.values()))
+        cache.delete_many([buffer_key(pk) + ':dirty' for pk in ids] + list(entries))
+        yield ids
+    cache.set(FLUSHED_UPTO, upto, timeout=None)
+
+
+def write_through(attempt_id, answers):
+    with transaction.atomic():
+        row = Attempt.objects.select_for_update(of=('self',)).filter(
+            pk=attempt_id, status=Attempt.in_progress,
+        ).values_list('answers', 'test__answer_key').first()
+        if row is None:
+            return
+        stored, key = row
+        merged = overlay(stored, len(key), answers)
+        if merged != bytes(stored):
+            Attempt.objects.filter(pk=attempt_id).update(answers=merged)
+
+
+def save(attempt_id, answers):
+    """
+    Buffers answers ({position: option or None}) of an attempt in the cache, the
+    last value of every question wins. Nothing is written to the database, flush
+    or the submission of the attempt does it.
+    Without QUIZ_AUTOSAVE_CACHE_ALIAS they are written to the attempt right away.
+    """
+    if not buffering():
+        write_through(attempt_id, answers)
+        return answers
+    cache, key = autosave_cache(), buffer_key(attempt_id)
+    with attempt_lock(attempt_id):
+        buffered = cache.get(key) or {}
+        buffered.update(answers)
+        cache.set(key, buffered, settings.QUIZ_AUTOSAVE_TTL_SECONDS)
+    mark_dirty(attempt_id)
+    return buffered
+
+
+def buffered(attempt_id):
+    if not buffering():
+        return {}
+    return autosave_cache().get(buffer_key(attempt_id)) or {}
+
+
+def take(attempt_id):
+    """Returns the buffered answers of the attempt and drops them, for its submission."""
+    if not buffering():
+        return {}
+    cache, key = autosave_cache(), buffer_key(attempt_id)
+    with attempt_lock(attempt_id):
+        buffered = cache.get(key) or {}
+        cache.delete(key)
+    return buffered
+
+
+def overlay(blob, count, answers):
+    """The stored answers of an attempt with the buffered ones applied, as stored."""
+    packed = np.full(count, UNANSWERED, dtype=np.int8)
+    stored = np.frombuffer(blob, dtype=np.int8)[:count]
+    packed[:len(stored)] = stored
+    for position, option in answers.items():
+        if 0 <= position < count:
+            packed[position] = UNANSWERED if option is None else option
+    return packed.tobytes()
+
+
+def flush(force=False, chunk_size=1000):
+    """
+    Writes the buffered answers of the attempts saved since the last flush to the
+    database, one bulk_update per chunk for the attempts whose answers changed, so
+    however many times a student clicked since the last flush it is at most one row
+    write. Only those attempts are read, found from the dirty entries save leaves in
+    the cache, whatever the number of attempts in progress.
+    The buffer is merged into what is stored and kept until the submission, a flush
+    is harmless to repeat and a lost cache only loses what changed since the last one.
+    Only one worker flushes per QUIZ_AUTOSAVE_FLUSH_SECONDS, unless force.
+    Returns the number of attempts written, None when another worker has the lock.
+    """
+    if not buffering():
+        return 0
+    cache = autosave_cache()
+    if not force and not cache.add(FLUSH_LOCK, 1, timeout=max(settings.QUIZ_AUTOSAVE_FLUSH_SECONDS, 1)):
+        return None
+
+    attempts = Attempt.objects.filter(status=Attempt.in_progress)
+    question_counts = {}
+    written = 0
+    for ids in take_dirty(chunk_size):
+        buffered = cache.get_many([buffer_key(pk) for pk in ids])
+        if not buffered:
+            continue
+        rows = list(attempts.filter(pk__in=ids).values_list('pk', 'test_id', 'answers'))
+        missing = {test_id for _, test_id, _ in rows} - question_counts.keys()
+        for test_id, key in Test.objects.filter(pk__in=missing).values_list('pk', 'answer_key'):
+            question_counts[test_id] = len(key)
+
+        changed = []
+        for pk, test_id, stored in rows:
+            answers = buffered.get(buffer_key(pk))
+            if answers:
+                merged = overlay(stored, question_counts[test_id], answers)
+                if merged != bytes(stored):
+                    changed.append(Attempt(pk=pk, answers=merged))
+        # filtered on the status, an attempt submitted meanwhile keeps its final answers
+        attempts.bulk_update(changed, ['answers'])
+        written += len(changed)
+    return written
+
+
+class Flusher:
+    """
+    Optional in-process flush, runs flush every QUIZ_AUTOSAVE_FLUSH_SECONDS on a
+    daemon thread. The flush lock in the cache keeps it to one worker per interval.
+    """
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.written = 0
+
+    def start(self):
+        if self._thread is not None or settings.QUIZ_AUTOSAVE_FLUSH_SECONDS <= 0 or not buffering():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='quiz-autosave-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        return {'runs': self.runs, 'written': self.written}
+
+    def _run(self):
+        while not self._stop.wait(settings.QUIZ_AUTOSAVE_FLUSH_SECONDS):
+            try:
+                written = flush()
+                if written is not None:
+                    self.runs += 1
+                    self.written += written
+            except Exception:
+                logger.exception('quiz autosave flush failed')
+            finally:
+                connection.close()
+
+
+flusher = Flusher()
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .autosave import PER_PROCESS_BACKENDS
+
+
+@register()
+def check_autosave_cache(app_configs, **kwargs):
+    """
+    The autosave buffers have to be in a cache all the workers share, one kept by
+    each process only shows a buffer to the worker that wrote it and drops the
+    oldest entries past MAX_ENTRIES, answers not flushed yet go with them.
+    """
+    alias = settings.QUIZ_AUTOSAVE_CACHE_ALIAS
+    if not alias:
+        return []
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend is None:
+        return [Error(f'QUIZ_AUTOSAVE_CACHE_ALIAS names {alias!r}, which is not in CACHES.', id='quizzes.E001')]
+    if backend in PER_PROCESS_BACKENDS:
+        return [Error(
+            f'QUIZ_AUTOSAVE_CACHE_ALIAS names {alias!r}, a {backend.rsplit(".", 1)[-1]} kept by each process.',
+            hint='Point it at a cache shared by the workers (redis, memcached, database) '
+                 'or leave it empty to write the answers through.',
+            id='quizzes.E002',
+        )]
+    return []
@@ -0,0 +1,123 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Attempt, Test
+from . import stats
+
+UNANSWERED = -1
+
+
+def compile_key(test):
+    """
+    Packs the correct options and points of the questions into the test, bumping
+    key_version when they changed. Returns whether they did.
+    """
+    rows = list(test.questions.order_by('position').values_list('correct_option', 'points'))
+    key = np.array([row[0] for row in rows], dtype=np.int8).tobytes()
+    points = np.array([row[1] for row in rows], dtype=np.int16).tobytes()
+    if key == bytes(test.answer_key) and points == bytes(test.question_points):
+        return False
+    Test.objects.filter(pk=test.pk).update(answer_key=key, question_points=points, key_version=F('key_version') + 1)
+    test.refresh_from_db(fields=['answer_key', 'question_points', 'key_version'])
+    return True
+
+
+def key_arrays(test):
+    key = np.frombuffer(test.answer_key, dtype=np.int8)
+    points = np.frombuffer(test.question_points, dtype=np.int16).astype(np.int64)
+    return key, points
+
+
+def pack_answers(answers, count):
+    """The int8 bytes stored in Attempt.answers for a list of chosen options, None when not answered."""
+    packed = np.full(count, UNANSWERED, dtype=np.int8)
+    for position, option in enumerate(answers[:count]):
+        if option is not None:
+            packed[position] = option
+    return packed.tobytes()
+
+
+def unpack_answers(blob, count):
+    row = np.frombuffer(blob, dtype=np.int8)[:count]
+    return [None if option == UNANSWERED else int(option) for option in row] + [None] * (count - len(row))
+
+
+def answers_matrix(blobs, count):
+    """
+    Stacks the answers of attempts into an (attempts, questions) int8 matrix. Answers
+    saved before questions were added or removed are padded or cut to the key.
+    """
+    blobs = [bytes(blob) for blob in blobs]
+    if all(len(blob) == count for blob in blobs):
+        return np.frombuffer(b''.join(blobs), dtype=np.int8).reshape(len(blobs), count)
+    matrix = np.full((len(blobs), count), UNANSWERED, dtype=np.int8)
+    for i, blob in enumerate(blobs):
+        row = np.frombuffer(blob, dtype=np.int8)[:count]
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def score(matrix, key, points):
+    """Scores every row of the answers matrix in one operation: the points of the answers matching the key."""
+    return (matrix == key) @ points
+
+
+def grade(test, attempt_ids=None, stale_only=False):
+    """
+    Scores the submitted attempts of the test, all of them or the given ones, against its
+    current key. They are read in chunks of QUIZ_GRADING_CHUNK_SIZE, each chunk is scored
+    with a single matrix operation and written back with an UPDATE per score, the
+    question stats are updated in the same transaction. stale_only skips the attempts
+    already graded against this key_version. Returns the number graded.
+    """
+    attempts = Attempt.objects.filter(test=test, status=Attempt.submitted)
+    if attempt_ids is not None:
+        attempts = attempts.filter(pk__in=attempt_ids)
+    if stale_only:
+        attempts = attempts.exclude(key_version=test.key_version)
+
+    # keyset chunks and not a cursor, the rows are written between two reads
+    chunk_size = settings.QUIZ_GRADING_CHUNK_SIZE
+    graded, last_pk = 0, 0
+    while True:
+        ids = list(attempts.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return graded
+        graded += _grade_chunk(test, ids)
+        last_pk = ids[-1]
+
+
+def _grade_chunk(test, ids):
+    with transaction.atomic():
+        # the stats lock orders the graders of the test, under it the key is the
+        # current one and what the attempts were graded against is settled
+        question_stats = stats.locked_stats(test)
+        key, points = key_arrays(test)
+        rows = list(
+            Attempt.objects.select_for_update().filter(pk__in=ids, status=Attempt.submitted)
+            .order_by('pk').values_list('pk', 'answers', 'key_version')
+        )
+        if not rows:
+            return 0
+        ids, blobs, versions = zip(*rows)
+        ids = np.array(ids)
+        matrix = answers_matrix(blobs, len(key))
+        scores = score(matrix, key, points)
+        # the attempts already graded against this key are in its stats
+        uncounted = np.array([version != test.key_version for version in versions])
+        # a test has few possible scores, one UPDATE ... WHERE id IN per score writes the
+        # chunk in a handful of statements where bulk_update would need a CASE per row
+        order = np.argsort(scores, kind='stable')
+        values, starts = np.unique(scores[order], return_index=True)
+        for value, group in zip(values.tolist(), np.split(ids[order], starts[1:])):
+            Attempt.objects.filter(pk__in=group.tolist()).update(score=value, key_version=test.key_version)
+        stats.accumulate(question_stats, key, matrix[uncounted], scores[uncounted])
+    return len(ids)
+
+
+def regrade(test_id):
+    """Background job run after the key of a test was corrected."""
+    test = Test.objects.get(pk=test_id)
+    return grade(test, stale_only=True)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.autosave import flush
+
+
+class Command(BaseCommand):
+    help = 'Writes the answers buffered by the test autosave to the database'
+
+    def handle(self, *args, **options):
+        written = flush(force=True)
+        self.stdout.write(f'wrote the answers of {written} attempts')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Test
+from quizzes.papers import publish
+
+
+class Command(BaseCommand):
+    help = 'Renders the shuffled papers of the students of tests into the cache, to run before they start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tests', nargs='+', type=int, help='ids of the tests')
+
+    def handle(self, *args, **options):
+        for test_id in Test.objects.filter(pk__in=options['tests']).order_by('pk').values_list('pk', flat=True):
+            self.stdout.write(f'test {test_id}: {publish(test_id)} papers')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Test
+from quizzes.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the question statistics of tests from their graded attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tests', nargs='*', type=int, help='ids of the tests, all of them by default')
+
+    def handle(self, *args, **options):
+        tests = Test.objects.order_by('pk')
+        if options['tests']:
+            tests = tests.filter(pk__in=options['tests'])
+        for test in tests.iterator():
+            rebuild(test)
+            self.stdout.write(f'test {test.pk}: rebuilt')
@@ -0,0 +1,168 @@
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Enrollment, Test
+
+key_prefix = 'quiz-paper:'
+
+
+def paper_cache():
+    return caches[settings.QUIZ_PAPER_CACHE_ALIAS]
+
+
+def questions_key(test):
+    return f'{key_prefix}{test.pk}:{test.paper_version}'
+
+
+def paper_key(test, student_id):
+    return f'{key_prefix}{test.pk}:{test.paper_version}:{student_id}'
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs one build per key at a time in the process, the callers asking for the same
+    key meanwhile wait for its result instead of building it again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.builds = 0
+
+    def do(self, key, build):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.builds += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = build()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+flights = SingleFlight()
+
+
+def cached(key, build):
+    """
+    The value of key in the paper cache, built and cached on a miss. Misses on the same
+    key are coalesced: in the process by SingleFlight, between workers by a lock in the
+    cache, the workers not holding it wait for the value to show up, up to
+    QUIZ_PAPER_LOCK_SECONDS, before building it themselves.
+    """
+    value = paper_cache().get(key)
+    if value is not None:
+        return value
+    return flights.do(key, lambda: _build_once(key, build))
+
+
+def _build_once(key, build):
+    cache, lock_key = paper_cache(), key + ':lock'
+    timeout = settings.QUIZ_PAPER_LOCK_SECONDS
+    deadline = time.monotonic() + timeout
+    locked = cache.add(lock_key, 1, timeout=timeout)
+    while not locked:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+        locked = cache.add(lock_key, 1, timeout=timeout)
+    try:
+        value = cache.get(key)
+        if value is None:
+            value = build()
+            cache.set(key, value, settings.QUIZ_PAPER_TTL_SECONDS)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def load_questions(test):
+    """What students see of the questions, in position order, without the correct options."""
+    return list(test.questions.order_by('position').values('position', 'text', 'options', 'points'))
+
+
+def render_paper(test, questions, student_id):
+    """
+    The paper of a student as JSON: the questions and their options shuffled, always
+    the same way for the student so reloading the test doesn't reorder it. Questions
+    keep their position and options their index, answers are given by those.
+    """
+    rng = random.Random(f'{test.pk}:{student_id}')
+    order = list(range(len(questions)))
+    rng.shuffle(order)
+    paper = []
+    for index in order:
+        question = questions[index]
+        options = list(enumerate(question['options']))
+        rng.shuffle(options)
+        paper.append({
+            'position': question['position'],
+            'text': question['text'],
+            'points': question['points'],
+            'options': [{'option': option, 'text': text} for option, text in options],
+        })
+    return json.dumps({
+        'test': test.pk, 'title': test.title, 'description': test.description, 'date': test.date,
+        'questions': paper,
+    }, cls=DjangoJSONEncoder).encode()
+
+
+def get_paper(test, student_id):
+    """The paper of the student from the cache, the miss path shares the questions loaded once."""
+    def build():
+        questions = cached(questions_key(test), lambda: load_questions(test))
+        return render_paper(test, questions, student_id)
+    return cached(paper_key(test, student_id), build)
+
+
+def publish(test_id):
+    """
+    Background job run when a test is created or its questions change: renders the
+    papers of every student of the class into the cache ahead of the start of the test.
+    Returns the number of papers.
+    """
+    test = Test.objects.filter(pk=test_id).first()
+    if test is None:
+        return 0
+    cache, ttl = paper_cache(), settings.QUIZ_PAPER_TTL_SECONDS
+    questions = load_questions(test)
+    cache.set(questions_key(test), questions, ttl)
+    students = Enrollment.objects.filter(classroom_id=test.classroom_id).values_list('student_id', flat=True)
+    papers, count = {}, 0
+    for student_id in students.iterator(chunk_size=settings.QUIZ_PAPER_PUBLISH_CHUNK_SIZE):
+        papers[paper_key(test, student_id)] = render_paper(test, questions, student_id)
+        if len(papers) >= settings.QUIZ_PAPER_PUBLISH_CHUNK_SIZE:
+            cache.set_many(papers, ttl)
+            count += len(papers)
+            papers = {}
+    cache.set_many(papers, ttl)
+    return count + len(papers)
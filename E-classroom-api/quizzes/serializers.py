@@ -0,0 +1,120 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from core.models import Attempt, Question, Test
+from core.tasks import background_tasks
+from . import grading, papers
+
+
+class QuestionSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for the questions of a test, correct_option is only shown to the tutor
+    """
+    options = serializers.ListField(child=serializers.CharField(max_length=500), min_length=2, max_length=10)
+
+    class Meta:
+        model = Question
+        fields = ['position', 'text', 'options', 'correct_option', 'points']
+        read_only_fields = ['position']
+
+    def validate(self, attrs):
+        options = attrs.get('options', getattr(self.instance, 'options', []))
+        correct_option = attrs.get('correct_option', getattr(self.instance, 'correct_option', None))
+        if correct_option is not None and correct_option >= len(options):
+            raise serializers.ValidationError({'correct_option': 'Must be the index of one of the options.'})
+        return attrs
+
+
+class TestSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for creating a test with its questions and retrieving it
+        the questions are numbered in the order they are given
+        the answer key is left out unless the context has show_key
+    """
+    questions = QuestionSerializer(many=True)
+
+    class Meta:
+        model = Test
+        fields = ['id', 'classroom', 'title', 'description', 'date', 'questions', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+    def validate_questions(self, questions):
+        if not questions:
+            raise serializers.ValidationError('A test needs questions.')
+        if len(questions) > 127:
+            raise serializers.ValidationError('A test has at most 127 questions.')
+        return questions
+
+    def create(self, validated_data):
+        questions = validated_data.pop('questions')
+        with transaction.atomic():
+            test = Test.objects.create(**validated_data)
+            Question.objects.bulk_create([
+                Question(test=test, position=position, **question) for position, question in enumerate(questions)
+            ])
+            grading.compile_key(test)
+            background_tasks.defer(papers.publish, test.pk)
+        return test
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if not self.context.get('show_key'):
+            for question in data['questions']:
+                del question['correct_option']
+        return data
+
+
+class AttemptSerializer(serializers.ModelSerializer):
+    """
+    What it does:
+    -------------
+        Used for a student's attempt at a test
+        answers is the chosen option of every question by position, null when not answered
+        score is there once the attempt is submitted
+    """
+    answers = serializers.SerializerMethodField()
+    status = serializers.CharField(source='get_status_display')
+
+    class Meta:
+        model = Attempt
+        fields = ['id', 'test', 'status', 'answers', 'score', 'started_at', 'submitted_at']
+        read_only_fields = fields
+
+    def get_answers(self, obj):
+        return grading.unpack_answers(obj.answers, len(obj.test.answer_key))
+
+
+class SubmitAttemptSerializer(serializers.Serializer):
+    """
+    What it does:
+    -------------
+        answers is optional, without it the autosaved answers are submitted
+    """
+    answers = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=9, allow_null=True),
+                                    max_length=127, required=False)
+
+
+class AutosaveSerializer(serializers.Serializer):
+    """
+    What it does:
+    -------------
+        Used to autosave answers while the test is taken
+        answers maps the position of the changed questions to the chosen option, null to clear it
+        e.g. {"answers": {"0": 2, "3": null}}
+    """
+    answers = serializers.DictField(child=serializers.IntegerField(min_value=0, max_value=9, allow_null=True),
+                                    allow_empty=False)
+
+    def validate_answers(self, answers):
+        count = self.context['question_count']
+        try:
+            positions = {int(position): option for position, option in answers.items()}
+        except ValueError:
+            raise serializers.ValidationError('Positions must be integers.')
+        if any(not 0 <= position < count for position in positions):
+            raise serializers.ValidationError(f'Positions go from 0 to {count - 1}.')
+        return positions
@@ -0,0 +1,133 @@
+import math
+
+import numpy as np
+from django.db import transaction
+
+from core.models import Attempt, QuestionStats
+
+MAX_OPTIONS = 10
+SUM_FIELDS = ['key_version', 'responses', 'correct', 'score_sum', 'score_square_sum', 'correct_score_sum',
+              'option_counts', 'unanswered']
+
+
+def reset(stats, key_version):
+    stats.key_version = key_version
+    stats.responses = stats.correct = stats.unanswered = 0
+    stats.score_sum = stats.score_square_sum = stats.correct_score_sum = 0
+    stats.option_counts = []
+
+
+def locked_stats(test):
+    """
+    The stats of the questions of the test in position order, locked until the end of
+    the transaction. Every grader of the test takes this lock first, so the key is
+    read again under it: test is refreshed with the current key and stats kept for
+    an older one start over. A grader holding an outdated test never resets the
+    stats of a newer key.
+    """
+    question_ids = list(test.questions.order_by('position').values_list('pk', flat=True))
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=pk, key_version=test.key_version) for pk in question_ids], ignore_conflicts=True,
+    )
+    by_question = {stats.question_id: stats for stats in
+                   QuestionStats.objects.select_for_update().filter(question_id__in=question_ids)}
+    test.refresh_from_db(fields=['answer_key', 'question_points', 'key_version'])
+    ordered = [by_question[pk] for pk in question_ids]
+    for stats in ordered:
+        if stats.key_version < test.key_version:
+            reset(stats, test.key_version)
+    return ordered
+
+
+def accumulate(stats, key, matrix, scores):
+    """
+    Adds graded attempts to stats, taken with locked_stats: matrix holds their
+    answers by question, scores their scores. Every sum is a column reduction of
+    the chunk, the questions are then written back in one bulk_update.
+    """
+    if not len(scores):
+        return
+    y = np.asarray(scores, dtype=np.int64)
+    correct = matrix == key
+    correct_counts = correct.sum(axis=0).tolist()
+    correct_score_sums = (correct.T @ y).tolist()
+    option_counts = (matrix[:, :, None] == np.arange(MAX_OPTIONS)).sum(axis=0).tolist()
+    unanswered = (matrix < 0).sum(axis=0).tolist()
+    responses, score_sum, score_square_sum = len(y), int(y.sum()), int((y * y).sum())
+
+    for i, question in enumerate(stats):
+        question.responses += responses
+        question.correct += correct_counts[i]
+        question.score_sum += score_sum
+        question.score_square_sum += score_square_sum
+        question.correct_score_sum += correct_score_sums[i]
+        question.unanswered += unanswered[i]
+        counts = question.option_counts + [0] * (MAX_OPTIONS - len(question.option_counts))
+        counts = [old + new for old, new in zip(counts, option_counts[i])]
+        while counts and not counts[-1]:
+            counts.pop()
+        question.option_counts = counts
+    QuestionStats.objects.bulk_update(stats, SUM_FIELDS)
+
+
+def rebuild(test, chunk_size=10000):
+    """
+    Recomputes the stats of the test from the attempts graded against its current key.
+    The stats stay locked meanwhile, so attempts graded at the same time wait for it
+    instead of being counted twice or not at all.
+    """
+    from .grading import answers_matrix, key_arrays
+
+    with transaction.atomic():
+        stats = locked_stats(test)
+        for question in stats:
+            reset(question, test.key_version)
+        QuestionStats.objects.bulk_update(stats, SUM_FIELDS)
+        key, _ = key_arrays(test)
+        attempts = Attempt.objects.filter(test=test, status=Attempt.submitted, key_version=test.key_version)
+        last_pk = 0
+        while True:
+            rows = list(attempts.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'answers', 'score')[:chunk_size])
+            if not rows:
+                break
+            _, blobs, scores = zip(*rows)
+            accumulate(stats, key, answers_matrix(blobs, len(key)), scores)
+            last_pk = rows[-1][0]
+
+
+def point_biserial(stats):
+    """Correlation between answering the question right and the score, None when it can't be told."""
+    n, n1 = stats.responses, stats.correct
+    n0 = n - n1
+    if not n1 or not n0:
+        return None
+    variance = stats.score_square_sum / n - (stats.score_sum / n) ** 2
+    if variance <= 0:
+        return None
+    mean1 = stats.correct_score_sum / n1
+    mean0 = (stats.score_sum - stats.correct_score_sum) / n0
+    return (mean1 - mean0) / math.sqrt(variance) * math.sqrt(n1 * n0) / n
+
+
+def item_analysis(test):
+    """
+    Difficulty (share of right answers), discrimination (point biserial) and option
+    distribution of every question, straight from the stored sums.
+    Stats kept for an older key count as empty, the attempts are being regraded.
+    """
+    results = []
+    for question in test.questions.select_related('stats').order_by('position'):
+        stats = getattr(question, 'stats', None)
+        if stats is None or stats.key_version != test.key_version:
+            stats = QuestionStats(question=question)
+        counts = stats.option_counts[:len(question.options)]
+        results.append({
+            'position': question.position,
+            'text': question.text,
+            'responses': stats.responses,
+            'difficulty': stats.correct / stats.responses if stats.responses else None,
+            'discrimination': point_biserial(stats),
+            'option_counts': counts + [0] * (len(question.options) - len(counts)),
+            'unanswered': stats.unanswered,
+        })
+    return results
@@ -0,0 +1,160 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.core import checks
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Attempt, Classroom, Enrollment, Test
+from quizzes import autosave, grading
+from quizzes.tests.test_grading import QUESTIONS
+
+
+def writes(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+
+@override_settings(QUIZ_AUTOSAVE_CACHE_ALIAS='default')
+class AutosaveTests(TestCase):
+
+    def setUp(self):
+        autosave.autosave_cache().clear()
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.classroom = Classroom.objects.create_with_code(name='React', tutor=self.tutor)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+        res = self.client.post(reverse('quizzes:test-list'), {
+            'classroom': self.classroom.pk, 'title': 'React Basics Test', 'questions': QUESTIONS,
+        }, format='json')
+        self.test = Test.objects.get(pk=res.data['id'])
+        self.students = []
+        for i in range(3):
+            student = User.objects.create_user(email=f'student{i}@example.com', username=f'Student {i}', password='testpass123')
+            Enrollment.objects.create(classroom=self.classroom, student=student)
+            self.client.force_authenticate(user=student)
+            self.client.post(reverse('quizzes:attempt', args=[self.test.pk]))
+            self.students.append(student)
+        self.client.force_authenticate(user=self.students[0])
+
+    def autosave(self, answers):
+        return self.client.patch(reverse('quizzes:attempt-answers', args=[self.test.pk]), {'answers': answers}, format='json')
+
+    def stored(self, student):
+        return grading.unpack_answers(Attempt.objects.get(student=student).answers, len(QUESTIONS))
+
+    def test_autosave_does_not_write_to_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            for option in (0, 1, 2):
+                res = self.autosave({'2': option})
+                self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(writes(queries.captured_queries), [])
+
+        # the last click of every question wins
+        res = self.client.get(reverse('quizzes:attempt', args=[self.test.pk]))
+        self.assertEqual(res.data['answers'], [None, None, 2])
+        self.assertEqual(self.stored(self.students[0]), [None, None, None])
+
+    def test_flush_writes_changed_attempts_in_one_batch(self):
+        self.autosave({'0': 1, '1': 0})
+        self.autosave({'1': None})
+        self.client.force_authenticate(user=self.students[1])
+        self.autosave({'2': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(autosave.flush(force=True), 2)
+        self.assertEqual(len(writes(queries.captured_queries)), 1)
+        self.assertEqual(self.stored(self.students[0]), [1, None, None])
+        self.assertEqual(self.stored(self.students[1]), [None, None, 1])
+
+        # nothing changed since, nothing written
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(autosave.flush(force=True), 0)
+        self.assertEqual(writes(queries.captured_queries), [])
+
+    def test_flush_reads_only_the_attempts_saved_since(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(autosave.flush(force=True), 0)
+        self.assertEqual(queries.captured_queries, [])
+
+        self.autosave({'0': 1})
+        self.autosave({'0': 2})
+        attempt = Attempt.objects.get(student=self.students[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(autosave.flush(force=True), 1)
+        selects = [query['sql'] for query in queries.captured_queries if 'FROM "core_attempt"' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertIn(f'IN ({attempt.pk})', selects[0])
+
+        # saved again after the flush, flushed by the next one
+        self.autosave({'1': 0})
+        self.assertEqual(autosave.flush(force=True), 1)
+        self.assertEqual(self.stored(self.students[0]), [2, 0, None])
+
+    def test_save_numbered_while_a_flush_reads_is_flushed_next(self):
+        cache = autosave.autosave_cache()
+        incr, flushes = cache.incr, []
+
+        def flush_in_between(key, *args, **kwargs):
+            number = incr(key, *args, **kwargs)
+            if not flushes:
+                # the entry is numbered but not written yet
+                flushes.append(autosave.flush(force=True))
+            return number
+
+        with mock.patch.object(cache, 'incr', side_effect=flush_in_between):
+            self.autosave({'0': 1})
+        self.assertEqual(flushes, [0])
+
+        self.assertEqual(autosave.flush(force=True), 1)
+        self.assertEqual(self.stored(self.students[0]), [1, None, None])
+
+    def test_one_flush_per_interval(self):
+        self.autosave({'0': 1})
+        with self.settings(QUIZ_AUTOSAVE_FLUSH_SECONDS=60):
+            self.assertEqual(autosave.flush(), 1)
+            self.assertIsNone(autosave.flush())
+
+    def test_submit_takes_the_autosaved_answers(self):
+        self.autosave({'0': 0, '2': 1})
+
+        res = self.client.post(reverse('quizzes:attempt-submit', args=[self.test.pk]), {}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['answers'], [0, None, 1])
+        self.assertEqual(res.data['score'], 4)
+        self.assertEqual(autosave.buffered(Attempt.objects.get(student=self.students[0]).pk), {})
+
+    def test_flush_leaves_submitted_attempts_alone(self):
+        attempt = Attempt.objects.get(student=self.students[0])
+        autosave.save(attempt.pk, {0: 1})
+        Attempt.objects.filter(pk=attempt.pk).update(status=Attempt.submitted, answers=grading.pack_answers([0, 0, 1], 3))
+
+        call_command('flush_quiz_autosaves', stdout=io.StringIO())
+
+        self.assertEqual(self.stored(self.students[0]), [0, 0, 1])
+
+    def test_autosave_needs_an_attempt_in_progress(self):
+        self.assertEqual(self.autosave({'5': 1}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.post(reverse('quizzes:attempt-submit', args=[self.test.pk]), {'answers': [0, 0, 0]}, format='json')
+
+        self.assertEqual(self.autosave({'0': 1}).status_code, status.HTTP_409_CONFLICT)
+
+    @override_settings(QUIZ_AUTOSAVE_CACHE_ALIAS='')
+    def test_without_a_cache_answers_are_written_through(self):
+        self.autosave({'0': 1})
+        self.autosave({'2': 0})
+
+        self.assertEqual(self.stored(self.students[0]), [1, None, 0])
+        self.assertEqual(autosave.flush(force=True), 0)
+
+    def test_per_process_cache_is_refused(self):
+        errors = checks.run_checks()
+        self.assertEqual([error.id for error in errors if error.id.startswith('quizzes.')], ['quizzes.E002'])
@@ -0,0 +1,109 @@
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Attempt, Classroom, Enrollment, Test
+from quizzes import grading
+
+QUESTIONS = [
+    {'text': 'What is React?', 'options': ['Library', 'Framework', 'Language', 'Tool'], 'correct_option': 0},
+    {'text': 'What is JSX?', 'options': ['JavaScript XML', 'JavaScript Extension'], 'correct_option': 0},
+    {'text': 'Which company developed React?', 'options': ['Google', 'Facebook', 'Microsoft'], 'correct_option': 1, 'points': 3},
+]
+
+
+class GradingEngineTests(TestCase):
+
+    def test_matrix_score_matches_answer_by_answer_scoring(self):
+        rng = np.random.default_rng(0)
+        key = rng.integers(0, 4, 40).astype(np.int8)
+        points = rng.integers(1, 5, 40).astype(np.int64)
+        answers = rng.integers(-1, 4, (500, 40)).astype(np.int8)
+
+        expected = [sum(p for a, k, p in zip(row, key, points) if a == k) for row in answers.tolist()]
+
+        self.assertEqual(grading.score(answers, key, points).tolist(), expected)
+
+    def test_answers_are_padded_to_the_key(self):
+        blobs = [grading.pack_answers([1, 2, None], 3), grading.pack_answers([0], 1), b'']
+
+        matrix = grading.answers_matrix(blobs, 3)
+
+        self.assertEqual(matrix.tolist(), [[1, 2, -1], [0, -1, -1], [-1, -1, -1]])
+        self.assertEqual(grading.unpack_answers(blobs[1], 3), [0, None, None])
+
+
+class TestApiTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.student = User.objects.create_user(email='student@example.com', username='Student', password='testpass123')
+        self.classroom = Classroom.objects.create_with_code(name='React', tutor=self.tutor)
+        Enrollment.objects.create(classroom=self.classroom, student=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+        res = self.client.post(reverse('quizzes:test-list'), {
+            'classroom': self.classroom.pk, 'title': 'React Basics Test', 'questions': QUESTIONS,
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.test = Test.objects.get(pk=res.data['id'])
+
+    def take(self, student, answers):
+        self.client.force_authenticate(user=student)
+        self.client.post(reverse('quizzes:attempt', args=[self.test.pk]))
+        return self.client.post(reverse('quizzes:attempt-submit', args=[self.test.pk]), {'answers': answers}, format='json')
+
+    def test_key_is_compiled_on_create(self):
+        self.assertEqual(bytes(self.test.answer_key), bytes([0, 0, 1]))
+        self.assertEqual(np.frombuffer(self.test.question_points, dtype=np.int16).tolist(), [1, 1, 3])
+
+    def test_students_do_not_get_the_key(self):
+        self.client.force_authenticate(user=self.student)
+
+        res = self.client.get(reverse('quizzes:test-detail', args=[self.test.pk]))
+
+        self.assertNotIn('correct_option', res.data['questions'][0])
+        self.assertEqual(res.data['questions'][2]['options'], QUESTIONS[2]['options'])
+
+    def test_submitted_attempt_is_graded(self):
+        res = self.take(self.student, [0, None, 1])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['score'], 4)
+        self.assertEqual(res.data['answers'], [0, None, 1])
+
+        res = self.client.post(reverse('quizzes:attempt-submit', args=[self.test.pk]), {'answers': [0, 0, 1]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    @override_settings(BACKGROUND_TASKS_EXECUTOR='inline', QUIZ_GRADING_CHUNK_SIZE=300)
+    def test_key_correction_regrades_every_attempt(self):
+        User = get_user_model()
+        students = User.objects.bulk_create([User(email=f's{i}@example.com', username=f's{i}') for i in range(1000)])
+        rng = np.random.default_rng(1)
+        answers = rng.integers(0, 2, (1000, 3)).astype(np.int8)
+        Attempt.objects.bulk_create([
+            Attempt(test=self.test, student=student, status=Attempt.submitted, answers=row.tobytes())
+            for student, row in zip(students, answers)
+        ])
+        self.assertEqual(grading.grade(self.test), 1000)
+
+        self.client.force_authenticate(user=self.tutor)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(reverse('quizzes:question', args=[self.test.pk, 1]), {'correct_option': 1}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        expected = ((answers == np.array([0, 1, 1])) @ np.array([1, 1, 3])).tolist()
+        scores = list(Attempt.objects.filter(test=self.test).order_by('student_id').values_list('score', flat=True))
+        self.assertEqual(scores, expected)
+        self.assertFalse(Attempt.objects.exclude(key_version=2).exists())
+
+    def test_only_the_tutor_corrects_the_key(self):
+        self.client.force_authenticate(user=self.student)
+
+        res = self.client.patch(reverse('quizzes:question', args=[self.test.pk, 0]), {'correct_option': 1}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
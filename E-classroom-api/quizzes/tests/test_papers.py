@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Classroom, Enrollment, Test
+from quizzes import papers
+
+QUESTIONS = [
+    {'text': f'Question {i}', 'options': ['a', 'b', 'c', 'd'], 'correct_option': i % 4} for i in range(10)
+]
+
+
+@override_settings(BACKGROUND_TASKS_EXECUTOR='inline')
+class TestPaperTests(TestCase):
+
+    def setUp(self):
+        papers.paper_cache().clear()
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        self.classroom = Classroom.objects.create_with_code(name='React', tutor=self.tutor)
+        self.students = []
+        for i in range(2):
+            student = User.objects.create_user(email=f'student{i}@example.com', username=f'Student {i}', password='testpass123')
+            Enrollment.objects.create(classroom=self.classroom, student=student)
+            self.students.append(student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.tutor)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse('quizzes:test-list'), {
+                'classroom': self.classroom.pk, 'title': 'React Basics Test', 'questions': QUESTIONS,
+            }, format='json')
+        self.test = Test.objects.get(pk=res.data['id'])
+        self.url = reverse('quizzes:test-paper', args=[self.test.pk])
+
+    def paper(self, student):
+        self.client.force_authenticate(user=student)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return json.loads(res.content)
+
+    def test_papers_are_rendered_when_the_test_is_created(self):
+        cache = papers.paper_cache()
+        self.assertIsNotNone(cache.get(papers.paper_key(self.test, self.students[0].pk)))
+
+        self.client.force_authenticate(user=self.students[0])
+        # the test and the membership, the paper comes from the cache
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_papers_are_shuffled_per_student_without_the_key(self):
+        first, second = self.paper(self.students[0]), self.paper(self.students[1])
+
+        positions = [question['position'] for question in first['questions']]
+        self.assertEqual(sorted(positions), list(range(10)))
+        self.assertNotEqual(positions, [question['position'] for question in second['questions']])
+        self.assertNotIn('correct_option', first['questions'][0])
+        question = first['questions'][0]
+        self.assertEqual(sorted(option['option'] for option in question['options']), [0, 1, 2, 3])
+        for option in question['options']:
+            self.assertEqual(QUESTIONS[question['position']]['options'][option['option']], option['text'])
+
+        # a paper lost from the cache is rendered the same again
+        papers.paper_cache().clear()
+        self.assertEqual(self.paper(self.students[0]), first)
+
+    def test_question_change_renders_new_papers(self):
+        paper = self.paper(self.students[0])
+        self.client.force_authenticate(user=self.tutor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('quizzes:question', args=[self.test.pk, 3]), {'text': 'Fixed typo'}, format='json')
+
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.paper_version, 2)
+        self.assertIsNotNone(papers.paper_cache().get(papers.paper_key(self.test, self.students[0].pk)))
+        updated = self.paper(self.students[0])
+        self.assertEqual([q['position'] for q in updated['questions']], [q['position'] for q in paper['questions']])
+        self.assertIn('Fixed typo', [q['text'] for q in updated['questions']])
+
+    def test_tutor_has_no_paper(self):
+        self.client.force_authenticate(user=self.tutor)
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_misses_build_once(self):
+        flight = papers.SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def build():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return 'paper'
+
+        with ThreadPoolExecutor(8) as pool:
+            leader = pool.submit(flight.do, 'key', build)
+            started.wait()
+            followers = [pool.submit(flight.do, 'key', build) for _ in range(7)]
+            results = [leader.result()] + [future.result() for future in followers]
+
+        self.assertEqual(results, ['paper'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.builds, 1)
@@ -0,0 +1,115 @@
+import io
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Attempt, Classroom, Question, QuestionStats, Test
+from quizzes import grading, stats
+
+
+def point_biserial(correct, scores):
+    # the textbook formula, over every attempt
+    correct, scores = np.asarray(correct, dtype=bool), np.asarray(scores, dtype=float)
+    p = correct.mean()
+    return (scores[correct].mean() - scores[~correct].mean()) / scores.std() * np.sqrt(p * (1 - p))
+
+
+class QuestionStatsTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.tutor = User.objects.create_user(email='tutor@example.com', username='Tutor', role=2, password='testpass123')
+        classroom = Classroom.objects.create_with_code(name='React', tutor=self.tutor)
+        self.test = Test.objects.create(classroom=classroom, title='React Basics Test')
+        Question.objects.bulk_create([
+            Question(test=self.test, position=i, text=f'q{i}', options=['a', 'b', 'c', 'd'], correct_option=i % 4)
+            for i in range(5)
+        ])
+        grading.compile_key(self.test)
+
+        rng = np.random.default_rng(2)
+        self.answers = rng.integers(-1, 4, (400, 5)).astype(np.int8)
+        students = User.objects.bulk_create([User(email=f's{i}@example.com', username=f's{i}') for i in range(400)])
+        self.attempts = Attempt.objects.bulk_create([
+            Attempt(test=self.test, student=student, status=Attempt.submitted, answers=row.tobytes())
+            for student, row in zip(students, self.answers)
+        ])
+
+    def expected(self, answers, key):
+        scores = (answers == key).sum(axis=1)
+        return [{
+            'difficulty': (answers[:, i] == key[i]).mean(),
+            'discrimination': point_biserial(answers[:, i] == key[i], scores),
+            'option_counts': [int((answers[:, i] == option).sum()) for option in range(4)],
+            'unanswered': int((answers[:, i] == -1).sum()),
+        } for i in range(answers.shape[1])]
+
+    def assertAnalysis(self, answers, key):
+        analysis = stats.item_analysis(self.test)
+        for question, expected in zip(analysis, self.expected(answers, np.array(key))):
+            self.assertEqual(question['responses'], len(answers))
+            self.assertAlmostEqual(question['difficulty'], expected['difficulty'])
+            self.assertAlmostEqual(question['discrimination'], expected['discrimination'])
+            self.assertEqual(question['option_counts'], expected['option_counts'])
+            self.assertEqual(question['unanswered'], expected['unanswered'])
+
+    @override_settings(QUIZ_GRADING_CHUNK_SIZE=150)
+    def test_stats_add_up_as_attempts_are_graded(self):
+        grading.grade(self.test, [attempt.pk for attempt in self.attempts[:100]])
+        self.assertAnalysis(self.answers[:100], [0, 1, 2, 3, 0])
+
+        # grading the same attempts again doesn't count them twice
+        grading.grade(self.test)
+        self.assertAnalysis(self.answers, [0, 1, 2, 3, 0])
+
+    def test_stats_start_over_with_a_corrected_key(self):
+        grading.grade(self.test)
+        Question.objects.filter(test=self.test, position=4).update(correct_option=3)
+        grading.compile_key(self.test)
+
+        self.assertEqual(stats.item_analysis(self.test)[0]['responses'], 0)
+        grading.regrade(self.test.pk)
+        self.assertAnalysis(self.answers, [0, 1, 2, 3, 3])
+
+    def test_submit_with_an_outdated_test_keeps_the_new_stats(self):
+        last = self.attempts[-1]
+        Attempt.objects.filter(pk=last.pk).update(status=Attempt.in_progress)
+        grading.grade(self.test)
+        # the request submitting the last attempt loaded the test before the key was corrected
+        outdated = Test.objects.get(pk=self.test.pk)
+        Question.objects.filter(test=self.test, position=4).update(correct_option=3)
+        grading.compile_key(self.test)
+        grading.regrade(self.test.pk)
+
+        Attempt.objects.filter(pk=last.pk).update(status=Attempt.submitted)
+        grading.grade(outdated, [last.pk])
+
+        self.assertAnalysis(self.answers, [0, 1, 2, 3, 3])
+        self.assertEqual(outdated.key_version, self.test.key_version)
+
+        # an attempt seen as ungraded by two graders is counted by the first one only
+        grading.grade(outdated, [last.pk])
+        self.assertAnalysis(self.answers, [0, 1, 2, 3, 3])
+
+    def test_rebuild_command(self):
+        grading.grade(self.test)
+        QuestionStats.objects.update(responses=0, correct=0, option_counts=[])
+
+        call_command('rebuild_question_stats', str(self.test.pk), stdout=io.StringIO())
+
+        self.assertAnalysis(self.answers, [0, 1, 2, 3, 0])
+
+    def test_stats_endpoint_reads_no_attempts(self):
+        grading.grade(self.test)
+        client = APIClient()
+        client.force_authenticate(user=self.tutor)
+
+        # the test, its questions with their stats
+        with self.assertNumQueries(2):
+            res = client.get(reverse('quizzes:test-stats', args=[self.test.pk]))
+
+        self.assertEqual(len(res.data['questions']), 5)
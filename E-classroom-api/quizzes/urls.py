@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+app_name = 'quizzes'
+
+urlpatterns = [
+    path('', views.TestListView.as_view(), name='test-list'),
+    path('<int:pk>/', views.TestDetailView.as_view(), name='test-detail'),
+    path('<int:pk>/questions/<int:position>/', views.QuestionView.as_view(), name='question'),
+    path('<int:pk>/paper/', views.TestPaperView.as_view(), name='test-paper'),
+    path('<int:pk>/stats/', views.TestStatsView.as_view(), name='test-stats'),
+    path('<int:pk>/attempt/', views.AttemptView.as_view(), name='attempt'),
+    path('<int:pk>/attempt/answers/', views.AutosaveView.as_view(), name='attempt-answers'),
+    path('<int:pk>/attempt/submit/', views.SubmitAttemptView.as_view(), name='attempt-submit'),
+]
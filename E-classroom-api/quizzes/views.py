@@ -0,0 +1,219 @@
+from django.db.models import F
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from classrooms.access import get_classroom, is_member
+from core.models import Attempt, Test
+from core.tasks import background_tasks
+from . import autosave, grading, papers, stats
+from .serializers import AttemptSerializer, AutosaveSerializer, QuestionSerializer, SubmitAttemptSerializer, TestSerializer
+
+
+def get_test(request, pk, tutor=False):
+    """The test if the user is in its class, tutor=True only lets the tutor of the class through."""
+    test = get_object_or_404(Test.objects.select_related('classroom'), pk=pk)
+    if not is_member(request.user, test.classroom):
+        raise NotFound()
+    if tutor and test.classroom.tutor_id != request.user.pk:
+        raise PermissionDenied('Only the tutor of the class can do this.')
+    return test
+
+
+@extend_schema(tags=["Tests"])
+class TestListView(generics.ListCreateAPIView):
+    """
+    GET: lists the tests of the class given by the `classroom` query parameter.
+    POST: creates a test with its questions, only by the tutor of the class.
+    """
+    serializer_class = TestSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        try:
+            classroom_id = int(self.request.query_params['classroom'])
+        except (KeyError, ValueError):
+            raise NotFound('classroom query parameter required')
+        self.classroom = get_classroom(self.request, classroom_id)
+        return Test.objects.filter(classroom=self.classroom).prefetch_related('questions').order_by('date', 'id')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        classroom = getattr(self, 'classroom', None)
+        context['show_key'] = self.request.method == 'POST' or (
+            classroom is not None and classroom.tutor_id == self.request.user.pk
+        )
+        return context
+
+    def perform_create(self, serializer):
+        if serializer.validated_data['classroom'].tutor_id != self.request.user.pk:
+            raise PermissionDenied('Only the tutor of the class can add tests.')
+        serializer.save()
+
+
+@extend_schema(tags=["Tests"])
+class TestDetailView(generics.RetrieveAPIView):
+    """
+    API for retrieving a test, the correct options are only sent to the tutor.
+    """
+    serializer_class = TestSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        self.test = get_test(self.request, self.kwargs['pk'])
+        return self.test
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['show_key'] = self.test.classroom.tutor_id == self.request.user.pk
+        return context
+
+
+@extend_schema(tags=["Tests"])
+class QuestionView(APIView):
+    """
+    Corrects a question of the test, tutors only. When the correct option or the points
+    change the submitted attempts are regraded in the background, the papers of the
+    students are rendered again in any case.
+    """
+    serializer_class = QuestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, pk, position):
+        test = get_test(request, pk, tutor=True)
+        question = get_object_or_404(test.questions, position=position)
+        serializer = self.serializer_class(question, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        Test.objects.filter(pk=test.pk).update(paper_version=F('paper_version') + 1)
+        background_tasks.defer(papers.publish, test.pk)
+        if grading.compile_key(test):
+            background_tasks.defer(grading.regrade, test.pk)
+        return Response(serializer.data)
+
+
+@extend_schema(tags=["Tests"])
+class TestPaperView(APIView):
+    """
+    The test as the student taking it sees it, the questions and their options in an
+    order of their own and without the correct options. Papers are rendered into the
+    cache when the test is created so the start of the test is served from there,
+    see quizzes.papers.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        test = get_test(request, pk)
+        if test.classroom.tutor_id == request.user.pk:
+            raise PermissionDenied('Tutors do not take tests.')
+        return HttpResponse(papers.get_paper(test, request.user.pk), content_type='application/json')
+
+
+@extend_schema(tags=["Tests"])
+class AttemptView(APIView):
+    """
+    GET: the attempt of the student at the test, with the answers autosaved so far.
+    POST: starts the attempt, starting it again returns the same one.
+    """
+    serializer_class = AttemptSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        test = get_test(request, pk)
+        attempt = get_object_or_404(Attempt, test=test, student=request.user)
+        attempt.test = test
+        if attempt.status == Attempt.in_progress:
+            attempt.answers = autosave.overlay(attempt.answers, len(test.answer_key), autosave.buffered(attempt.pk))
+        return Response(self.serializer_class(attempt).data)
+
+    def post(self, request, pk):
+        test = get_test(request, pk)
+        if test.classroom.tutor_id == request.user.pk:
+            raise PermissionDenied('Tutors do not take tests.')
+        attempt, created = Attempt.objects.get_or_create(test=test, student=request.user)
+        attempt.test = test
+        return Response(self.serializer_class(attempt).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@extend_schema(tags=["Tests"])
+class AutosaveView(APIView):
+    """
+    Autosaves the answers changed while taking the test. They are buffered in the cache,
+    the last one of every question wins, and written to the attempt in batches by
+    quizzes.autosave.flush or when the attempt is submitted. Without a cache for them
+    (QUIZ_AUTOSAVE_CACHE_ALIAS) they are written right away.
+    """
+    serializer_class = AutosaveSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, pk):
+        test = get_test(request, pk)
+        serializer = self.serializer_class(data=request.data, context={'question_count': len(test.answer_key)})
+        serializer.is_valid(raise_exception=True)
+        attempt_id = Attempt.objects.filter(
+            test=test, student=request.user, status=Attempt.in_progress,
+        ).values_list('pk', flat=True).first()
+        if attempt_id is None:
+            return Response({'error': 'No attempt in progress'}, status=status.HTTP_409_CONFLICT)
+        try:
+            autosave.save(attempt_id, serializer.validated_data['answers'])
+        except autosave.AutosaveBusy:
+            return Response({'error': 'Answers are being saved, try again'}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(tags=["Tests"])
+class SubmitAttemptView(APIView):
+    """
+    Submits the answers of the attempt, a list of the chosen option of every question
+    by position (null when not answered), and returns it graded. Without answers the
+    autosaved ones are submitted.
+    """
+    serializer_class = SubmitAttemptSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        test = get_test(request, pk)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        attempt = get_object_or_404(Attempt, test=test, student=request.user)
+
+        count = len(test.answer_key)
+        try:
+            buffered = autosave.take(attempt.pk)
+        except autosave.AutosaveBusy:
+            return Response({'error': 'Answers are being saved, try again'}, status=status.HTTP_409_CONFLICT)
+        if 'answers' in serializer.validated_data:
+            answers = grading.pack_answers(serializer.validated_data['answers'], count)
+        else:
+            answers = autosave.overlay(attempt.answers, count, buffered)
+        submitted = Attempt.objects.filter(pk=attempt.pk, status=Attempt.in_progress).update(
+            status=Attempt.submitted, answers=answers, submitted_at=timezone.now(),
+        )
+        if not submitted:
+            return Response({'error': 'Attempt already submitted'}, status=status.HTTP_409_CONFLICT)
+        grading.grade(test, [attempt.pk])
+
+        attempt.refresh_from_db()
+        attempt.test = test
+        return Response(AttemptSerializer(attempt).data)
+
+
+@extend_schema(tags=["Tests"])
+class TestStatsView(APIView):
+    """
+    Item analysis of the test for its tutor: for every question the share of right
+    answers (difficulty), the point biserial correlation with the score
+    (discrimination) and how often each option was chosen.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        test = get_test(request, pk, tutor=True)
+        return Response({'key_version': test.key_version, 'questions': stats.item_analysis(test)})
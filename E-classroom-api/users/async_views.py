@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+import jwt
+from asgiref.sync import sync_to_async
+from core.async_api import AsyncAPIView
+from core.authentication import IsNotAuthenticated
+from core.models import OneTimeToken, TokenFamily
+from core.revocation import revoked_tokens
+from core.tokens import create_token_pair, decode_token, revocation_key, token_expiry
+from core.user_cache import user_cache
+from .serializers import (
+    ActivateUserSerializer,
+    ObtainAuthTokenSerializer,
+    RefreshTokenSerializer,
+    UserCreateRetriveSerializer,
+)
+
+# Async versions of the views in users.views, same requests and responses.
+# They only pay off when served by core/asgi.py, under WSGI Django runs each
+# of them in its own event loop.
+
+
+@extend_schema(tags=["User Management (async)"])
+class AsyncAuthTokenView(AsyncAPIView):
+    """
+    Async version of AuthTokenView.
+    Authenticates the user and starts a new token family, returns the access and refresh token
+    """
+    serializer_class = ObtainAuthTokenSerializer
+    permission_classes = [IsNotAuthenticated]
+
+    async def post(self, request):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        await serializer.ais_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        family = await TokenFamily.objects.astart(user)
+
+        return Response(create_token_pair(user, family.pk), status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["User Management (async)"])
+class AsyncRefreshTokenView(AsyncAPIView):
+    """
+    Async version of RefreshTokenView.
+    Moves the token family to its next generation and returns new access and refresh tokens
+    """
+    serializer_class = RefreshTokenSerializer
+    permission_classes = []
+
+    async def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        await serializer.ais_valid(raise_exception=True)
+        refresh_token = serializer.validated_data.get('refresh_token')
+        payload = serializer.validated_data.get('payload')
+
+        user = serializer.validated_data.get('user')
+        if 'fam' in payload:
+            family_id = payload['fam']
+            generation = await TokenFamily.objects.arotate(family_id, payload.get('gen', 0))
+            if generation is None:
+                return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            key = revocation_key(payload, refresh_token)
+            await sync_to_async(revoked_tokens.revoke)(user, key, token_expiry(payload))
+            family_id, generation = (await TokenFamily.objects.astart(user)).pk, 0
+
+        return Response(create_token_pair(user, family_id, generation), status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["User Management (async)"])
+class AsyncActivateUserView(AsyncAPIView):
+    """
+    Async version of ActivateUserView.
+    activates the user if the token from the confirmation email is valid
+    """
+    serializer_class = ActivateUserSerializer
+    permission_classes = [IsNotAuthenticated]
+
+    async def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        token = serializer.validated_data['token']
+        user_id = await OneTimeToken.objects.aconsume(token, OneTimeToken.activation)
+
+        if user_id:
+            await get_user_model().objects.filter(pk=user_id).aupdate(is_active=True)
+            user_cache.invalidate(user_id)
+
+            return Response({"message": "Your account has been activated."}, status=status.HTTP_200_OK)
+        else:
+            return Response({"error": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@extend_schema(tags=["User Management (async)"])
+class AsyncLogoutView(AsyncAPIView):
+    """
+    Async version of LogoutView.
+    revokes the token family of the token in the auth header
+    """
+    serializer_class = None
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def post(self, request):
+        auth_header = request.headers.get('Authorization')
+        try:
+            prefix, refresh_token = auth_header.split()
+            if prefix != 'Bearer':
+                return Response({'error': 'Invalid token prefix'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'error': 'Invalid Authorization header format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            payload = decode_token(refresh_token)
+        except jwt.ExpiredSignatureError:
+            return Response({'error': 'Refresh token expired'}, status=status.HTTP_401_UNAUTHORIZED)
+        except jwt.DecodeError:
+            return Response({'error': 'Invalid refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if 'fam' in payload:
+            await TokenFamily.objects.arevoke(payload['fam'])
+        else:
+            key = revocation_key(payload, refresh_token)
+            await sync_to_async(revoked_tokens.revoke)(request.user, key, token_expiry(payload))
+
+        return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["User Profile (async)"])
+class AsyncManageUserView(AsyncAPIView):
+    """
+    Async version of ManageUserView, returns the authenticated user's profile.
+    """
+    serializer_class = UserCreateRetriveSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def get(self, request):
+        serializer = self.serializer_class(request.user, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -2,11 +2,16 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext as _
 from django.contrib.auth import authenticate
+from asgiref.sync import sync_to_async
 
-from core.models import BlacklistedToken
+from core.async_api import AsyncValidationMixin
+from core.backends import aauthenticate
+from core.images import process_profile_pic, strip_metadata, variant_urls
+from core.tasks import background_tasks
+from core.revocation import revoked_tokens
+from core.tokens import REFRESH, decode_token, revocation_key
 from core.utils import file_validator, image_validator, combine_file_validator
 import jwt
-from django.conf import settings
 
 class UserCreateRetriveSerializer(serializers.ModelSerializer):
     """
@@ -15,6 +20,8 @@ class UserCreateRetriveSerializer(serializers.ModelSerializer):
         This serializer is used for creating and retriving the user
         Fields: all fields of user model and confirm password for the creat(post request)
         Image validator is being attached to the profile_pic field 
+        profile_pic_srcset has the urls of the resized profile pictures once they are made
+        The profile_pic is stored without its metadata (exif, gps position)
 
     Validation:
     -----------
@@ -27,10 +34,11 @@ class UserCreateRetriveSerializer(serializers.ModelSerializer):
         write_only=True
     )
     profile_pic = serializers.ImageField(validators=[image_validator], required=False)
+    profile_pic_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model=get_user_model()
-        fields = ['email', 'username', 'profile_pic', 'role', 'password', 'confirm_password','is_active']
+        fields = ['email', 'username', 'profile_pic', 'profile_pic_srcset', 'role', 'password', 'confirm_password','is_active']
         extra_kwargs={
             'password' : {
                 'write_only':True,
@@ -51,11 +59,20 @@ class UserCreateRetriveSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(msg, code="password mismatch")
             
         return attrs
+
+    def validate_profile_pic(self, value):
+        return strip_metadata(value)
             
     def create(self, validated_data):
         validated_data.pop('confirm_password', None)
         validated_data.pop('is_active', None)
-        return get_user_model().objects.create_user(**validated_data)
+        user = get_user_model().objects.create_user(**validated_data)
+        if validated_data.get('profile_pic'):
+            background_tasks.defer(process_profile_pic, user.pk, user.profile_pic.name)
+        return user
+
+    def get_profile_pic_srcset(self, obj):
+        return variant_urls(obj.profile_pic_variants, self.context.get('request'))
     
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -65,12 +82,31 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         This serializer is used for updating the user
         Fields: username and profile_pic of user model
         Image validator is being attached to the profile_pic field 
+        A new profile_pic is stored without its metadata and resized in the background,
+        until then profile_pic_srcset is empty
     """
     profile_pic = serializers.ImageField(validators=[image_validator], required=False)
+    profile_pic_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model=get_user_model()
-        fields=['username', 'profile_pic']
+        fields=['username', 'profile_pic', 'profile_pic_srcset']
+
+    def validate_profile_pic(self, value):
+        return strip_metadata(value)
+
+    def update(self, instance, validated_data):
+        old_variants = instance.profile_pic_variants
+        new_pic = validated_data.get('profile_pic')
+        if new_pic:
+            validated_data['profile_pic_variants'] = {}
+        user = super().update(instance, validated_data)
+        if new_pic:
+            background_tasks.defer(process_profile_pic, user.pk, user.profile_pic.name, old_variants)
+        return user
+
+    def get_profile_pic_srcset(self, obj):
+        return variant_urls(obj.profile_pic_variants, self.context.get('request'))
 
 class ActivateUserSerializer(serializers.Serializer):
     """
@@ -81,43 +117,71 @@ class ActivateUserSerializer(serializers.Serializer):
     token=serializers.CharField(write_only=True)
 
     
-class RefreshTokenSerializer(serializers.Serializer):
+class RefreshTokenSerializer(AsyncValidationMixin, serializers.Serializer):
     """
     What it does:
     -------------
         Gets the refresh token and validate if it's Blacklisted, expired or invalid
+        tokens of a token family are checked against their family by RefreshTokenView
+        avalidate does the same for the async views
     """
     refresh_token = serializers.CharField(max_length=500)
 
     def validate(self, attrs):
         refresh_token = attrs.get('refresh_token')
+        payload = self.decode(refresh_token)
 
-        try:
-            BlacklistedToken.objects.get(token=refresh_token)
+        if 'fam' not in payload and revoked_tokens.is_revoked(revocation_key(payload, refresh_token)):
             msg = _('Invalid token')
             raise serializers.ValidationError(msg)
-        except:
-            pass
 
+        user = get_user_model().objects.filter(id=payload['user_id']).first()
+        if not user:
+            msg = _("User not found")
+            raise serializers.ValidationError(msg)
+        
+        attrs['user'] = user
+        attrs['payload'] = payload
+        return attrs
+
+    async def avalidate(self, attrs):
+        refresh_token = attrs.get('refresh_token')
+        payload = self.decode(refresh_token)
+
+        if 'fam' not in payload:
+            # only tokens issued before token families are checked against the blacklist
+            revoked = await sync_to_async(revoked_tokens.is_revoked)(revocation_key(payload, refresh_token))
+            if revoked:
+                msg = _('Invalid token')
+                raise serializers.ValidationError(msg)
+
+        user = await get_user_model().objects.filter(id=payload['user_id']).afirst()
+        if not user:
+            msg = _("User not found")
+            raise serializers.ValidationError(msg)
+
+        attrs['user'] = user
+        attrs['payload'] = payload
+        return attrs
+
+    def decode(self, refresh_token):
         try:
-            payload = jwt.decode(refresh_token, settings.JWT_SECRET, algorithms=[settings.JWT_ALORITHM])
+            payload = decode_token(refresh_token)
         except jwt.ExpiredSignatureError:
             msg = _('Expired token')
             raise serializers.ValidationError(msg)
         except jwt.DecodeError:
             msg = _('Invalid token')
             raise serializers.ValidationError(msg)
-        
-        user = get_user_model().objects.filter(id=payload['user_id'])
-        if not user:
-            msg = _("User not found")
+
+        if payload.get('type', REFRESH) != REFRESH:
+            msg = _('Invalid token')
             raise serializers.ValidationError(msg)
-        
-        attrs['user'] = user
-        return attrs
+
+        return payload
         
 
-class ObtainAuthTokenSerializer(serializers.Serializer):
+class ObtainAuthTokenSerializer(AsyncValidationMixin, serializers.Serializer):
     """
     What it does:
     -------------
@@ -128,6 +192,7 @@ class ObtainAuthTokenSerializer(serializers.Serializer):
     -----------
         authenticate the user via entered details, if failed then raises error
         else adds the user to attrs and return the attrs
+        avalidate does the same for the async views
     """
     email=serializers.EmailField()
     password=serializers.CharField(trim_whitespace=True)
@@ -148,6 +213,19 @@ class ObtainAuthTokenSerializer(serializers.Serializer):
         else:
             attrs['user'] = user
             return attrs
+
+    async def avalidate(self, attrs):
+        user = await aauthenticate(
+            request=self.context.get('request'),
+            username=attrs.get('email'),
+            password=attrs.get('password')
+        )
+
+        if not user:
+            msg = _('Unable to authenticate with prvided credentials')
+            raise serializers.ValidationError(msg)
+        attrs['user'] = user
+        return attrs
         
 class ForgotPasswordSerializer(serializers.Serializer):
     """
@@ -0,0 +1,83 @@
+from rest_framework import status
+from django.test import AsyncClient, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+
+from core.models import OneTimeToken, TokenFamily
+from core.user_cache import user_cache
+
+TOKEN_URL = reverse('user:async-token')
+REFRESH_URL = reverse('user:async-refresh-token')
+LOGOUT_URL = reverse('user:async-logout')
+ACTIVATE_URL = reverse('user:async-activate')
+ME_URL = reverse('user:async-me')
+
+def create_user(email='test@example.com', password='testpass123', is_active=True):
+    user = get_user_model().objects.create_user(email=email, username='Test Name', password=password)
+    user.is_active = is_active
+    user.save()
+    return user
+
+
+@override_settings(USER_CACHE_TTL_SECONDS=60)
+class AsyncUserApiTests(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = create_user()
+        self.client = AsyncClient()
+
+    async def login(self):
+        res = await self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    async def test_login_and_retrieve_profile(self):
+        tokens = await self.login()
+
+        res = await self.client.get(ME_URL, headers={'Authorization': 'Bearer ' + tokens['access_token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['email'], self.user.email)
+
+    async def test_wrong_password(self):
+        res = await self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'wrong-pass'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_profile_requires_token(self):
+        res = await self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_refresh_and_replay(self):
+        tokens = await self.login()
+
+        res = await self.client.post(REFRESH_URL, {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = await self.client.post(REFRESH_URL, {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        family = await TokenFamily.objects.aget(user=self.user)
+        self.assertTrue(family.revoked)
+
+    async def test_logout_revokes_family(self):
+        tokens = await self.login()
+
+        res = await self.client.post(LOGOUT_URL, headers={'Authorization': 'Bearer ' + tokens['access_token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        family = await TokenFamily.objects.aget(user=self.user)
+        self.assertTrue(family.revoked)
+
+    async def test_activate_user(self):
+        user = await get_user_model().objects.acreate(email='new@example.com', username='New')
+        token = await sync_to_async(OneTimeToken.objects.issue)(user, OneTimeToken.activation)
+
+        res = await self.client.post(ACTIVATE_URL, {'token': token})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        await user.arefresh_from_db()
+        self.assertTrue(user.is_active)
+
+        res = await self.client.post(ACTIVATE_URL, {'token': token})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
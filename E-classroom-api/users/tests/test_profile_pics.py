@@ -0,0 +1,128 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import StoredBlob
+from core.storage import media_storage
+from core.tasks import background_tasks
+
+ME_URL = reverse('user:me')
+ME_URL_UPDATE = reverse('user:me-update')
+
+
+def generate_photo(name='photo.jpg', size=(800, 600), color='blue'):
+    """A jpeg carrying exif data, like a picture straight from a phone."""
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    image_io = io.BytesIO()
+    Image.new('RGB', size, color=color).save(image_io, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, image_io.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(BACKGROUND_TASKS_EXECUTOR='inline', PROFILE_PIC_SIZES=[48, 128, 512], PROFILE_PIC_FORMATS=['webp', 'jpeg'])
+class ProfilePicVariantsTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        background_tasks.shutdown()
+        self.user = get_user_model().objects.create_user(email='test@example.com', username='Test Name', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        background_tasks.shutdown()
+
+    def upload(self, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(ME_URL_UPDATE, {'profile_pic': photo}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        return res
+
+    def test_variants_are_made_after_upload(self):
+        res = self.upload(generate_photo())
+
+        self.assertEqual(res.data['profile_pic_srcset'], {})
+        variants = self.user.profile_pic_variants
+        self.assertEqual(set(variants), {'webp', 'jpeg'})
+        for fmt, pillow_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            self.assertEqual(set(variants[fmt]), {'48', '128', '512'})
+            for size, name in variants[fmt].items():
+                with media_storage.open(name) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, pillow_format)
+                    self.assertEqual(image.size, (min(int(size), 600),) * 2)
+                    self.assertEqual(len(image.getexif()), 0)
+
+    def test_original_is_stored_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # taken with the phone turned, to be rotated by 90 degrees
+        exif[0x8825] = {1: 'N', 2: (51.0, 30.0, 0.0)}
+        photo = io.BytesIO()
+        Image.new('RGB', (800, 600), color='blue').save(photo, format='JPEG', exif=exif)
+
+        self.upload(SimpleUploadedFile('photo.jpg', photo.getvalue(), content_type='image/jpeg'))
+
+        with media_storage.open(self.user.profile_pic.name) as f:
+            image = Image.open(f)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (600, 800))
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_profile_returns_srcset(self):
+        self.upload(generate_photo())
+
+        res = self.client.get(ME_URL)
+
+        srcset = res.data['profile_pic_srcset']
+        self.assertTrue(srcset['webp']['48'].startswith('http://testserver/api/media/'))
+        self.assertIn('/profile_pics/variants/', srcset['jpeg']['512'])
+        self.assertTrue(srcset['jpeg']['512'].endswith('.jpg'))
+
+    def test_new_upload_replaces_variants(self):
+        self.upload(generate_photo())
+        old = self.user.profile_pic_variants
+
+        self.upload(generate_photo(name='other.jpg', color='green'))
+
+        self.assertNotEqual(self.user.profile_pic_variants, old)
+        self.assertEqual(StoredBlob.objects.get(pk=old['webp']['128']).refs, 0)
+
+    def test_same_picture_shares_variants(self):
+        self.upload(generate_photo())
+        other = get_user_model().objects.create_user(email='other@example.com', username='Other', password='testpass123')
+        self.client.force_authenticate(user=other)
+
+        self.upload(generate_photo(name='copy.jpg'))
+
+        other.refresh_from_db()
+        self.assertEqual(other.profile_pic.name, self.user.profile_pic.name)
+        self.user.refresh_from_db()
+        self.assertEqual(other.profile_pic_variants, self.user.profile_pic_variants)
+        self.assertEqual(StoredBlob.objects.get(pk=other.profile_pic_variants['jpeg']['48']).refs, 2)
+
+    def test_command_processes_missing_variants(self):
+        self.user.profile_pic = SimpleUploadedFile('later.jpg', generate_photo().read())
+        self.user.save()
+        out = StringIO()
+
+        call_command('process_profile_pics', stdout=out)
+
+        self.assertIn('processed 1 profile pictures', out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.profile_pic_variants['jpeg']), {'48', '128', '512'})
@@ -0,0 +1,130 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.conf import settings
+from django.utils import timezone
+import datetime
+import jwt
+
+from core.models import BlacklistedToken, TokenFamily
+from core.revocation import BloomFilter, revoked_tokens
+from core.tokens import decode_token
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:refresh-token')
+LOGOUT_URL = reverse('user:logout')
+
+def create_user(email='test@example.com', password='testpass123'):
+    user = get_user_model().objects.create_user(email=email, username='Test Name', password=password)
+    user.is_active = True
+    user.save()
+    return user
+
+
+@override_settings(REVOCATION_SYNC_SECONDS=0)
+class RefreshTokenApiTests(TestCase):
+
+    def setUp(self):
+        revoked_tokens.reset()
+        self.user = create_user()
+        self.client = APIClient()
+        res = self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'testpass123'})
+        self.tokens = res.data
+
+    def test_tokens_carry_jti(self):
+        access = decode_token(self.tokens['access_token'])
+        refresh = decode_token(self.tokens['refresh_token'])
+
+        self.assertNotEqual(access['jti'], refresh['jti'])
+        self.assertEqual(refresh['type'], 'refresh')
+
+    def test_refresh_rotates_token(self):
+        with self.assertNumQueries(2):
+            res = self.client.post(REFRESH_URL, {'refresh_token': self.tokens['refresh_token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(decode_token(res.data['refresh_token'])['gen'], 1)
+        self.assertEqual(TokenFamily.objects.get(user=self.user).generation, 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        res = self.client.post(REFRESH_URL, {'refresh_token': res.data['refresh_token']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_replayed_token_revokes_family(self):
+        res = self.client.post(REFRESH_URL, {'refresh_token': self.tokens['refresh_token']})
+        latest = res.data['refresh_token']
+
+        res = self.client.post(REFRESH_URL, {'refresh_token': self.tokens['refresh_token']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(TokenFamily.objects.get(user=self.user).revoked)
+
+        res = self.client.post(REFRESH_URL, {'refresh_token': latest})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_legacy_token_moves_into_family(self):
+        payload = {
+            'user_id': self.user.id,
+            'exp': timezone.now() + datetime.timedelta(days=1),
+            'iat': timezone.now(),
+        }
+        legacy = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+        res = self.client.post(REFRESH_URL, {'refresh_token': legacy})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('fam', decode_token(res.data['refresh_token']))
+        self.assertEqual(BlacklistedToken.objects.filter(user=self.user).count(), 1)
+
+        res = self.client.post(REFRESH_URL, {'refresh_token': legacy})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_cannot_refresh(self):
+        res = self.client.post(REFRESH_URL, {'refresh_token': self.tokens['access_token']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REVOCATION_SYNC_SECONDS=60)
+    def test_unrevoked_token_skips_blacklist_query(self):
+        revoked_tokens.warm()
+        with self.assertNumQueries(0):
+            revoked = revoked_tokens.is_revoked('0' * 32)
+        self.assertFalse(revoked)
+
+        revoked_tokens.add('0' * 32)
+        with self.assertNumQueries(1):
+            revoked = revoked_tokens.is_revoked('0' * 32)
+        self.assertFalse(revoked)
+
+    @override_settings(REVOCATION_SYNC_SECONDS=60, REVOCATION_WARM_ON_START=True)
+    def test_filter_is_warmed_on_start(self):
+        revoked_tokens._warming = None
+        revoked_tokens.start()
+        revoked_tokens._warming.join()
+
+        with self.assertNumQueries(0):
+            revoked = revoked_tokens.is_revoked('0' * 32)
+        self.assertFalse(revoked)
+
+    def test_logout_revokes_family(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.tokens['access_token'])
+        res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(TokenFamily.objects.get(user=self.user).revoked)
+
+        self.client.credentials()
+        res = self.client.post(REFRESH_URL, {'refresh_token': self.tokens['refresh_token']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BloomFilterTests(TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f'key-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
@@ -1,5 +1,5 @@
 from django.urls import path, include, re_path
-from . import views
+from . import async_views, views
 app_name = 'user'
 
 urlpatterns = [
@@ -13,6 +13,12 @@ urlpatterns = [
     path('activate/', views.ActivateUserView.as_view(), name='activate'),
     path('reset-password/', views.ResetPasswordView.as_view(), name='reset-password'),
 
+    path('async/me/', async_views.AsyncManageUserView.as_view(), name='async-me'),
+    path('async/token/', async_views.AsyncAuthTokenView.as_view(), name='async-token'),
+    path('async/token/refresh/', async_views.AsyncRefreshTokenView.as_view(), name='async-refresh-token'),
+    path('async/logout/', async_views.AsyncLogoutView.as_view(), name='async-logout'),
+    path('async/activate/', async_views.AsyncActivateUserView.as_view(), name='async-activate'),
+
     re_path(r'^oauth/', include('social_django.urls', namespace='social')),
 ]
 
@@ -1,16 +1,17 @@
-from django.core.mail import EmailMessage
-from django.conf import settings
-from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework import parsers
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 import jwt
-import datetime
 from core.authentication import IsNotAuthenticated
-from core.models import BlacklistedToken
+from core.mail import queue_email
+from core.models import OneTimeToken, TokenFamily
+from core.revocation import revoked_tokens
+from core.tokens import create_token_pair, decode_token, revocation_key, token_expiry
+from core.user_cache import user_cache
 from .serializers import *
 
 
@@ -18,22 +19,20 @@ from .serializers import *
 class CreateUserView(generics.CreateAPIView):
     """
     API for registering a new user.
-    Sends an activation Token on the user email.
+    Queues an email with the activation Token, sent by the send_queued_mail command.
     """
     serializer_class = UserCreateRetriveSerializer
     permission_classes = [IsNotAuthenticated]
     parser_classes =  [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
 
     def perform_create(self, serializer):
-        user = serializer.save(is_active=False)
-        user.set_email_token()
-        user.save()
+        with transaction.atomic():
+            user = serializer.save(is_active=False)
+            token = OneTimeToken.objects.issue(user, OneTimeToken.activation)
 
-        subject = 'Activate your account'
-        message = f'Hi {user.username}, activate your account \n token: {user.email_token}'
-
-        email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
-        email.send()
+            subject = 'Activate your account'
+            message = f'Hi {user.username}, activate your account \n token: {token}'
+            queue_email(subject, message, [user.email])
 
         return Response({"message": "Activation token has been sent to your email address. Please check your inbox."}, status=status.HTTP_201_CREATED)
 
@@ -53,12 +52,11 @@ class ActivateUserView(APIView):
         serializer.is_valid(raise_exception=True)
 
         token = serializer.validated_data['token']
-        user = get_user_model().objects.filter(email_token=token).first()
+        user_id = OneTimeToken.objects.consume(token, OneTimeToken.activation)
 
-        if user and user.is_email_token_valid(token):
-            user.is_active = True
-            user.clear_email_token()
-            user.save()
+        if user_id:
+            get_user_model().objects.filter(pk=user_id).update(is_active=True)
+            user_cache.invalidate(user_id)
 
             return Response({"message": "Your account has been activated."}, status=status.HTTP_200_OK)
         else:
@@ -71,7 +69,7 @@ class ForgotPasswordView(APIView):
     API for requesting a password reset token
     Supported method: post
     gets the email from serializer and user from it
-    sends the token to email for confirmation which user have to enter while reseting the password
+    queues an email with the token for confirmation which user have to enter while reseting the password
     """
     serializer_class = ForgotPasswordSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -84,14 +82,12 @@ class ForgotPasswordView(APIView):
         user = get_user_model().objects.filter(email=email).first()
 
         if user:
-            user.set_email_token()
-            user.save()
-
-            subject = 'Password Reset'
-            message = f'Use the token below to reset password: \n Token: {user.email_token}'
+            with transaction.atomic():
+                token = OneTimeToken.objects.issue(user, OneTimeToken.password_reset)
 
-            email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
-            email.send()
+                subject = 'Password Reset'
+                message = f'Use the token below to reset password: \n Token: {token}'
+                queue_email(subject, message, [user.email])
             return Response({"message": "We have sent a token to your email. Use it to reset your password."}, status=status.HTTP_200_OK)
         else:
             return Response({'message':"user with this email does not exists"}, status=status.HTTP_200_OK)
@@ -112,12 +108,12 @@ class ResetPasswordView(APIView):
         serializer.is_valid(raise_exception=True)
 
         token = serializer.validated_data['token']
-        user = get_user_model().objects.filter(email_token=token).first()
+        user_id = OneTimeToken.objects.consume(token, OneTimeToken.password_reset)
+        user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
 
-        if user and user.is_email_token_valid(token):
+        if user:
             user.set_password(serializer.validated_data['password'])
-            user.clear_email_token()
-            user.save()
+            user.save(update_fields=['password'])
 
             return Response({"message": "Password reset successful."}, status=status.HTTP_200_OK)
         else:
@@ -140,21 +136,9 @@ class AuthTokenView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
+        family = TokenFamily.objects.start(user)
 
-        access_payload = {
-            'user_id': user.id,
-            'exp': timezone.now()  + datetime.timedelta(seconds=settings.JWT_ACCESS_EXP_DELTA_SECONDS),
-            'iat': timezone.now()
-        }
-        access_token = jwt.encode(access_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-        refresh_payload = {
-            'user_id': user.id,
-            'exp': timezone.now()  + datetime.timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS),
-            'iat': timezone.now()
-        }
-        refresh_token = jwt.encode(refresh_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-
-        return Response({'access_token': access_token, 'refresh_token': refresh_token}, status=status.HTTP_200_OK)
+        return Response(create_token_pair(user, family.pk), status=status.HTTP_200_OK)
 
 @extend_schema(tags=["User Management"])
 class RefreshTokenView(APIView):
@@ -162,7 +146,9 @@ class RefreshTokenView(APIView):
     refreshes the access token
     supported methods: Post
     Gets the user and refresh token from the serializer 
-    Blacklist the existing refresh token and generates both new access and refresh tokens
+    Moves the token family of the refresh token to its next generation and generates both new access and refresh tokens
+    refreshing an already used generation revokes the whole family
+    tokens issued before families existed are blacklisted and moved into a new family
     returns the tokens
     """
     serializer_class = RefreshTokenSerializer
@@ -172,33 +158,29 @@ class RefreshTokenView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         refresh_token = serializer.validated_data.get('refresh_token')
+        payload = serializer.validated_data.get('payload')
 
         user = serializer.validated_data.get('user')
-        BlacklistedToken.objects.create(user=user, token=refresh_token)
-        
-        new_access_payload = {
-            'user_id':user.id,
-            'exp':timezone.now() + datetime.timedelta(seconds=settings.JWT_ACCESS_EXP_DELTA_SECONDS),
-            'iat':timezone.now()
-        }
-        new_access_token = jwt.encode(new_access_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-        new_refresh_payload = {
-            'user_id': user.id,
-            'exp': timezone.now()  + datetime.timedelta(days=settings.JWT_REFRESH_EXP_DELTA_DAYS),
-            'iat': timezone.now()
-        }
-        new_refresh_token = jwt.encode(new_refresh_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-
-        return Response({'access_token': new_access_token, 'refresh_token':new_refresh_token}, status=status.HTTP_200_OK)
+        if 'fam' in payload:
+            family_id = payload['fam']
+            generation = TokenFamily.objects.rotate(family_id, payload.get('gen', 0))
+            if generation is None:
+                return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            revoked_tokens.revoke(user, revocation_key(payload, refresh_token), token_expiry(payload))
+            family_id, generation = TokenFamily.objects.start(user).pk, 0
+
+        return Response(create_token_pair(user, family_id, generation), status=status.HTTP_200_OK)
 
 @extend_schema(tags=["User Management"])
 class LogoutView(APIView):
     """
-    Blacklist refresh token on logout
+    Revokes the login session on logout
     Supported method: post
     gets the auth header from the request header
     gets auth prefix and refresh token from that auth header
-    validates the prefix and refresh token, if valid then blacklist it
+    validates the prefix and refresh token, if valid then revokes its token family
+    (or blacklist it if it was issued before token families)
     """
     serializer_class = None
     permission_classes = [permissions.IsAuthenticated]
@@ -216,13 +198,16 @@ class LogoutView(APIView):
             return Response({'error': 'Refresh token not provided'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            payload = jwt.decode(refresh_token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+            payload = decode_token(refresh_token)
         except jwt.ExpiredSignatureError:
             return Response({'error': 'Refresh token expired'}, status=status.HTTP_401_UNAUTHORIZED)
         except jwt.DecodeError:
             return Response({'error': 'Invalid refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        BlacklistedToken.objects.create(token=refresh_token, user=request.user)
+        if 'fam' in payload:
+            TokenFamily.objects.revoke(payload['fam'])
+        else:
+            revoked_tokens.revoke(request.user, revocation_key(payload, refresh_token), token_expiry(payload))
 
         return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
 